@@ -0,0 +1 @@
+"""ipalab-config benchmarks."""
@@ -0,0 +1,174 @@
+"""Run the benchmarks without airspeed velocity (asv).
+
+The benchmark suites follow asv conventions, so they can be tracked
+with asv, but they can also be run directly with:
+
+    python -m benchmarks [-b REGEX] [--save FILE] [--compare FILE]
+
+Results can be appended to a JSON Lines file, with the commit they were
+measured on, and compared to the last results saved in that file.
+"""
+
+import argparse
+import importlib
+import itertools
+import json
+import pkgutil
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import benchmarks
+
+
+def get_suites():
+    """Yield the benchmark suite classes of all 'bench_*' modules."""
+    for module_info in pkgutil.iter_modules(benchmarks.__path__):
+        if not module_info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"benchmarks.{module_info.name}")
+        for name, suite in vars(module).items():
+            if name.endswith("Suite") and isinstance(suite, type):
+                yield f"{module_info.name}.{name}", suite
+
+
+def get_params(suite):
+    """Return the combinations of the suite parameters."""
+    params = getattr(suite, "params", [])
+    if not params:
+        return [()]
+    if not isinstance(params[0], (list, tuple)):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def run_benchmark(suite, method, params):
+    """Time a benchmark method, with a new setup for each sample."""
+    repeat = getattr(suite, "repeat", 3)
+    min_repeat, max_repeat, max_time = (
+        repeat if isinstance(repeat, tuple) else (repeat, repeat, None)
+    )
+    number = getattr(suite, "number", 1)
+    samples = []
+    start = time.monotonic()
+    while len(samples) < max_repeat:
+        instance = suite()
+        if hasattr(instance, "setup"):
+            instance.setup(*params)
+        timer = time.perf_counter()
+        for _ in range(number):
+            getattr(instance, method)(*params)
+        samples.append((time.perf_counter() - timer) / number)
+        if hasattr(instance, "teardown"):
+            instance.teardown(*params)
+        elapsed = time.monotonic() - start
+        if len(samples) >= min_repeat and max_time and elapsed > max_time:
+            break
+    return samples
+
+
+def get_commit():
+    """Return the commit the benchmarks are run on, if known."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def load_results(filename):
+    """Return the last results saved in a JSON Lines file."""
+    try:
+        with open(filename, "r", encoding="utf-8") as results_file:
+            lines = [line for line in results_file if line.strip()]
+    except FileNotFoundError:
+        return {}
+    return json.loads(lines[-1])["results"] if lines else {}
+
+
+def save_results(filename, results):
+    """Append the results to a JSON Lines file."""
+    record = {
+        "commit": get_commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+    with open(filename, "a", encoding="utf-8") as results_file:
+        results_file.write(json.dumps(record) + "\n")
+
+
+def compare(median, previous, threshold):
+    """Return the comparison of a median with a previous result."""
+    if not previous:
+        return ""
+    ratio = median / previous
+    mark = ""
+    if ratio > 1 + threshold:
+        mark = " REGRESSION"
+    elif ratio < 1 - threshold:
+        mark = " improved"
+    return f" [{ratio:.2f}x{mark}]"
+
+
+def main():
+    """Run the benchmarks and display the results."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "-b",
+        "--bench",
+        default=".*",
+        help="Regular expression to select the benchmarks to run.",
+    )
+    parser.add_argument(
+        "--save",
+        metavar="FILE",
+        help="Append the results, and the current commit, to FILE.",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="FILE",
+        help="Compare the results to the last results saved in FILE.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative change reported when comparing (default: 0.1).",
+    )
+    args = parser.parse_args()
+    selected = re.compile(args.bench)
+    previous = load_results(args.compare) if args.compare else {}
+    results = {}
+    regressions = 0
+    for suite_name, suite in get_suites():
+        methods = sorted(m for m in dir(suite) if m.startswith("time_"))
+        for method, params in itertools.product(methods, get_params(suite)):
+            key = f"{suite_name}.{method}({', '.join(map(str, params))})"
+            if not selected.search(key):
+                continue
+            samples = run_benchmark(suite, method, params)
+            median = statistics.median(samples)
+            results[key] = median
+            comparison = compare(median, previous.get(key), args.threshold)
+            regressions += "REGRESSION" in comparison
+            print(
+                f"{key}: {median:.4f}s "
+                f"(min {min(samples):.4f}s, {len(samples)} samples)"
+                f"{comparison}",
+                flush=True,
+            )
+    if args.save:
+        save_results(args.save, results)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
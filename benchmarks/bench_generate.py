@@ -0,0 +1,126 @@
+"""Benchmark the phases of the lab generation."""
+
+import io
+import os
+import copy
+import shutil
+import logging
+import tempfile
+
+from ipalab_config.assets import start_copy_engine, finish_copy_engine
+from ipalab_config.compose import gen_compose_data
+from ipalab_config.inventory import gen_inventory_data
+from ipalab_config.lab import (
+    LabOptions,
+    get_yaml,
+    set_default_values,
+    gen_external_node_configuration,
+)
+from ipalab_config.logger import logger
+from ipalab_config.utils import copy_extra_files, copy_helper_files
+
+from benchmarks.configs import SCALES, make_lab_config
+
+
+class GenerateSuite:
+    """Time each phase of the lab generation, for different lab sizes."""
+
+    params = list(SCALES)
+    param_names = ["scale"]
+    # Generation updates the lab configuration and the compose data, so
+    # every run needs a new setup.
+    number = 1
+    repeat = (3, 10, 30.0)
+    timeout = 600
+
+    def __init__(self):
+        self.base_dir = None
+        self.lab_config = None
+        self.ready_config = None
+        self.compose = None
+        self.inventory_config = None
+        self.inventory = None
+        self.yaml = None
+
+    def setup(self, scale):
+        """Prepare the lab configuration, and the data of earlier phases."""
+        logger.setLevel(logging.WARNING)
+        self.base_dir = tempfile.mkdtemp(prefix="ipalab-bench-")
+        self.lab_config = make_lab_config(SCALES[scale])
+        set_default_values(self.lab_config, LabOptions())
+        self.ready_config = copy.deepcopy(self.lab_config)
+        self.compose = gen_compose_data(self.ready_config)
+        self.inventory_config = copy.deepcopy(self.ready_config)
+        self.inventory = gen_inventory_data(self.ready_config)
+        self.yaml = get_yaml()
+
+    def teardown(self, _scale):
+        """Remove generated files."""
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+        logger.setLevel(logging.NOTSET)
+
+    def time_gen_compose_data(self, _scale):
+        """Generate the compose data."""
+        gen_compose_data(self.lab_config)
+
+    def time_gen_inventory_data(self, _scale):
+        """Generate the inventory data, after the compose data."""
+        gen_inventory_data(self.inventory_config)
+
+    def time_gen_external_node_configuration(self, _scale):
+        """Run the external roles configuration, writing their files."""
+        gen_external_node_configuration(
+            self.ready_config, self.base_dir, self.compose
+        )
+
+    def time_save_compose(self, _scale):
+        """Serialize compose.yml."""
+        self.yaml.dump(self.compose, io.StringIO())
+
+    def time_save_inventory(self, _scale):
+        """Serialize inventory.yml."""
+        self.yaml.dump(self.inventory, io.StringIO())
+
+
+class AssetSuite:
+    """Time materializing helper and extra files in the output directory."""
+
+    params = ["copy", "hardlink", "reflink", "symlink"]
+    param_names = ["link_mode"]
+    number = 1
+    repeat = (3, 10, 30.0)
+    files = 200
+    file_size = 256 * 1024
+
+    def __init__(self):
+        self.tmpdir = None
+        self.base_dir = None
+        self.extra_files = []
+
+    def setup(self, _link_mode):
+        """Create the extra files to be copied."""
+        logger.setLevel(logging.WARNING)
+        self.tmpdir = tempfile.mkdtemp(prefix="ipalab-bench-")
+        self.base_dir = os.path.join(self.tmpdir, "lab")
+        source = os.path.join(self.tmpdir, "extra")
+        os.makedirs(source)
+        data = os.urandom(self.file_size)
+        self.extra_files = []
+        for index in range(self.files):
+            filename = os.path.join(source, f"file{index}.bin")
+            with open(filename, "wb") as out:
+                out.write(data)
+            self.extra_files.append(filename)
+
+    def teardown(self, _link_mode):
+        """Remove all files."""
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        logger.setLevel(logging.NOTSET)
+
+    def time_materialize_files(self, link_mode):
+        """Copy the helper files and the extra files."""
+        start_copy_engine(link_mode)
+        copy_helper_files(self.base_dir, "containerfiles")
+        copy_helper_files(self.base_dir, "scripts")
+        copy_extra_files(self.extra_files, os.path.join(self.base_dir, "data"))
+        finish_copy_engine()
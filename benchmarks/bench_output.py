@@ -0,0 +1,39 @@
+"""Benchmark saving the lab files with and without comments."""
+
+import io
+
+import ipalab_config
+
+from benchmarks.configs import make_sized_config
+
+
+class OutputSuite:
+    """Time the YAML serialization of compose and inventory files."""
+
+    params = ([100, 1000, 10000], ["comments", "fast_output"])
+    param_names = ["nodes", "output"]
+    # A document with comments can only be serialized once, so every
+    # run needs a new setup.
+    number = 1
+    repeat = (1, 3, 60.0)
+    timeout = 600
+
+    def __init__(self):
+        self.artifacts = None
+
+    def setup(self, nodes, output):
+        """Generate the lab data in memory."""
+        config = make_sized_config(nodes, fast_output=output == "fast_output")
+        self.artifacts = ipalab_config.generate(config)
+
+    def time_save_compose(self, _nodes, _output):
+        """Serialize compose.yml."""
+        self.artifacts.yaml.dump(
+            self.artifacts.documents["compose.yml"], io.StringIO()
+        )
+
+    def time_save_inventory(self, _nodes, _output):
+        """Serialize inventory.yml."""
+        self.artifacts.yaml.dump(
+            self.artifacts.documents["inventory.yml"], io.StringIO()
+        )
@@ -0,0 +1,106 @@
+"""Synthetic lab configurations for benchmarks."""
+
+# External nodes for each external role, not requiring any user file.
+EXTERNAL_ROLES = {
+    "dns": {"name": "nameserver", "role": "dns", "options": {"zones": []}},
+    "addc": {"name": "addc", "role": "addc"},
+    "keycloak": {"name": "keycloak", "role": "keycloak"},
+}
+
+# Lab sizes used by the benchmarks.
+SCALES = {
+    "small": {
+        "deployments": 1,
+        "servers": 1,
+        "replicas": 2,
+        "clients": 10,
+        "external_roles": ["dns"],
+    },
+    "medium": {
+        "deployments": 4,
+        "servers": 2,
+        "replicas": 4,
+        "clients": 250,
+        "external_roles": ["dns", "addc", "keycloak"],
+        "networks": True,
+    },
+    "large": {
+        "deployments": 10,
+        "servers": 3,
+        "replicas": 7,
+        "clients": 1000,
+        "external_roles": ["dns", "addc", "keycloak"],
+        "networks": True,
+    },
+}
+
+
+# Lab size used when not given.
+DEFAULT_SCALE = {
+    "deployments": 1,
+    "servers": 1,
+    "replicas": 2,
+    "clients": 10,
+    "external_roles": (),
+    "networks": False,
+}
+
+
+def make_lab_config(scale=None, **attributes):
+    """Return a synthetic lab configuration.
+
+    Args:
+        scale: The lab size, with any of the keys of 'DEFAULT_SCALE':
+            'deployments', the number of IPA deployments, 'servers',
+            'replicas' and 'clients', the number of nodes of each kind
+            per deployment, 'external_roles', the roles of the external
+            nodes, one node each, and 'networks', if each deployment
+            uses its own network.
+        attributes: Other global attributes of the lab.
+
+    Returns:
+        dict: The lab configuration.
+    """
+    scale = {**DEFAULT_SCALE, **(scale or {})}
+    deployments = scale["deployments"]
+    servers = scale["servers"]
+    replicas = scale["replicas"]
+    clients = scale["clients"]
+    ipa_deployments = []
+    for index in range(deployments):
+        cluster = {
+            "servers": [
+                {"name": "server", "capabilities": ["DNS"], "count": servers}
+            ],
+            "clients": {"hosts": [{"name": "client", "count": clients}]},
+        }
+        if replicas:
+            cluster["servers"].append({"name": "replica", "count": replicas})
+        deployment = {
+            "name": f"ipa{index}",
+            "domain": f"ipa{index}.test",
+            "dns": "server-1",
+            "cluster": cluster,
+        }
+        if scale["networks"]:
+            deployment["network"] = {"subnet": f"10.{index + 1}.0.0/16"}
+        ipa_deployments.append(deployment)
+    config = {
+        "lab_name": "benchmark",
+        "subnet": "10.0.0.0/16",
+        "container_fqdn": deployments > 1,
+        **attributes,
+        "ipa_deployments": ipa_deployments,
+    }
+    if scale["external_roles"]:
+        config["external"] = {
+            "hosts": [
+                dict(EXTERNAL_ROLES[role]) for role in scale["external_roles"]
+            ]
+        }
+    return config
+
+
+def make_sized_config(nodes, **attributes):
+    """Return a lab configuration with a single deployment and 'nodes'."""
+    return make_lab_config({"clients": max(nodes - 3, 1)}, **attributes)
@@ -0,0 +1,74 @@
+Feature: Ansible configuration for the lab
+    In order to run playbooks faster on the lab containers
+    As a developer
+    I want an Ansible configuration tuned for the lab
+
+Scenario: Use a fork for each node, and cache facts
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+            - name: replica
+          clients:
+            hosts:
+              - name: client
+                count: 6
+    """
+     When I run ipalab-config
+     Then the ipa-lab/ansible.cfg file contains
+     """
+     # Generated by ipalab-config for the lab 'ipa-lab'.
+     \[defaults\]
+     inventory = inventory.yml
+     forks = 8
+     (.|\n)*
+     gathering = smart
+     fact_caching = jsonfile
+     fact_caching_connection = .ansible-facts
+     (.|\n)*
+     \[connection\]
+     (.|\n)*
+     pipelining = True
+     """
+
+Scenario: Use the minimum number of forks for small labs
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config
+     Then the ipa-lab/ansible.cfg file contains
+     """
+     (.|\n)*
+     forks = 5
+     (.|\n)*
+     """
+
+Scenario: Limit the number of forks for large labs
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+          clients:
+            hosts:
+              - name: client
+                count: 200
+    """
+     When I run ipalab-config
+     Then the ipa-lab/ansible.cfg file contains
+     """
+     (.|\n)*
+     forks = 50
+     (.|\n)*
+     """
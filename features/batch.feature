@@ -0,0 +1,43 @@
+Feature: Generate multiple labs at once
+    In order to generate many lab variants in a pipeline
+    As a developer
+    I want to generate all the labs with a single command
+
+Scenario: Generate labs in batch mode, reporting failures
+    Given the lab configuration file "first.yml"
+    """
+    ipa_deployments:
+      - name: first
+        domain: first.test
+        cluster:
+          servers:
+            - name: server
+    """
+    And the lab configuration file "broken.yml"
+    """
+    ipa_deployments:
+      - name: broken
+        domain: broken.test
+        cluster:
+          servers:
+            - name: server
+              ip_address: 192.168.159.10
+            - name: replica
+              ip_address: 192.168.159.10
+    """
+    And the lab configuration file "second.yml"
+    """
+    ipa_deployments:
+      - name: second
+        domain: second.test
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config in batch mode
+     Then the batch exit code is 1
+      And the lab "first" was generated
+      And the lab "second" was generated
+      And the lab "broken" was not generated
+      And the batch output contains "broken.yml: failed"
+      And the batch output contains "2 labs generated, 1 failed"
@@ -0,0 +1,168 @@
+Feature: Validate lab configurations without generating them
+    In order to lint many lab configurations quickly
+    As a developer
+    I want to validate the configurations without writing any file
+
+Scenario: Validate multiple configurations
+    Given the lab configuration file "valid.yml"
+    """
+    lab_name: valid-lab
+    mount_varlog: true
+    ipa_deployments:
+      - name: valid
+        domain: valid.test
+        cluster:
+          servers:
+            - name: server
+          clients:
+            hosts:
+              - name: client
+                count: 2
+    """
+    And the lab configuration file "same-ip.yml"
+    """
+    ipa_deployments:
+      - name: broken
+        cluster:
+          servers:
+            - name: server
+              ip_address: 192.168.159.10
+            - name: replica
+              ip_address: 192.168.159.10
+    """
+    And the lab configuration file "same-name.yml"
+    """
+    ipa_deployments:
+      - name: broken
+        cluster:
+          servers:
+            - name: server
+          clients:
+            hosts:
+              - name: server
+    """
+    And the lab configuration file "no-fqdn.yml"
+    """
+    ipa_deployments:
+      - name: first
+        cluster:
+          servers:
+            - name: server
+      - name: second
+        cluster:
+          servers:
+            - name: server
+    """
+    And the lab configuration file "no-cluster.yml"
+    """
+    ipa_deployments:
+      - name: broken
+        domain: broken.test
+    """
+    And the lab configuration file "wrong-subnet.yml"
+    """
+    ipa_deployments:
+      - name: broken
+        cluster:
+          servers:
+            - name: server
+              ip_address: 10.0.0.10
+    """
+     When I check the lab configurations
+     Then the check exit code is 1
+      And the configuration "valid.yml" is valid
+      And the configuration "same-ip.yml" is invalid, with message "IP address '192.168.159.10' is assigned to both 'server' and 'replica'"
+      And the configuration "same-name.yml" is invalid, with message "Node name must be unique: server"
+      And the configuration "no-fqdn.yml" is invalid, with message "With multiple IPA deployments, 'container_fqdn' must be set to 'true'."
+      And the configuration "no-cluster.yml" is invalid, with message "Cluster not defined for domain 'broken.test'"
+      And the configuration "wrong-subnet.yml" is invalid, with message "IP address '10.0.0.10' of 'server' is not in subnet '192.168.159.0/24'"
+      And no file was written
+
+Scenario: All configurations are valid
+    Given the lab configuration file "first.yml"
+    """
+    ipa_deployments:
+      - name: first
+        cluster:
+          servers:
+            - name: server
+    """
+    And the lab configuration file "second.yml"
+    """
+    lab_name: second-lab
+    external:
+      hosts:
+        - name: nameserver
+          role: dns
+    ipa_deployments:
+      - name: second
+        dns: nameserver
+        cluster:
+          servers:
+            - name: server
+    """
+     When I check the lab configurations
+     Then the check exit code is 0
+      And the configuration "first.yml" is valid
+      And the configuration "second.yml" is valid
+      And no file was written
+
+Scenario: Deployment names must be unique
+    Given the deployment configuration
+    """
+    container_fqdn: true
+    ipa_deployments:
+      - name: ipa
+        domain: first.test
+        cluster:
+          servers:
+            - name: server
+      - name: ipa
+        domain: second.test
+        cluster:
+          servers:
+            - name: server
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "Deployment name must be unique: ipa"
+
+Scenario: Report the files used by a lab that do not exist
+    Given the lab configuration file "containerfile.yml"
+    """
+    containerfiles: ["missing/my-container"]
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+    And the lab configuration file "extra-data.yml"
+    """
+    extra_data: ["missing-data"]
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I check the lab configurations
+     Then the check exit code is 1
+      And the configuration "containerfile.yml" is invalid, with message "No such file or directory: '/"
+      And the configuration "containerfile.yml" is invalid, with message "/missing/my-container'"
+      And the configuration "extra-data.yml" is invalid, with message "No such file or directory: '"
+      And the configuration "extra-data.yml" is invalid, with message "missing-data'"
+      And no file was written
+
+Scenario: Report the playbooks that do not exist
+    Given the lab configuration file "lab.yml"
+    """
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I check the lab configurations with "-p missing.yml"
+     Then the check exit code is 1
+      And the configuration "lab.yml" is invalid, with message "No such file or directory: 'missing.yml'"
+      And no file was written
@@ -0,0 +1,104 @@
+Feature: Cache the configurations rendered from templates
+    In order to generate labs from templates quickly
+    As a developer
+    I want rendered configurations to be reused while their inputs do not change
+
+Scenario: Reuse a configuration while the variables it reads do not change
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: {{ ENV["LAB_NAME"] }}
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config on "lab.yml" with "LAB_NAME=first"
+     Then the configuration was rendered
+      And the lab "first" was generated
+     When I run ipalab-config on "lab.yml" with "LAB_NAME=first UNUSED=1"
+     Then the configuration was loaded from the cache
+     When I run ipalab-config on "lab.yml" with "LAB_NAME=second"
+     Then the configuration was rendered
+      And the lab "second" was generated
+     When I run ipalab-config on "lab.yml" with "LAB_NAME=first"
+     Then the configuration was loaded from the cache
+
+Scenario: Do not cache templates that read the whole environment
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: lab{{ ENV | length }}
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config on "lab.yml" with "LAB_NAME=first"
+     Then the configuration was rendered
+     When I run ipalab-config on "lab.yml" with "LAB_NAME=first"
+     Then the configuration was rendered
+
+Scenario: Disable the cache
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: {{ ENV["LAB_NAME"] }}
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config on "lab.yml" with "LAB_NAME=first IPALAB_CACHE_DIR="
+     Then the configuration was rendered
+     When I run ipalab-config on "lab.yml" with "LAB_NAME=first IPALAB_CACHE_DIR="
+     Then the configuration was rendered
+      And the lab "first" was generated
+
+Scenario: Ignore cache entries that other users could write
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: {{ ENV["LAB_NAME"] }}
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config on "lab.yml" with "LAB_NAME=first"
+      And the cache entries are made writable by other users
+      And I run ipalab-config on "lab.yml" with "LAB_NAME=first"
+     Then the configuration was rendered
+      And the command output contains "Ignoring cache entry not private to the user"
+     When the cache directory is made writable by other users
+      And I run ipalab-config on "lab.yml" with "LAB_NAME=first"
+     Then the configuration was rendered
+      And the command output contains "Ignoring cache directory not private to the user"
+
+Scenario: Remove the cache entries not used recently
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: {{ ENV["LAB_NAME"] }}
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+    And an unused cache entry "stale"
+     When I run ipalab-config on "lab.yml" with "LAB_NAME=first"
+     Then the cache entry "stale" was removed
+
+Scenario: Do not create the cache for plain configurations
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: plain
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config on "lab.yml" with "LAB_NAME=first"
+     Then the lab "plain" was generated
+      And the cache directory was not created
@@ -0,0 +1,50 @@
+Feature: Materialize files concurrently
+    In order to generate labs with many helper files quickly
+    As a developer
+    I want files to be copied concurrently, with predictable results
+
+Scenario: Keep the last file scheduled for a target
+    Given 40 source files of decreasing size
+     When all the source files are copied to the same target with "copy"
+     Then the target has the contents of the last source file
+     When all the source files are copied to the same target with "hardlink"
+     Then the target has the contents of the last source file
+
+Scenario: Copy the files used by the containers instead of symlinking them
+    Given the lab configuration file "lab.yml"
+    """
+    subnet: "192.168.53.0/24"
+    external:
+      domain: ipa.test
+      hosts:
+      - name: nameserver
+        hostname: unbound.ipa.test
+        ip_address: 192.168.53.254
+        role: dns
+        options:
+          zones:
+            - name: ipa.test
+              file: "zones/ipa.test"
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+    And the lab directory "zones"
+    And the lab configuration file "zones/ipa.test"
+    """
+    $ORIGIN ipa.test.
+    """
+     When I run ipalab-config for "lab.yml" with "--link-mode symlink"
+     Then the command exit code is 0
+      And the output file "scripts/wait-for-lab.sh" is a symbolic link
+      And the output file "unbound/unbound.conf" is not a symbolic link
+      And the output file "unbound/zones/ipa.test" is not a symbolic link
+      And the output file "containerfiles/fedora" is not a symbolic link
+
+Scenario: Do not write through a hard link
+    Given 2 source files of decreasing size
+     When all the source files are copied to the same target with "hardlink"
+      And the target is saved with "new contents"
+     Then the source files are not changed
@@ -100,3 +100,45 @@ Scenario: Pass container file through the command line
               dockerfile: my-container
         """
     And the file "my-container" is copied to directory "custom_container/containerfiles"
+
+Scenario: Copy container file when it cannot be linked
+    Given the deployment configuration
+    """
+    lab_name: custom_container
+    ipa_deployments:
+      - name: custom_distro
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+              distro: my-container
+    """
+    And the command line arguments "-f my-container --link-mode hardlink"
+      When I run ipalab-config
+      Then the output directory name is "custom_container"
+      And the file "my-container" is copied to directory "custom_container/containerfiles"
+
+Scenario: Keep a custom containerfile overriding a packaged one
+    Given the lab configuration file "lab.yml"
+    """
+    containerfiles: ["cf/fedora"]
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+    And the lab directory "cf"
+    And the lab configuration file "cf/fedora"
+    """
+    FROM custom
+    """
+     When I run ipalab-config for "lab.yml"
+     Then the command exit code is 0
+      And the written file "containerfiles/fedora" contains "FROM custom"
+     When I run ipalab-config for "lab.yml"
+     Then the command exit code is 0
+      And the written file "containerfiles/fedora" contains "FROM custom"
+     When I run ipalab-config for "lab.yml"
+     Then the written file "containerfiles/fedora" contains "FROM custom"
+      And the written file "containerfiles/rocky" contains "FROM"
@@ -0,0 +1,74 @@
+Feature: Deploy all the IPA deployments concurrently
+    In order to deploy labs with many IPA deployments faster
+    As a developer
+    I want a playbook that deploys all the deployments at the same time
+
+Scenario: Deploy the servers, replicas and clients of all deployments
+    Given the deployment configuration
+    """
+    container_fqdn: true
+    ipa_deployments:
+      - name: first
+        domain: first.test
+        cluster:
+          servers:
+            - name: server
+            - name: replica
+          clients:
+            hosts:
+              - name: client
+      - name: second
+        domain: second.test
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config
+     Then the ipa-lab/playbooks/deploy-lab.yml file is
+     """
+     - name: Install the first server of each deployment
+       hosts: ipaserver
+       become: true
+       strategy: free
+       roles:
+         - role: freeipa.ansible_freeipa.ipaserver
+           state: present
+     - name: Install the replicas of each deployment
+       hosts: ipareplicas
+       become: true
+       strategy: free
+       roles:
+         - role: freeipa.ansible_freeipa.ipareplica
+           state: present
+     - name: Install the clients of each deployment
+       hosts: ipaclients
+       become: true
+       strategy: free
+       roles:
+         - role: freeipa.ansible_freeipa.ipaclient
+           state: present
+     """
+
+Scenario: Only deploy the existing kinds of nodes
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I generate the lab in memory
+     Then the lab artifacts contain the document "playbooks/deploy-lab.yml"
+      And the in-memory playbook deploys the groups "ipaserver"
+
+Scenario: No playbook without IPA deployments
+    Given the deployment configuration
+    """
+    ipa_deployments: []
+    external:
+      hosts:
+        - name: node
+    """
+     When I generate the lab in memory
+     Then the lab artifacts do not contain the document "playbooks/deploy-lab.yml"
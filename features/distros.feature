@@ -47,6 +47,13 @@ Scenario: Use CentOS Stream with default tag
             build:
               context: containerfiles
               dockerfile: centos
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         """
 
 Scenario: Use CentOS Stream 10
@@ -97,6 +104,13 @@ Scenario: Use CentOS Stream 10
               args:
                 distro_image: centos
                 distro_tag: stream10
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         """
 Scenario: Use CentOS Stream 9
     Given the deployment configuration
@@ -146,4 +160,11 @@ Scenario: Use CentOS Stream 9
               args:
                 distro_image: centos
                 distro_tag: stream9
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         """
@@ -49,6 +49,13 @@ Scenario: Mount /var/log in log/<node>
               dockerfile: fedora
             volumes:
               - ${PWD}/logs/server:/var/log:rw
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         """
 
 Scenario: Do not /var/log in log/<node> for selected nodes
@@ -98,6 +105,13 @@ Scenario: Do not /var/log in log/<node> for selected nodes
               dockerfile: fedora
             volumes:
               - ${PWD}/logs/server:/var/log:rw
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
           replica:
             container_name: replica
             restart: no
@@ -116,4 +130,11 @@ Scenario: Do not /var/log in log/<node> for selected nodes
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         """
@@ -59,6 +59,16 @@ Scenario: External DNS
               dockerfile: fedora
             dns: 192.168.53.254
             dns_search: ipa.test
+            depends_on:
+              nameserver:
+                condition: service_healthy
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
           nameserver:
             container_name: nameserver
             restart: no
@@ -81,6 +91,11 @@ Scenario: External DNS
             dns_search: ipa.test
             volumes:
             - ${PWD}/unbound:/etc/unbound:rw
+            healthcheck:
+              test: ["CMD", "dig", "+time=2", "+tries=1", "@127.0.0.1", "localhost"]
+              interval: 10s
+              timeout: 5s
+              retries: 3
         """
       And the ipa-lab/inventory.yml file is
         """
@@ -200,6 +215,13 @@ Scenario: Samba AD DC
               args:
                 packages: systemd
             command: /usr/sbin/init
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
           server:
             container_name: server
             restart: no
@@ -218,6 +240,13 @@ Scenario: Samba AD DC
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         networks:
           ipanet:
             name: ipanet-ipa-ad-trust
@@ -300,6 +329,13 @@ Scenario: Keycloak
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         networks:
           ipanet:
             name: ipanet-ipa-idp
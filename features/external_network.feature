@@ -43,6 +43,13 @@ Scenario: Use an external network
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         """
 
 Scenario: Fail to provide 'subnet' with external network
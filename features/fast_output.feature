@@ -0,0 +1,60 @@
+Feature: Save lab files without comments
+    In order to quickly generate large labs
+    As a developer
+    I want to save the lab files without comments
+
+Scenario: Use plain data when saving without comments
+    Given the deployment configuration
+    """
+    lab_name: fast_lab
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        dns: server
+        cluster:
+          servers:
+            - name: server
+              capabilities:
+                - DNS
+          clients:
+            hosts:
+              - name: client
+                count: 2
+    """
+    And the command line arguments "--no-comments"
+     When I run ipalab-config
+     Then the output directory name is "fast_lab"
+      And the compose.yml services do not have comments
+
+
+Scenario: Files saved without comments have the same data
+    Given the deployment configuration
+    """
+    lab_name: fast_lab
+    fast_output: true
+    external:
+      hosts:
+        - name: nameserver
+          vars:
+            zone: ipa.test
+            enabled: yes
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        dns: server
+        cluster:
+          servers:
+            - name: server
+              capabilities:
+                - DNS
+            - name: replica
+          clients:
+            hosts:
+              - name: client
+                count: 3
+    """
+     When I serialize the lab documents with and without comments
+     Then the compose.yml without comments has no comments
+      And the compose.yml without comments contains 'restart: "no"'
+      And the compose.yml has the same data with and without comments
+      And the inventory.yml has the same data with and without comments
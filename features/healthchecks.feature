@@ -0,0 +1,56 @@
+Feature: Wait for the lab containers to be ready
+    In order to deploy the lab as soon as it is ready
+    As a developer
+    I want the lab containers to report when they are ready
+
+Scenario: Nodes wait for the role containers they use
+    Given the deployment configuration
+    """
+    package_cache: true
+    external:
+      hosts:
+        - name: nameserver
+          role: dns
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+          clients:
+            hosts:
+              - name: ubuntu
+                distro: ubuntu
+              - name: custom
+                image: quay.io/example/custom:latest
+    """
+     When I generate the lab in memory
+     Then the in-memory service "server" has a systemd healthcheck
+      And the in-memory service "ubuntu" has a systemd healthcheck
+      And the in-memory service "custom" has no healthcheck
+      And the in-memory service "server" waits for "nameserver" to be healthy
+      And the in-memory service "server" waits for "package-cache" to be healthy
+      And the in-memory service "custom" waits for "nameserver" to be healthy
+      And the in-memory service "package-cache" waits for "nameserver" to be healthy
+      And the in-memory service "nameserver" does not wait for other services
+      And the lab artifacts contain the asset "scripts/wait-for-lab.sh"
+
+Scenario: Disable the healthchecks
+    Given the deployment configuration
+    """
+    healthchecks: false
+    external:
+      hosts:
+        - name: nameserver
+          role: dns
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+    """
+     When I generate the lab in memory
+     Then the in-memory service "server" has no healthcheck
+      And the in-memory service "nameserver" has no healthcheck
+      And the in-memory service "server" does not wait for other services
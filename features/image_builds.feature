@@ -0,0 +1,64 @@
+Feature: Build each node image only once
+    In order to start large labs faster
+    As a developer
+    I want each container image to be built only once, in parallel
+
+Scenario: Build the images with a script
+    Given the deployment configuration
+    """
+    image_builds: script
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+              distro: centos
+              tag: stream10
+            - name: replica
+          clients:
+            hosts:
+              - name: client
+                count: 3
+              - name: custom
+                image: quay.io/example/custom:latest
+    """
+     When I run ipalab-config
+     Then the ipa-lab/build-images.sh file contains
+     """
+     #!/bin/bash
+     (.|\n)*
+     build -t localhost/centos:stream10 --build-arg distro_image=centos --build-arg distro_tag=stream10 -f containerfiles/centos containerfiles  # server
+     build -t localhost/fedora:latest -f containerfiles/fedora containerfiles  # replica, client-1, client-2, client-3
+     (.|\n)*
+     """
+      And the ipa-lab/build-images.sh file is executable
+      And no compose service has a "build" option
+
+Scenario: Keep the build of images built in different ways
+    Given the deployment configuration
+    """
+    image_builds: script
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+              distro: centos
+            - name: replica
+              tag: latest
+          clients:
+            hosts:
+              - name: client
+    """
+     When I run ipalab-config
+     Then a warning message is displayed about "Image 'localhost/fedora:latest' is built in different ways"
+      And the ipa-lab/build-images.sh file contains
+     """
+     (.|\n)*
+     build -t localhost/centos:latest -f containerfiles/centos containerfiles  # server
+
+     failed=0
+     (.|\n)*
+     """
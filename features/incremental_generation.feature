@@ -0,0 +1,35 @@
+Feature: Regenerate only the changed files
+    In order to avoid triggering unnecessary work on tools using the lab
+    As a developer
+    I want unchanged files to be kept untouched when regenerating a lab
+
+Scenario: Save the manifest of generated files
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: server_only
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config
+     Then the ipa-lab/.ipalab-manifest.json file contains
+     """
+     {"version": 1, "files": {"ansible.cfg": "sha256:[0-9a-f]{64}", "compose.yml": "sha256:[0-9a-f]{64}", "hosts": "sha256:[0-9a-f]{64}", "inventory.yml": "sha256:[0-9a-f]{64}", "playbooks/deploy-lab.yml": "sha256:[0-9a-f]{64}", "requirements.yml": "sha256:[0-9a-f]{64}"}}
+     """
+
+Scenario: Stop tracking the output directory when generation fails
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: server_only
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+    """
+     When saving the lab fails with "No space left on device"
+     Then an error OSError occurs, with message "No space left on device"
+      And the copy engine was stopped
+      And the manifest was discarded
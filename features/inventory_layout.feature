@@ -0,0 +1,169 @@
+Feature: Save shared inventory variables in group_vars files
+    In order to have smaller inventories for large labs
+    As a developer
+    I want the variables shared by hosts to be set on their groups
+
+Scenario: Factor the shared host variables into group_vars files
+    Given the deployment configuration
+    """
+    inventory_layout: group_vars
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+            - name: replica
+          clients:
+            hosts:
+              - name: client
+                count: 2
+    """
+     When I run ipalab-config
+     Then the ipa-lab/inventory.yml file is
+     """
+     ipa_lab:
+       vars:
+         ansible_connection: podman
+       hosts:
+         server:
+           ipaserver_idstart: 60001
+           ipaserver_idmax: 62000
+           ipaserver_rid_base: 63000
+           ipaserver_secondary_rid_base: 65000
+           ipaserver_hostname: server.ipa.test
+           ipadm_password: SomeDMpassword
+           ipaserver_realm: IPA.TEST
+           ipaclient_no_ntp: false
+           ipaserver_setup_firewalld: false
+           ipaserver_no_host_dns: true
+         replica:
+           ipareplica_hostname: replica.ipa.test
+           ipadm_password: SomeDMpassword
+           ipaserver_realm: IPA.TEST
+           ipaclient_no_ntp: true
+           ipareplica_setup_firewalld: false
+           ipareplica_no_host_dns: true
+           ipareplica_servers: server.ipa.test
+         client-1:
+           ipaclient_hostname: client-1.ipa.test
+         client-2:
+           ipaclient_hostname: client-2.ipa.test
+       children:
+         ipaserver:
+           hosts:
+             server:
+         ipa:
+           hosts:
+             server:
+             replica:
+             client-1:
+             client-2:
+         ipareplicas:
+           hosts:
+             replica:
+         ipaclients:
+           hosts:
+             client-1:
+             client-2:
+         ipa_deployments:
+           children:
+             ipa:
+     """
+      And the ipa-lab/group_vars/ipa.yml file is
+     """
+     ipaadmin_password: SomeADMINpassword
+     ipaserver_domain: ipa.test
+     """
+      And the ipa-lab/group_vars/ipaclients.yml file is
+     """
+     ipaclient_no_ntp: true
+     ipaclient_servers: server.ipa.test
+     """
+
+Scenario: Hosts have the same effective variables with group_vars
+    Given the deployment configuration
+    """
+    container_fqdn: true
+    ipa_deployments:
+      - name: first
+        domain: first.test
+        cluster:
+          servers:
+            - name: server
+              capabilities:
+                - DNS
+            - name: replica
+              count: 2
+          clients:
+            vars:
+              ipaclient_mkhomedir: true
+            hosts:
+              - name: client
+                count: 3
+              - name: special
+                vars:
+                  ipaclient_no_ntp: false
+      - name: second
+        domain: second.test
+        cluster:
+          servers:
+            - name: server
+          clients:
+            hosts:
+              - name: client
+                count: 2
+    """
+     When I generate the lab in memory with both inventory layouts
+     Then the lab artifacts contain the document "group_vars/first.yml"
+      And every host has the same effective variables in both layouts
+
+Scenario: Remove the group_vars files no longer generated
+    Given the lab configuration file "lab.yml"
+    """
+    inventory_layout: group_vars
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+              capabilities: [CA, DNS]
+            - name: r1
+              capabilities: [CA, KRA]
+            - name: r2
+              capabilities: [CA, KRA]
+    """
+     When I run ipalab-config for "lab.yml"
+     Then the output file "group_vars/ipareplicas.yml" exists
+    Given the lab configuration file "lab.yml"
+    """
+    inventory_layout: group_vars
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+              capabilities: [CA, DNS]
+            - name: r1
+              capabilities: [DNS]
+    """
+     When I run ipalab-config for "lab.yml"
+     Then the output file "group_vars/ipareplicas.yml" does not exist
+      And the output file "group_vars/ipa.yml" exists
+    Given the lab configuration file "lab.yml"
+    """
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+              capabilities: [CA, DNS]
+            - name: r1
+              capabilities: [DNS]
+    """
+     When I run ipalab-config for "lab.yml"
+     Then the output file "group_vars" does not exist
+      And the output file "inventory.yml" exists
@@ -0,0 +1,88 @@
+Feature: Allocate IP addresses for the lab nodes
+    In order to have predictable IP addresses on the lab
+    As a developer
+    I want automatic IP addresses to never clash with explicit ones
+
+Scenario: Automatic addresses skip explicitly set addresses
+    Given the deployment configuration
+    """
+    subnet: "192.168.100.0/24"
+    ipa_deployments:
+      - name: ipa_cluster
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+            - name: replica
+              ip_address: 192.168.100.2
+          clients:
+            - name: client
+    """
+     When I run ipalab-config
+     Then the ipa-lab/hosts file contains
+     """
+
+     # ipalab-config hosts for 'ipa-lab'
+     192.168.100.3     server.ipa.test
+     192.168.100.2     replica.ipa.test
+     192.168.100.4     client.ipa.test
+     """
+
+Scenario: Automatic addresses skip reserved address ranges
+    Given the deployment configuration
+    """
+    subnet: "192.168.100.0/24"
+    reserved_addresses:
+      - 192.168.100.2-192.168.100.9
+      - 192.168.100.10/31
+    ipa_deployments:
+      - name: ipa_cluster
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+          clients:
+            - name: client
+    """
+     When I run ipalab-config
+     Then the ipa-lab/hosts file contains
+     """
+
+     # ipalab-config hosts for 'ipa-lab'
+     192.168.100.12    server.ipa.test
+     192.168.100.13    client.ipa.test
+     """
+
+Scenario: The same IP address cannot be set on multiple nodes
+    Given the deployment configuration
+    """
+    subnet: "192.168.100.0/24"
+    external:
+      hosts:
+        - name: nameserver
+          ip_address: 192.168.100.254
+    ipa_deployments:
+      - name: ipa_cluster
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+              ip_address: 192.168.100.254
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "IP address '192.168.100.254' is assigned to both 'nameserver' and 'server'"
+
+Scenario: Fail when subnet has no more available addresses
+    Given the deployment configuration
+    """
+    subnet: "192.168.100.0/30"
+    ipa_deployments:
+      - name: ipa_cluster
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+            - name: replica
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "No IP address available in subnet '192.168.100.0/30'"
@@ -0,0 +1,44 @@
+Feature: Generate a lab in memory
+    In order to use ipalab-config from other tools
+    As a developer
+    I want to generate a lab without writing files
+
+Scenario: Generate the lab artifacts in memory
+    Given the deployment configuration
+    """
+    lab_name: memory_lab
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        dns: server
+        cluster:
+          servers:
+            - name: server
+              capabilities:
+                - DNS
+          clients:
+            hosts:
+              - name: client
+    """
+     When I generate the lab in memory
+     Then nothing was written to disk
+      And the lab artifacts directory is "memory_lab"
+      And the lab artifacts contain the documents
+      """
+      - compose.yml
+      - inventory.yml
+      - playbooks/deploy-lab.yml
+      - requirements.yml
+      """
+      And the in-memory service "client" uses the DNS "192.168.159.2"
+      And the in-memory hosts file contains "192.168.159.3     client.ipa.test"
+      And the lab artifacts contain the asset "scripts/open-browser.sh"
+      And the lab artifacts contain the asset "containerfiles/fedora"
+      And the in-memory document "compose.yml" is the same when dumped twice
+
+
+Scenario: Generate a lab in memory from a dictionary
+     When I generate the lab in memory from a dictionary with distro "centos"
+     Then nothing was written to disk
+      And the lab artifacts directory is "ipa-lab"
+      And the in-memory service "server" uses the distro "centos"
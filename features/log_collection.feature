@@ -0,0 +1,86 @@
+Feature: Collect and rotate the node logs
+    In order to keep the logs of failed runs, without filling the host disk
+    As a developer
+    I want scripts that archive and rotate the logs mounted on the host
+
+Scenario: Limit the size of the mounted logs
+    Given the deployment configuration
+    """
+    lab_name: logs
+    mount_varlog: true
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I generate the lab in memory
+     Then the lab artifacts contain the file "logs/logrotate.conf"
+      And the in-memory file "logs/logrotate.conf" has the line "logs/*/*.log"
+      And the in-memory file "logs/logrotate.conf" has the line "size 100M"
+      And the in-memory file "logs/logrotate.conf" has the line "rotate 3"
+      And the in-memory file "logs/logrotate.conf" has the line "copytruncate"
+      And the lab artifacts contain the asset "scripts/collect-logs.sh"
+      And the lab artifacts contain the asset "scripts/rotate-logs.sh"
+
+Scenario: Configure the size limits of the logs
+    Given the deployment configuration
+    """
+    lab_name: logs
+    mount_varlog: true
+    log_rotation:
+      size: 2g
+      rotate: 1
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I generate the lab in memory
+     Then the in-memory file "logs/logrotate.conf" has the line "size 2048M"
+      And the in-memory file "logs/logrotate.conf" has the line "rotate 1"
+
+Scenario: Disable the size limits of the logs
+    Given the deployment configuration
+    """
+    lab_name: logs
+    mount_varlog: true
+    log_rotation: false
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I generate the lab in memory
+     Then the lab artifacts do not contain the file "logs/logrotate.conf"
+
+Scenario: Logs are not limited if they are not mounted
+    Given the deployment configuration
+    """
+    lab_name: logs
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I generate the lab in memory
+     Then the lab artifacts do not contain the file "logs/logrotate.conf"
+
+Scenario: Invalid size limit of the logs
+    Given the deployment configuration
+    """
+    lab_name: logs
+    mount_varlog: true
+    log_rotation:
+      size: 100k
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "Invalid 'log_rotation' size: '100k', must be at least 1m"
@@ -48,6 +48,13 @@ Scenario: Minimal single server
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         """
       And the ipa-lab/inventory.yml file is
         """
@@ -125,6 +132,13 @@ Scenario: Minimum IPA cluster
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
           replica:
             container_name: replica
             restart: no
@@ -143,6 +157,13 @@ Scenario: Minimum IPA cluster
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
           client:
             container_name: client
             restart: no
@@ -161,6 +182,13 @@ Scenario: Minimum IPA cluster
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         """
       And the ipa-lab/inventory.yml file is
         """
@@ -275,6 +303,13 @@ Scenario: FQDN containers and replica capabilities
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
           replica.ipa.test:
             container_name: replica.ipa.test
             restart: no
@@ -293,6 +328,13 @@ Scenario: FQDN containers and replica capabilities
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
           client.ipa.test:
             container_name: client.ipa.test
             restart: no
@@ -311,6 +353,13 @@ Scenario: FQDN containers and replica capabilities
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         """
       And the ipa-lab/inventory.yml file is
         """
@@ -0,0 +1,72 @@
+Feature: Resolve the nameservers of the lab nodes
+    In order to use any node of the lab as a nameserver
+    As a developer
+    I want nameserver names to be resolved to the node IP addresses
+
+Scenario: Use a nameserver from another deployment
+    Given the deployment configuration
+    """
+    container_fqdn: true
+    subnet: "192.168.100.0/24"
+    ipa_deployments:
+      - name: first
+        domain: first.test
+        dns: server
+        cluster:
+          servers:
+            - name: server
+              ip_address: 192.168.100.10
+              capabilities:
+                - DNS
+      - name: second
+        domain: second.test
+        dns: server.first.test
+        cluster:
+          servers:
+            - name: server
+              ip_address: 192.168.100.20
+          clients:
+            hosts:
+              - name: client
+                dns: server.second.test
+    """
+     When I generate the lab in memory
+     Then the in-memory service "server.first.test" uses the DNS "192.168.100.10"
+      And the in-memory service "server.second.test" uses the DNS "192.168.100.10"
+      And the in-memory service "client.second.test" uses the DNS "192.168.100.20"
+
+Scenario: Fail when a nameserver is not a node of the lab
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        dns: nameserver
+        cluster:
+          servers:
+            - name: server
+          clients:
+            hosts:
+              - name: client
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "Nameserver is not a node of the lab: 'nameserver.ipa.test' \(used by: server, client\)"
+
+Scenario: Report only the first services using a missing nameserver
+    Given the deployment configuration
+    """
+    subnet: 10.0.0.0/16
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        dns: nameserver
+        cluster:
+          servers:
+            - name: server
+          clients:
+            hosts:
+              - name: client
+                count: 700
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "Nameserver is not a node of the lab: 'nameserver.ipa.test' \(used by: server, client-1, client-2, client-3, client-4 and 696 more\)$"
@@ -50,4 +50,11 @@ Scenario: Configure the pod network
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         """
@@ -53,6 +53,13 @@ Scenario: Clients-only deployment with external KDC
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
           client2.localkdc.test:
             container_name: client2.localkdc.test
             restart: no
@@ -71,6 +78,13 @@ Scenario: Clients-only deployment with external KDC
             build:
               context: containerfiles
               dockerfile: fedora
+            healthcheck:
+              test:
+                - CMD-SHELL
+                - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+              interval: 10s
+              timeout: 5m
+              retries: 3
         """
 
 Scenario: External hosts deployment with container_fqdn enabled
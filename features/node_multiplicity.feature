@@ -0,0 +1,149 @@
+Feature: Create multiple identical nodes
+    In order to test FreeIPA deployments at scale
+    As a developer
+    I want to define a node once and have it created many times
+
+Scenario: Create multiple clients with a name pattern
+    Given the deployment configuration
+    """
+    subnet: "192.168.100.0/24"
+    ipa_deployments:
+      - name: ipa_cluster
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+          clients:
+            - name: client-{index:02d}
+              count: 3
+    """
+     When I run ipalab-config
+     Then the ipa-lab/hosts file contains
+     """
+
+     # ipalab-config hosts for 'ipa-lab'
+     192.168.100.2     server.ipa.test
+     192.168.100.3     client-01.ipa.test
+     192.168.100.4     client-02.ipa.test
+     192.168.100.5     client-03.ipa.test
+     """
+
+Scenario: Create multiple replicas without a name pattern
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa_cluster
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+            - name: replica
+              count: 2
+              capabilities: ["CA"]
+    """
+     When I run ipalab-config
+     Then the ipa-lab/inventory.yml file is
+        """
+        ipa_lab:
+          vars:
+            ansible_connection: podman
+          children:
+            ipa_deployments: { children: { ipa_cluster: } }
+            ipa_cluster:
+              hosts:
+                server:
+                replica-1:
+                replica-2:
+            ipaserver:
+              hosts: { server: }
+            ipareplicas:
+              hosts:
+                replica-1:
+                replica-2:
+          hosts:
+            server:
+              ipaserver_hostname: server.ipa.test
+              ipaadmin_password: SomeADMINpassword
+              ipadm_password: SomeDMpassword
+              ipaserver_domain: ipa.test
+              ipaserver_realm: IPA.TEST
+              ipaclient_no_ntp: false
+              ipaserver_setup_firewalld: false
+              ipaserver_no_host_dns: true
+              ipaserver_idstart: 60001
+              ipaserver_idmax: 62000
+              ipaserver_rid_base: 63000
+              ipaserver_secondary_rid_base: 65000
+            replica-1:
+              ipareplica_hostname: replica-1.ipa.test
+              ipaadmin_password: SomeADMINpassword
+              ipadm_password: SomeDMpassword
+              ipaserver_domain: ipa.test
+              ipaserver_realm: IPA.TEST
+              ipareplica_servers: server.ipa.test
+              ipaclient_no_ntp: true
+              ipareplica_setup_firewalld: false
+              ipareplica_no_host_dns: true
+              ipareplica_setup_ca: true
+            replica-2:
+              ipareplica_hostname: replica-2.ipa.test
+              ipaadmin_password: SomeADMINpassword
+              ipadm_password: SomeDMpassword
+              ipaserver_domain: ipa.test
+              ipaserver_realm: IPA.TEST
+              ipareplica_servers: server.ipa.test
+              ipaclient_no_ntp: true
+              ipareplica_setup_firewalld: false
+              ipareplica_no_host_dns: true
+              ipareplica_setup_ca: true
+        """
+
+Scenario: Multiple nodes cannot share an IP address
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa_cluster
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+          clients:
+            - name: client
+              count: 2
+              ip_address: 192.168.159.100
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "'ip_address' cannot be used with 'count': 'client'"
+
+Scenario: Multiple nodes cannot share a hostname
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa_cluster
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+          clients:
+            - name: client
+              hostname: client.ipa.test
+              count: 2
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "'hostname' of host 'client' must use the '{index}' replacement field with 'count'"
+
+Scenario: Only the index can be used in node names
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa_cluster
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+          clients:
+            - name: client-{i}
+              count: 2
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "Invalid 'name' for host 'client-{i}': 'client-{i}', only the '{index}' replacement field can be used"
@@ -0,0 +1,89 @@
+Feature: Shared package cache
+    In order to deploy labs without downloading the same packages again
+    As a developer
+    I want the lab nodes to install packages from a local caching mirror
+
+Scenario: Nodes use the package cache repositories
+    Given the deployment configuration
+    """
+    package_cache: true
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+              distro: centos
+              tag: stream10
+          clients:
+            hosts:
+              - name: client
+              - name: ubuntu
+                distro: ubuntu
+              - name: custom
+                image: quay.io/example/custom:latest
+    """
+     When I generate the lab in memory
+     Then the in-memory service "package-cache" uses the image "localhost/package-cache"
+      And the in-memory service "package-cache" mounts "${PWD}/package-cache/cache:/var/cache/nginx/packages:rw"
+      And the in-memory service "server" mounts "${PWD}/package-cache/repos/centos:/etc/yum.repos.d:ro"
+      And the in-memory service "client" mounts "${PWD}/package-cache/repos/fedora:/etc/yum.repos.d:ro"
+      And the in-memory service "ubuntu" does not use the package cache
+      And the in-memory service "custom" does not use the package cache
+      And the lab artifacts contain the document "compose.yml"
+      And the lab artifacts contain the file "package-cache/repos/centos/ipalab-cache.repo"
+      And the lab artifacts contain the asset "package-cache/Containerfile"
+
+Scenario: Configure the package cache
+    Given the deployment configuration
+    """
+    package_cache:
+      ip_address: 192.168.159.200
+      cache_dir: /var/cache/ipalab-packages
+      max_size: 5g
+      mirrors:
+        fedora: http://mirror.example.test/fedora/
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config
+     Then the ipa-lab/package-cache/nginx.conf file contains
+     """
+     (.|\n)*
+     \s+keys_zone=packages:64m max_size=5g
+     (.|\n)*
+         upstream upstream_fedora {
+             server mirror.example.test:80;
+     (.|\n)*
+             location ~ \^/fedora/\(\.\*\)\$ {
+                 proxy_pass http://upstream_fedora/fedora/\$1;
+     (.|\n)*
+     """
+      And the ipa-lab/package-cache/repos/fedora/ipalab-cache.repo file contains
+     """
+     \[fedora\]
+     name=fedora \$releasever - \$basearch \(ipalab package cache\)
+     baseurl=http://192.168.159.200/fedora/releases/\$releasever/Everything/\$basearch/os/
+     (.|\n)*
+     """
+
+Scenario: Nodes outside the package cache network
+    Given the deployment configuration
+    """
+    package_cache: true
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        network:
+          name: ipa-net
+          subnet: 10.10.0.0/24
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config
+     Then a warning message is displayed about "Node 'server' is not in the package cache network."
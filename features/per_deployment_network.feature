@@ -51,6 +51,13 @@ Scenario: Single deployment with custom network
         build:
           context: containerfiles
           dockerfile: fedora
+        healthcheck:
+          test:
+            - CMD-SHELL
+            - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+          interval: 10s
+          timeout: 5m
+          retries: 3
     """
 
 Scenario: Multiple deployments with mixed network configuration
@@ -117,6 +124,13 @@ Scenario: Multiple deployments with mixed network configuration
         build:
           context: containerfiles
           dockerfile: fedora
+        healthcheck:
+          test:
+            - CMD-SHELL
+            - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+          interval: 10s
+          timeout: 5m
+          retries: 3
       server.target.ipa.test:
         container_name: server.target.ipa.test
         restart: no
@@ -135,6 +149,13 @@ Scenario: Multiple deployments with mixed network configuration
         build:
           context: containerfiles
           dockerfile: fedora
+        healthcheck:
+          test:
+            - CMD-SHELL
+            - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+          interval: 10s
+          timeout: 5m
+          retries: 3
     """
 
 Scenario: Per-deployment network with custom network name
@@ -186,6 +207,13 @@ Scenario: Per-deployment network with custom network name
         build:
           context: containerfiles
           dockerfile: fedora
+        healthcheck:
+          test:
+            - CMD-SHELL
+            - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+          interval: 10s
+          timeout: 5m
+          retries: 3
     """
 
 Scenario: Multiple deployments each with their own network
@@ -253,6 +281,13 @@ Scenario: Multiple deployments each with their own network
         build:
           context: containerfiles
           dockerfile: fedora
+        healthcheck:
+          test:
+            - CMD-SHELL
+            - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+          interval: 10s
+          timeout: 5m
+          retries: 3
       server.target.ipa.test:
         container_name: server.target.ipa.test
         restart: no
@@ -271,6 +306,13 @@ Scenario: Multiple deployments each with their own network
         build:
           context: containerfiles
           dockerfile: fedora
+        healthcheck:
+          test:
+            - CMD-SHELL
+            - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+          interval: 10s
+          timeout: 5m
+          retries: 3
     """
 
 Scenario: Per-deployment network with additional DNS options
@@ -323,6 +365,13 @@ Scenario: Per-deployment network with additional DNS options
         build:
           context: containerfiles
           dockerfile: fedora
+        healthcheck:
+          test:
+            - CMD-SHELL
+            - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+          interval: 10s
+          timeout: 5m
+          retries: 3
     """
 
 Scenario: Backward compatibility - no per-deployment network specified
@@ -381,6 +430,13 @@ Scenario: Backward compatibility - no per-deployment network specified
         build:
           context: containerfiles
           dockerfile: fedora
+        healthcheck:
+          test:
+            - CMD-SHELL
+            - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+          interval: 10s
+          timeout: 5m
+          retries: 3
       server.target.ipa.test:
         container_name: server.target.ipa.test
         restart: no
@@ -399,4 +455,11 @@ Scenario: Backward compatibility - no per-deployment network specified
         build:
           context: containerfiles
           dockerfile: fedora
+        healthcheck:
+          test:
+            - CMD-SHELL
+            - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+          interval: 10s
+          timeout: 5m
+          retries: 3
     """
@@ -0,0 +1,76 @@
+Feature: Images with the IPA packages installed
+    In order to deploy labs faster
+    As a developer
+    I want the IPA packages to be installed when the node images are built
+
+Scenario: Nodes use images with the packages of their role
+    Given the deployment configuration
+    """
+    prebaked_images: true
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+              capabilities: ["CA", "DNS", "KRA"]
+            - name: replica
+              capabilities: ["CA", "KRA", "DNS"]
+            - name: trust
+              capabilities: ["AD"]
+              distro: centos
+              tag: stream10
+          clients:
+            hosts:
+              - name: client
+                count: 2
+              - name: ubuntu
+                distro: ubuntu
+              - name: custom
+                image: quay.io/example/custom:latest
+    """
+     When I generate the lab in memory
+     Then the containerfile of the in-memory service "server" installs "ipa-server ipa-server-dns pki-kra"
+      And the containerfile of the in-memory service "trust" installs "ipa-server ipa-server-trust-ad"
+      And the containerfile of the in-memory service "client-1" installs "ipa-client"
+      And the in-memory services "server" and "replica" use the same image
+      And the in-memory services "client-1" and "client-2" use the same image
+      And the in-memory service "trust" image starts with "localhost/centos-ipa:stream10-"
+      And the in-memory service "client-1" image starts with "localhost/fedora-ipa:latest-"
+      And the in-memory service "ubuntu" uses the image "localhost/ubuntu:latest"
+      And the in-memory service "custom" uses the image "quay.io/example/custom:latest"
+
+Scenario: Disable the images with the IPA packages for a deployment
+    Given the deployment configuration
+    """
+    prebaked_images: true
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        prebaked_images: false
+        cluster:
+          servers:
+            - name: server
+    """
+     When I generate the lab in memory
+     Then the in-memory service "server" uses the image "localhost/fedora:latest"
+
+Scenario: Install the IPA packages on a user containerfile
+    Given the lab configuration file "lab.yml"
+    """
+    prebaked_images: true
+    containerfiles: ["cf/fedora"]
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+    And the lab directory "cf"
+    And the lab configuration file "cf/fedora"
+    """
+    FROM custom
+    """
+     When I generate the lab "lab.yml" in memory
+     Then the containerfile of the in-memory service "server" contains "FROM custom"
+      And the containerfile of the in-memory service "server" installs "ipa-server"
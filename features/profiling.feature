@@ -0,0 +1,51 @@
+Feature: Measure the lab generation phases
+    In order to find out why a lab generation is slow
+    As a developer
+    I want to obtain the time spent in each generation phase
+
+Scenario: Save the timings of each phase and a profile of the run
+    Given the lab configuration file "timed.yml"
+    """
+    lab_name: timed
+    external:
+      hosts:
+        - name: nameserver
+          role: dns
+          options:
+            zones: []
+    ipa_deployments:
+      - name: ipa
+        domain: timed.test
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config for "timed.yml" with "--timings-json timings.json --profile run.prof"
+     Then the command exit code is 0
+      And the timings report contains the phases
+        | phase                             |
+        | read_config                       |
+        | yaml_load                         |
+        | gen_compose_data                  |
+        | gen_inventory_data                |
+        | import_external_role_module:dns   |
+        | gen_config:dns                    |
+        | save_data:compose.yml             |
+        | save_data:inventory.yml           |
+        | queue_helper_files:containerfiles |
+        | queue_helper_files:scripts        |
+        | wait_file_copies                  |
+      And the profile "run.prof" contains "generate_ipalab_configuration"
+
+Scenario: Profiling is not available in batch mode
+    Given the lab configuration file "timed.yml"
+    """
+    ipa_deployments:
+      - name: timed
+        domain: timed.test
+        cluster:
+          servers:
+            - name: server
+    """
+     When I run ipalab-config for "timed.yml" with "--batch --profile run.prof"
+     Then the command exit code is 2
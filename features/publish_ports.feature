@@ -43,6 +43,13 @@ Scenario: Publish ports for a single server
         ports:
           - "8080:80"
           - "8443:443"
+        healthcheck:
+          test:
+            - CMD-SHELL
+            - systemctl is-system-running --wait | grep -Eqx 'running|degraded'
+          interval: 10s
+          timeout: 5m
+          retries: 3
     networks:
       ipanet:
         name: ipanet-ipa-lab
@@ -0,0 +1,119 @@
+Feature: Split the host resources between the lab nodes
+    In order to run large labs without oversubscribing the host
+    As a developer
+    I want to set a CPU and memory budget for the whole lab
+
+Scenario: Split the budget by node role
+    Given the deployment configuration
+    """
+    resources:
+      memory: 16g
+      cpus: 8
+    external:
+      hosts:
+        - name: nameserver
+          role: dns
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        cluster:
+          servers:
+            - name: server
+            - name: replica
+              capabilities: ["CA"]
+            - name: hidden
+          clients:
+            hosts:
+              - name: client
+    """
+     When I generate the lab in memory
+     Then the in-memory service "server" has "mem_limit" set to "6241m"
+      And the in-memory service "replica" has "mem_limit" set to "4681m"
+      And the in-memory service "hidden" has "mem_limit" set to "3120m"
+      And the in-memory service "client" has "mem_limit" set to "1560m"
+      And the in-memory service "nameserver" has "mem_limit" set to "780m"
+      And the in-memory service "server" has "cpus" set to "3.04"
+      And the in-memory service "replica" has "cpus" set to "2.28"
+      And the in-memory service "hidden" has "cpus" set to "1.52"
+      And the in-memory service "client" has "cpus" set to "0.76"
+      And the in-memory service "nameserver" has "cpus" set to "0.38"
+      And the in-memory service "server" has no "cpuset" set
+
+Scenario: Give the minimum resources to nodes with small shares
+    Given the deployment configuration
+    """
+    resources:
+      memory: 6g
+      cpus: 2
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+              memory: 3g
+          clients:
+            hosts:
+              - name: client
+                count: 4
+    """
+     When I generate the lab in memory
+     Then the in-memory service "server" has "mem_limit" set to "3g"
+      And the in-memory service "client-1" has "mem_limit" set to "768m"
+      And the in-memory service "server" has "cpus" set to "1.0"
+      And the in-memory service "client-4" has "cpus" set to "0.25"
+
+Scenario: Pin the nodes to host CPUs
+    Given the deployment configuration
+    """
+    resources:
+      cpus: 4
+      cpuset: "8-11"
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+          clients:
+            hosts:
+              - name: client
+                count: 3
+    """
+     When I generate the lab in memory
+     Then the in-memory service "server" has "cpuset" set to "8,9,10"
+      And the in-memory service "client-1" has "cpuset" set to "11"
+      And the in-memory service "client-2" has "cpuset" set to "8"
+      And the in-memory service "client-3" has "cpuset" set to "9"
+      And the in-memory service "server" has no "mem_limit" set
+
+Scenario: Refuse to generate a lab that does not fit the budget
+    Given the deployment configuration
+    """
+    resources:
+      memory: 4g
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+            - name: replica
+              capabilities: ["CA"]
+          clients:
+            hosts:
+              - name: client
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "Lab does not fit the 'resources' budget: memory required 4608m, available 4096m.\n  1 first_server node\(s\), at least 2048m each\n  1 ca_replica node\(s\), at least 2048m each\n  1 client node\(s\), at least 512m each"
+
+Scenario: CPU pinning requires a CPU budget
+    Given the deployment configuration
+    """
+    resources:
+      cpuset: true
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "'resources' 'cpuset' requires 'cpus'."
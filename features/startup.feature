@@ -0,0 +1,16 @@
+Feature: Fast command line startup
+    In order to call ipalab-config many times in CI pipelines
+    As a developer
+    I want the command line to start fast
+
+Scenario: Show version without loading heavy modules
+    When I run "ipalab-config --version" measuring import time
+    Then the command imports take less than 60 ms
+    And the module "ruamel.yaml" was not imported
+    And the module "jinja2" was not imported
+
+Scenario: Report missing configuration without loading heavy modules
+    When I run "ipalab-config does_not_exist.yml" measuring import time
+    Then the command imports take less than 60 ms
+    And the module "ruamel.yaml" was not imported
+    And the module "jinja2" was not imported
@@ -0,0 +1,66 @@
+"""Steps to verify batch generation of labs."""
+
+import os
+import sys
+import tempfile
+import subprocess
+
+from behave import given, when, then
+
+
+@given('the lab configuration file "{filename}"')  # pylint: disable=E1102
+def _given_lab_configuration_file(context, filename):
+    if not hasattr(context, "config_dir"):
+        tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        context.add_cleanup(tmpdir.cleanup)
+        context.config_dir = tmpdir.name
+    # pylint: disable=unspecified-encoding
+    with open(os.path.join(context.config_dir, filename), "w") as out:
+        out.write(context.text)
+
+
+@when("I run ipalab-config in batch mode")  # pylint: disable=E1102
+def _when_run_batch(context):
+    context.output_dir = os.path.join(context.config_dir, "output")
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "ipalab_config",
+            "--batch",
+            context.config_dir,
+            "-o",
+            context.output_dir,
+        ],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    context.batch_result = result
+
+
+@then("the batch exit code is {code:d}")  # pylint: disable=E1102
+def _then_batch_exit_code(context, code):
+    result = context.batch_result
+    assert (
+        result.returncode == code
+    ), f"Exit code: {result.returncode}\n{result.stderr}"
+
+
+@then('the lab "{name}" was generated')  # pylint: disable=E1102
+def _then_lab_generated(context, name):
+    for filename in ["compose.yml", "inventory.yml", "hosts"]:
+        path = os.path.join(context.output_dir, name, filename)
+        assert os.path.isfile(path), f"File not generated: {path}"
+
+
+@then('the lab "{name}" was not generated')  # pylint: disable=E1102
+def _then_lab_not_generated(context, name):
+    path = os.path.join(context.output_dir, name, "compose.yml")
+    assert not os.path.exists(path), f"File generated: {path}"
+
+
+@then('the batch output contains "{text}"')  # pylint: disable=E1102
+def _then_batch_output_contains(context, text):
+    output = context.batch_result.stderr
+    assert text in output, f"'{text}' not found in:\n{output}"
@@ -0,0 +1,69 @@
+"""Steps to verify the validation of lab configurations."""
+
+import os
+import sys
+import subprocess
+
+from behave import when, then
+
+
+def list_files(directory):
+    """Return the files in a directory, and their modification times."""
+    return {
+        os.path.join(dirname, name): os.stat(
+            os.path.join(dirname, name)
+        ).st_mtime_ns
+        for dirname, _, names in os.walk(directory)
+        for name in names
+    }
+
+
+def check_configs(context, args):
+    """Check the lab configurations in the configuration directory."""
+    context.files_before = list_files(context.config_dir)
+    context.check_result = subprocess.run(
+        [sys.executable, "-m", "ipalab_config", "--check", *args, "."],
+        cwd=context.config_dir,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+@when("I check the lab configurations")  # pylint: disable=E1102
+def _when_check_configs(context):
+    check_configs(context, [])
+
+
+@when('I check the lab configurations with "{args}"')  # pylint: disable=E1102
+def _when_check_configs_args(context, args):
+    check_configs(context, args.split())
+
+
+@then("the check exit code is {code:d}")  # pylint: disable=E1102
+def _then_check_exit_code(context, code):
+    result = context.check_result
+    assert (
+        result.returncode == code
+    ), f"Exit code: {result.returncode}\n{result.stderr}"
+
+
+@then('the configuration "{config}" is valid')  # pylint: disable=E1102
+def _then_config_valid(context, config):
+    output = context.check_result.stderr
+    assert f"./{config}: valid" in output, output
+
+
+@then(  # pylint: disable=E1102
+    'the configuration "{config}" is invalid, with message "{msg}"'
+)
+def _then_config_invalid(context, config, msg):
+    output = context.check_result.stderr
+    assert f"./{config}: invalid" in output, output
+    line = next(line for line in output.splitlines() if f"./{config}:" in line)
+    assert msg in line, line
+
+
+@then("no file was written")  # pylint: disable=E1102
+def _then_no_file_written(context):
+    assert list_files(context.config_dir) == context.files_before
@@ -0,0 +1,104 @@
+"""Steps to verify the cache of configurations rendered from templates."""
+
+import os
+import sys
+import json
+import time
+import subprocess
+
+from behave import given, when, then
+
+
+def get_cache_dir(context):
+    """Return the cache directory used by the scenario."""
+    return os.path.join(context.config_dir, "cache")
+
+
+@when(  # pylint: disable=E1102
+    'I run ipalab-config on "{filename}" with "{variables}"'
+)
+def _when_run_with_environment(context, filename, variables):
+    context.output_dir = os.path.join(context.config_dir, "output")
+    os.makedirs(context.output_dir, exist_ok=True)
+    timings = os.path.join(context.config_dir, "timings.json")
+    env = dict(os.environ)
+    env["IPALAB_CACHE_DIR"] = get_cache_dir(context)
+    env.update(variable.split("=", 1) for variable in variables.split())
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "ipalab_config",
+            os.path.join(context.config_dir, filename),
+            "--timings-json",
+            timings,
+        ],
+        cwd=context.output_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    context.command_output = result.stderr
+    # pylint: disable=unspecified-encoding
+    with open(timings, "r") as timings_file:
+        context.phases = {
+            phase["phase"] for phase in json.load(timings_file)["phases"]
+        }
+
+
+@then("the configuration was rendered")  # pylint: disable=E1102
+def _then_configuration_rendered(context):
+    assert "render_template" in context.phases, context.phases
+
+
+@then("the configuration was loaded from the cache")  # pylint: disable=E1102
+def _then_configuration_cached(context):
+    assert "config_cache_load" in context.phases, context.phases
+    assert "render_template" not in context.phases, context.phases
+    assert "yaml_load" not in context.phases, context.phases
+
+
+@given('an unused cache entry "{name}"')  # pylint: disable=E1102
+def _given_unused_cache_entry(context, name):
+    os.makedirs(get_cache_dir(context), mode=0o700, exist_ok=True)
+    path = os.path.join(get_cache_dir(context), f"{name}.pickle")
+    # pylint: disable=unspecified-encoding
+    with open(path, "w"):
+        pass
+    expired = time.time() - 60 * 24 * 3600
+    os.utime(path, (expired, expired))
+
+
+@when(  # pylint: disable=E1102
+    "the cache entries are made writable by other users"
+)
+def _when_entries_writable(context):
+    for entry in os.scandir(get_cache_dir(context)):
+        if entry.name.endswith(".pickle"):
+            os.chmod(entry.path, 0o666)
+
+
+@when(  # pylint: disable=E1102
+    "the cache directory is made writable by other users"
+)
+def _when_cache_dir_writable(context):
+    os.chmod(get_cache_dir(context), 0o777)
+
+
+@then('the cache entry "{name}" was removed')  # pylint: disable=E1102
+def _then_cache_entry_removed(context, name):
+    path = os.path.join(get_cache_dir(context), f"{name}.pickle")
+    assert not os.path.exists(path), f"File found: {path}"
+
+
+@then('the command output contains "{text}"')  # pylint: disable=E1102
+def _then_command_output_contains(context, text):
+    assert text in context.command_output, context.command_output
+
+
+@then("the cache directory was not created")  # pylint: disable=E1102
+def _then_cache_dir_not_created(context):
+    path = get_cache_dir(context)
+    assert not os.path.exists(path), f"Directory found: {path}"
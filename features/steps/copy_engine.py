@@ -0,0 +1,75 @@
+"""Steps to verify the concurrent materialization of files."""
+
+import os
+import shutil
+import tempfile
+
+from behave import given, when, then
+
+from ipalab_config.assets import start_copy_engine, finish_copy_engine
+from ipalab_config.utils import materialize_file, save_file
+
+
+@given("{count:d} source files of decreasing size")  # pylint: disable=E1102
+def _given_source_files(context, count):
+    tmpdir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+    context.add_cleanup(tmpdir.cleanup)
+    context.copy_dir = tmpdir.name
+    context.sources = []
+    for index in range(count):
+        path = os.path.join(context.copy_dir, f"source{index}")
+        # pylint: disable=unspecified-encoding
+        with open(path, "w") as out:
+            out.write(f"{index}\n" * (count - index) * 10000)
+        context.sources.append(path)
+
+
+@when(  # pylint: disable=E1102
+    'all the source files are copied to the same target with "{link_mode}"'
+)
+def _when_copy_to_same_target(context, link_mode):
+    context.target = os.path.join(context.copy_dir, "target")
+    start_copy_engine(link_mode, max_workers=8)
+    for source in context.sources:
+        materialize_file(source, context.target, shutil.copy2)
+    finish_copy_engine()
+
+
+@then(  # pylint: disable=E1102
+    "the target has the contents of the last source file"
+)
+def _then_target_is_last(context):
+    # pylint: disable=unspecified-encoding
+    with open(context.target, "r") as target, open(context.sources[-1]) as src:
+        assert target.read() == src.read(), "Target is not the last file"
+
+
+@when('the target is saved with "{text}"')  # pylint: disable=E1102
+def _when_target_saved(context, text):
+    save_file(context.copy_dir, "target", text)
+
+
+@then("the source files are not changed")  # pylint: disable=E1102
+def _then_sources_not_changed(context):
+    count = len(context.sources)
+    for index, source in enumerate(context.sources):
+        # pylint: disable=unspecified-encoding
+        with open(source, "r") as src:
+            assert (
+                src.read() == f"{index}\n" * (count - index) * 10000
+            ), f"Source changed: {source}"
+
+
+@then('the output file "{path}" is a symbolic link')  # pylint: disable=E1102
+def _then_output_file_is_symlink(context, path):
+    path = os.path.join(context.config_dir, "output", path)
+    assert os.path.islink(path), f"Not a symbolic link: {path}"
+
+
+@then(  # pylint: disable=E1102
+    'the output file "{path}" is not a symbolic link'
+)
+def _then_output_file_is_not_symlink(context, path):
+    path = os.path.join(context.config_dir, "output", path)
+    assert os.path.isfile(path), f"File not found: {path}"
+    assert not os.path.islink(path), f"Symbolic link: {path}"
@@ -0,0 +1,20 @@
+"""Steps to verify the lab deployment playbook."""
+
+from behave import then
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory playbook deploys the groups "{groups}"'
+)
+def _then_playbook_groups(context, groups):
+    plays = context.artifacts.documents["playbooks/deploy-lab.yml"]
+    deployed = [play["hosts"] for play in plays]
+    assert deployed == groups.split(), deployed
+
+
+@then(  # pylint: disable=E1102
+    'the lab artifacts do not contain the document "{path}"'
+)
+def _then_artifacts_no_document(context, path):
+    documents = context.artifacts.documents
+    assert path not in documents, sorted(documents)
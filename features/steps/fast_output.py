@@ -0,0 +1,65 @@
+"""Steps to verify saving files without comments."""
+
+import io
+
+from ruamel.yaml import YAML
+from ruamel.yaml.comments import CommentedMap
+
+from behave import when, then
+
+import ipalab_config
+
+
+@then("the compose.yml services do not have comments")  # pylint: disable=E1102
+def _then_services_without_comments(context):
+    for call in context.patches["yaml_dump"].call_args_list:
+        if "services" in call.args[0]:
+            for name, service in call.args[0]["services"].items():
+                assert isinstance(service, dict) and not isinstance(
+                    service, CommentedMap
+                ), f"Not a plain dict: {name}"
+            return
+    raise AssertionError("No compose file with services was generated.")
+
+
+@when(  # pylint: disable=E1102
+    "I serialize the lab documents with and without comments"
+)
+def _when_serialize_with_and_without_comments(context):
+    context.yaml_output = {}
+    for fast_output in [False, True]:
+        source = context.input_data.replace(
+            "fast_output: true", f"fast_output: {str(fast_output).lower()}"
+        )
+        artifacts = ipalab_config.generate(source)
+        for filename, data in artifacts.documents.items():
+            out = io.StringIO()
+            artifacts.yaml.dump(data, out)
+            context.yaml_output[(fast_output, filename)] = out.getvalue()
+
+
+@then(  # pylint: disable=E1102
+    "the {filename} without comments has no comments"
+)
+def _then_no_comments(context, filename):
+    output = context.yaml_output[(True, filename)]
+    assert "#" not in output, output
+    assert "#" in context.yaml_output[(False, filename)], "No comment found."
+
+
+@then(  # pylint: disable=E1102
+    "the {filename} without comments contains '{text}'"
+)
+def _then_output_contains(context, filename, text):
+    output = context.yaml_output[(True, filename)]
+    assert text in output, output
+
+
+@then(  # pylint: disable=E1102
+    "the {filename} has the same data with and without comments"
+)
+def _then_same_data(context, filename):
+    yaml = YAML(typ="safe", pure=True)
+    commented = yaml.load(context.yaml_output[(False, filename)])
+    fast = yaml.load(context.yaml_output[(True, filename)])
+    assert commented == fast, f"{commented}\n{fast}"
@@ -45,9 +45,7 @@ def _then_file_contents(context, filename):
     # This assumes all writes are done through the "save_file" function
     write_calls = iter(context.patches["open_file"]().write.call_args_list)
     for call in context.patches["open_file"].call_args_list:
-        if call.args and (
-            call.args[1].startswith("w") and not call.args[0].endswith(".yml")
-        ):
+        if call.args and call.args[1].startswith("w"):
             try:
                 observed = "".join(next(write_calls)[0])  # file data
             except StopIteration:
@@ -68,6 +66,10 @@ def _then_yaml_file_contents(context, filename):
     for index, call in enumerate(  # noqa: B007
         context.patches["yaml_dump"].call_args_list
     ):
+        if not isinstance(call.args[0], dict) or not isinstance(expected, dict):
+            if call.args[0] == expected:
+                break
+            continue
         a_b = set(expected.keys()) - set(call.args[0].keys())
         b_a = set(expected.keys()) - set(call.args[0].keys())
         if not a_b or not b_a:
@@ -0,0 +1,42 @@
+"""Steps to verify the healthchecks of the lab containers."""
+
+from behave import then
+
+
+def get_service(context, name):
+    """Return an in-memory compose service."""
+    return context.artifacts.compose["services"][name]
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" has a systemd healthcheck'
+)
+def _then_systemd_healthcheck(context, name):
+    healthcheck = get_service(context, name).get("healthcheck", {})
+    test = " ".join(healthcheck.get("test", []))
+    assert "systemctl is-system-running --wait" in test, healthcheck
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" has no healthcheck'
+)
+def _then_no_healthcheck(context, name):
+    service = get_service(context, name)
+    assert "healthcheck" not in service, service["healthcheck"]
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" waits for "{provider}" to be healthy'
+)
+def _then_depends_on_healthy(context, name, provider):
+    depends_on = get_service(context, name).get("depends_on", {})
+    condition = depends_on.get(provider, {}).get("condition")
+    assert condition == "service_healthy", depends_on
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" does not wait for other services'
+)
+def _then_no_dependencies(context, name):
+    service = get_service(context, name)
+    assert "depends_on" not in service, service["depends_on"]
@@ -0,0 +1,37 @@
+"""Steps to verify the image build plan."""
+
+from behave import then
+
+
+@then("the {filename} file is executable")  # pylint: disable=E1102
+def _then_file_is_executable(context, filename):
+    calls = context.patches["change_mode"].call_args_list
+    assert any(
+        call.args == (filename, 0o755) for call in calls
+    ), f"File not executable: {filename}"
+
+
+@then('no compose service has a "{option}" option')  # pylint: disable=E1102
+def _then_no_service_option(context, option):
+    for call in context.patches["yaml_dump"].call_args_list:
+        services = call.args[0].get("services")
+        if services is not None:
+            break
+    else:
+        raise AssertionError("No compose file created.")
+    for name, service in services.items():
+        assert "image" in service, f"Service '{name}' has no image"
+        assert option not in service, f"Service '{name}' has '{option}'"
+
+
+@then(  # pylint: disable=E1102
+    'a warning message is displayed about "{message}"'
+)
+def _then_warning_message(context, message):
+    warnings = [
+        call.args[0] % call.args[1:]
+        for call in context.patches["logger_warning"].call_args_list
+    ]
+    assert any(
+        message in warning for warning in warnings
+    ), f"Warning not found: {message}\n{warnings}"
@@ -0,0 +1,37 @@
+"""Steps to verify the generation of changed files only."""
+
+from unittest.mock import patch
+
+from behave import when, then
+
+from ipalab_config import assets, manifest
+from ipalab_config.__main__ import generate_ipalab_configuration
+
+from features.steps.run_ipalab_config import patched_execution
+
+
+@when('saving the lab fails with "{message}"')  # pylint: disable=E1102
+@patched_execution
+def _when_saving_fails(context, message):
+    with patch("ipalab_config.lab.save_lab_data", side_effect=OSError(message)):
+        try:
+            generate_ipalab_configuration()
+        except OSError as ex:
+            context.exception = ex
+
+
+@then("the copy engine was stopped")  # pylint: disable=E1102
+def _then_copy_engine_stopped(_context):
+    # pylint: disable=protected-access
+    assert assets._COPY_ENGINE.get() is None, "Copy engine still active"
+
+
+@then("the manifest was discarded")  # pylint: disable=E1102
+def _then_manifest_discarded(context):
+    # pylint: disable=protected-access
+    assert not manifest._MANIFESTS.get(), "Output directory still tracked"
+    for call in context.patches["open_file"].call_args_list:
+        filename, mode = call.args[:2]
+        assert not (
+            filename.endswith(manifest.MANIFEST_FILE) and "w" in mode
+        ), call
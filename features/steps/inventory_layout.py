@@ -0,0 +1,77 @@
+"""Steps to verify the inventory layouts."""
+
+import os
+
+from behave import when, then
+
+from features.steps.library_api import generate_in_memory
+
+
+def get_effective_vars(inventory, group_vars):
+    """Return the variables of each host, merging its groups variables."""
+    effective = {}
+    for lab_name, lab in inventory.items():
+        groups = {lab_name: list(lab["hosts"])}
+        for group, data in lab.get("children", {}).items():
+            if data and data.get("hosts"):
+                groups[group] = list(data["hosts"])
+        for host, host_vars in lab["hosts"].items():
+            variables = {}
+            for group, members in groups.items():
+                if host in members:
+                    variables.update(group_vars.get(group, {}))
+            variables.update(host_vars or {})
+            effective[host] = variables
+    return effective
+
+
+@when(  # pylint: disable=E1102
+    "I generate the lab in memory with both inventory layouts"
+)
+def _when_generate_both_layouts(context):
+    generate_in_memory(context, context.input_data)
+    context.inline_artifacts = context.artifacts
+    generate_in_memory(
+        context, context.input_data, inventory_layout="group_vars"
+    )
+
+
+@then(  # pylint: disable=E1102
+    'the lab artifacts contain the document "{path}"'
+)
+def _then_artifacts_document(context, path):
+    documents = context.artifacts.documents
+    assert path in documents, f"Document not found: {path}"
+
+
+# pylint: disable=E1102
+@then("every host has the same effective variables in both layouts")
+def _then_same_effective_vars(context):
+    group_vars = {
+        path.removeprefix("group_vars/").removesuffix(".yml"): data
+        for path, data in context.artifacts.documents.items()
+        if path.startswith("group_vars/")
+    }
+    assert group_vars, "No group_vars files generated"
+    expected = get_effective_vars(context.inline_artifacts.inventory, {})
+    observed = get_effective_vars(context.artifacts.inventory, group_vars)
+    assert set(observed) == set(expected), "Hosts differ"
+    for host, variables in expected.items():
+        assert observed[host] == variables, (
+            f"Variables differ for '{host}':\n"
+            f"Expected: {variables}\nObserved: {observed[host]}"
+        )
+    inline_size = len(context.inline_artifacts.dump("inventory.yml"))
+    assert len(context.artifacts.dump("inventory.yml")) < inline_size
+
+
+@then('the output file "{path}" exists')  # pylint: disable=E1102
+def _then_output_file_exists(context, path):
+    path = os.path.join(context.config_dir, "output", path)
+    assert os.path.exists(path), f"File not found: {path}"
+
+
+@then('the output file "{path}" does not exist')  # pylint: disable=E1102
+def _then_output_file_does_not_exist(context, path):
+    path = os.path.join(context.config_dir, "output", path)
+    assert not os.path.exists(path), f"File found: {path}"
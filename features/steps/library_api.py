@@ -0,0 +1,101 @@
+"""Steps to verify the in-memory library API."""
+
+from unittest.mock import patch
+
+from ruamel.yaml import YAML
+
+from behave import when, then
+
+import ipalab_config
+
+
+def generate_in_memory(context, config, **options):
+    """Generate a lab in memory, recording any filesystem change."""
+    with (
+        patch("builtins.open") as open_file,
+        patch("os.makedirs") as make_dirs,
+        patch("shutil.copytree") as copy_tree,
+        patch("shutil.copyfile") as copy_file,
+        patch("shutil.copy") as copy,
+        patch("shutil.copy2") as copy2,
+    ):
+        context.artifacts = ipalab_config.generate(config, **options)
+        context.io_patches = [
+            open_file,
+            make_dirs,
+            copy_tree,
+            copy_file,
+            copy,
+            copy2,
+        ]
+
+
+@when("I generate the lab in memory")  # pylint: disable=E1102
+def _when_generate_in_memory(context):
+    generate_in_memory(context, context.input_data)
+
+
+@when(  # pylint: disable=E1102
+    'I generate the lab in memory from a dictionary with distro "{distro}"'
+)
+def _when_generate_in_memory_dict(context, distro):
+    config = {
+        "ipa_deployments": [
+            {"name": "ipa", "cluster": {"servers": [{"name": "server"}]}}
+        ]
+    }
+    generate_in_memory(context, config, distro=distro)
+    assert "lab_name" not in config, "Configuration was modified"
+
+
+@then("nothing was written to disk")  # pylint: disable=E1102
+def _then_nothing_written(context):
+    for mock in context.io_patches:
+        assert not mock.called, f"Unexpected call: {mock.call_args_list}"
+
+
+@then('the lab artifacts directory is "{base_dir}"')  # pylint: disable=E1102
+def _then_artifacts_directory(context, base_dir):
+    assert context.artifacts.base_dir == base_dir, context.artifacts.base_dir
+
+
+@then("the lab artifacts contain the documents")  # pylint: disable=E1102
+def _then_artifacts_documents(context):
+    expected = YAML().load(context.text)
+    documents = sorted(context.artifacts.documents)
+    assert documents == expected, documents
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" uses the DNS "{dns}"'
+)
+def _then_service_dns(context, name, dns):
+    service = context.artifacts.compose["services"][name]
+    assert service["dns"] == dns, service["dns"]
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" uses the distro "{distro}"'
+)
+def _then_service_distro(context, name, distro):
+    service = context.artifacts.compose["services"][name]
+    assert f"/{distro}:" in service["image"], service["image"]
+
+
+@then('the in-memory hosts file contains "{line}"')  # pylint: disable=E1102
+def _then_hosts_contains(context, line):
+    assert line in context.artifacts.hosts.splitlines(), context.artifacts.hosts
+
+
+@then('the lab artifacts contain the asset "{path}"')  # pylint: disable=E1102
+def _then_artifacts_asset(context, path):
+    assert path in context.artifacts.assets, sorted(context.artifacts.assets)
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory document "{filename}" is the same when dumped twice'
+)
+def _then_dump_twice(context, filename):
+    first = context.artifacts.dump(filename)
+    second = context.artifacts.dump(filename)
+    assert first == second, f"{first}\n----\n{second}"
@@ -0,0 +1,19 @@
+"""Steps to verify the collection and rotation of the node logs."""
+
+from behave import then
+
+
+@then(  # pylint: disable=E1102
+    'the lab artifacts do not contain the file "{path}"'
+)
+def _then_artifacts_no_file(context, path):
+    files = context.artifacts.files
+    assert path not in files, sorted(files)
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory file "{path}" has the line "{line}"'
+)
+def _then_file_line(context, path, line):
+    lines = context.artifacts.files[path].splitlines()
+    assert line in [text.strip() for text in lines], lines
@@ -0,0 +1,32 @@
+"""Steps to verify the package cache configuration."""
+
+from behave import then
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" uses the image "{image}"'
+)
+def _then_service_image(context, name, image):
+    service = context.artifacts.compose["services"][name]
+    assert service["image"] == image, service["image"]
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" mounts "{volume}"'
+)
+def _then_service_volume(context, name, volume):
+    volumes = context.artifacts.compose["services"][name].get("volumes", [])
+    assert volume in volumes, volumes
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" does not use the package cache'
+)
+def _then_service_no_cache(context, name):
+    volumes = context.artifacts.compose["services"][name].get("volumes", [])
+    assert not any("package-cache" in volume for volume in volumes), volumes
+
+
+@then('the lab artifacts contain the file "{path}"')  # pylint: disable=E1102
+def _then_artifacts_file(context, path):
+    assert path in context.artifacts.files, sorted(context.artifacts.files)
@@ -0,0 +1,63 @@
+"""Steps to verify the images with the IPA packages installed."""
+
+import os
+import re
+
+from behave import when, then
+
+from ipalab_config.lab import generate
+
+
+def get_service_containerfile(context, name):
+    """Return the in-memory containerfile used by a service."""
+    service = context.artifacts.compose["services"][name]
+    filename = f"containerfiles/{service['build']['dockerfile']}"
+    return context.artifacts.files[filename]
+
+
+@when('I generate the lab "{filename}" in memory')  # pylint: disable=E1102
+def _when_generate_lab_file(context, filename):
+    context.artifacts = generate(
+        config_file=os.path.join(context.config_dir, filename)
+    )
+
+
+@then(  # pylint: disable=E1102
+    'the containerfile of the in-memory service "{name}" installs '
+    '"{packages}"'
+)
+def _then_containerfile_installs(context, name, packages):
+    containerfile = get_service_containerfile(context, name)
+    match = re.search(
+        r"installed at build time.*\nRUN \\\ndnf -y install \\\n"
+        r"((?:    [\w.-]+ \\\n)+)",
+        containerfile,
+    )
+    assert match, containerfile
+    installed = match.group(1).replace("\\", "").split()
+    assert installed == packages.split(), installed
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory services "{first}" and "{second}" use the same image'
+)
+def _then_services_same_image(context, first, second):
+    services = context.artifacts.compose["services"]
+    assert services[first]["image"] == services[second]["image"]
+    assert services[first]["build"] == services[second]["build"]
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" image starts with "{prefix}"'
+)
+def _then_service_image_prefix(context, name, prefix):
+    image = context.artifacts.compose["services"][name]["image"]
+    assert image.startswith(prefix), image
+
+
+@then(  # pylint: disable=E1102
+    'the containerfile of the in-memory service "{name}" contains "{text}"'
+)
+def _then_containerfile_contains(context, name, text):
+    containerfile = get_service_containerfile(context, name)
+    assert text in containerfile, containerfile
@@ -0,0 +1,70 @@
+"""Steps to verify the generation timings and profiling."""
+
+import io
+import os
+import sys
+import json
+import pstats
+import shlex
+import subprocess
+
+from behave import when, then
+
+
+@when(  # pylint: disable=E1102
+    'I run ipalab-config for "{filename}" with "{cli_args}"'
+)
+def _when_run_with_args(context, filename, cli_args):
+    context.command_result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "ipalab_config",
+            filename,
+            "-o",
+            "output",
+            *shlex.split(cli_args),
+        ],
+        cwd=context.config_dir,
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+@when('I run ipalab-config for "{filename}"')  # pylint: disable=E1102
+def _when_run(context, filename):
+    _when_run_with_args(context, filename, "")
+
+
+@then("the command exit code is {code:d}")  # pylint: disable=E1102
+def _then_command_exit_code(context, code):
+    result = context.command_result
+    assert (
+        result.returncode == code
+    ), f"Exit code: {result.returncode}\n{result.stderr}"
+
+
+@then("the timings report contains the phases")  # pylint: disable=E1102
+def _then_timings_phases(context):
+    path = os.path.join(context.config_dir, "timings.json")
+    # pylint: disable=unspecified-encoding
+    with open(path, "r") as timings_file:
+        report = json.load(timings_file)
+    assert report["config"] == "timed.yml", report["config"]
+    phases = {entry["phase"]: entry for entry in report["phases"]}
+    for row in context.table:
+        assert row["phase"] in phases, f"Missing phase: {row['phase']}"
+        assert phases[row["phase"]]["calls"] >= 1
+    assert report["total"] >= max(p["seconds"] for p in phases.values())
+
+
+@then('the profile "{filename}" contains "{function}"')  # pylint: disable=E1102
+def _then_profile_contains(context, filename, function):
+    output = io.StringIO()
+    stats = pstats.Stats(
+        os.path.join(context.config_dir, filename), stream=output
+    )
+    stats.print_stats(function)
+    assert function in output.getvalue(), f"'{function}' not profiled"
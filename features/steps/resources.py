@@ -0,0 +1,19 @@
+"""Steps to verify the resources of the lab nodes."""
+
+from behave import then
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" has "{option}" set to "{value}"'
+)
+def _then_service_option(context, name, option, value):
+    service = context.artifacts.compose["services"][name]
+    assert str(service.get(option)) == value, service.get(option)
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" has no "{option}" set'
+)
+def _then_service_no_option(context, name, option):
+    service = context.artifacts.compose["services"][name]
+    assert option not in service, service[option]
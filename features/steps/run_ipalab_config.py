@@ -25,6 +25,7 @@ def patched_execution(fn):
             patch("shutil.copyfile") as copy_file,
             patch("shutil.copy") as copy,
             patch("os.makedirs") as make_dirs,
+            patch("os.chmod") as change_mode,
             patch("ruamel.yaml.YAML.dump") as yaml_dump,
             patch("os.path.isfile"),
             patch("os.access"),
@@ -36,6 +37,7 @@ def patched_execution(fn):
                 "copy_file": copy_file,
                 "copy": copy,
                 "make_dirs": make_dirs,
+                "change_mode": change_mode,
                 "yaml_dump": yaml_dump,
                 "logger_warning": logger_warning,
             }
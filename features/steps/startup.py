@@ -0,0 +1,65 @@
+"""Steps to verify command line startup time."""
+
+import sys
+import subprocess
+
+from behave import when, then
+
+
+def parse_importtime(output):
+    """Return the cumulative import time, in us, of imported modules.
+
+    Returns a list of (module, cumulative time, is top level module).
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        modules.append(
+            (name.strip(), int(cumulative), not name[1:].startswith(" "))
+        )
+    return modules
+
+
+@when('I run "{command}" measuring import time')  # pylint: disable=E1102
+def _when_run_measuring_import_time(context, command):
+    _, *args = command.split(" ")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "ipalab_config", *args],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    modules = parse_importtime(result.stderr)
+    names = [name for name, _, _ in modules]
+    # Skip modules imported by the interpreter, before the command starts
+    startup = names.index("runpy") if "runpy" in names else 0
+    context.imported_modules = set(names[startup:])
+    context.imports = {
+        name: cumulative
+        for name, cumulative, toplevel in modules[startup:]
+        if toplevel
+    }
+
+
+@then(  # pylint: disable=E1102
+    "the command imports take less than {budget:d} ms"
+)
+def _then_imports_within_budget(context, budget):
+    elapsed = sum(context.imports.values()) / 1000
+    assert (
+        elapsed < budget
+    ), f"Imports took {elapsed:.1f} ms (budget: {budget} ms):\n" + "\n".join(
+        f"{name}: {value / 1000:.1f} ms"
+        for name, value in sorted(
+            context.imports.items(), key=lambda item: -item[1]
+        )
+    )
+
+
+@then('the module "{module}" was not imported')  # pylint: disable=E1102
+def _then_module_not_imported(context, module):
+    assert (
+        module not in context.imported_modules
+    ), f"Module '{module}' was imported"
@@ -0,0 +1,53 @@
+"""Steps to verify the storage of the lab nodes."""
+
+from behave import then
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" mounts a tmpfs "{tmpfs}"'
+)
+def _then_service_tmpfs(context, name, tmpfs):
+    service = context.artifacts.compose["services"][name]
+    assert tmpfs in service.get("tmpfs", []), service.get("tmpfs")
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" does not mount a tmpfs on "{path}"'
+)
+def _then_service_no_tmpfs_path(context, name, path):
+    service = context.artifacts.compose["services"][name]
+    tmpfs = [mount.partition(":")[0] for mount in service.get("tmpfs", [])]
+    assert path not in tmpfs, tmpfs
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory service "{name}" has no tmpfs mounts'
+)
+def _then_service_no_tmpfs(context, name):
+    service = context.artifacts.compose["services"][name]
+    assert "tmpfs" not in service, service["tmpfs"]
+
+
+@then(  # pylint: disable=E1102
+    'the in-memory compose declares the volume "{volume}"'
+)
+def _then_compose_volume(context, volume):
+    volumes = context.artifacts.compose.get("volumes", {})
+    assert volume in volumes, volumes
+
+
+@then("the in-memory compose declares no volumes")  # pylint: disable=E1102
+def _then_compose_no_volumes(context):
+    assert "volumes" not in context.artifacts.compose
+
+
+@then(  # pylint: disable=E1102
+    'the compose file declares the volume "{volume}"'
+)
+def _then_compose_file_volume(context, volume):
+    for call in context.patches["yaml_dump"].call_args_list:
+        data = call.args[0]
+        if "services" in data:
+            assert volume in data.get("volumes", {}), data.get("volumes")
+            return
+    raise AssertionError("No compose file with services was generated.")
@@ -0,0 +1,121 @@
+"""Steps to verify the regeneration of labs when their inputs change."""
+
+import os
+from unittest.mock import patch
+
+from behave import given, when, then
+
+from ipalab_config.lab import LabOptions, generate, write_artifacts
+from ipalab_config.watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    get_lab_changes,
+    get_lab_directories,
+    get_lab_inputs,
+    get_lab_snapshot,
+)
+
+
+def generate_watched_lab(context, filename):
+    """Generate a lab, saving its inputs and snapshot."""
+    config_file = os.path.join(context.config_dir, filename)
+    output = os.path.join(context.config_dir, "output")
+    artifacts = generate(config_file=config_file, output=output)
+    write_artifacts(artifacts)
+    context.watched_inputs = get_lab_inputs(config_file, artifacts)
+    context.watched_directories = get_lab_directories(
+        config_file, artifacts, LabOptions()
+    )
+    return get_lab_snapshot(artifacts)
+
+
+def get_file_watcher(kind):
+    """Return a file watcher, 'inotify' or 'polling'."""
+    return InotifyWatcher() if kind == "inotify" else PollingWatcher()
+
+
+@given('the lab directory "{dirname}"')  # pylint: disable=E1102
+def _given_lab_directory(context, dirname):
+    os.makedirs(os.path.join(context.config_dir, dirname), exist_ok=True)
+
+
+@when('I watch the lab "{filename}"')  # pylint: disable=E1102
+def _when_watch_lab(context, filename):
+    context.snapshot = generate_watched_lab(context, filename)
+
+
+@when('the lab "{filename}" is generated again')  # pylint: disable=E1102
+def _when_generate_again(context, filename):
+    current = generate_watched_lab(context, filename)
+    context.changes = "".join(get_lab_changes(context.snapshot, current))
+    context.snapshot = current
+
+
+@then('the watched files are "{filenames}"')  # pylint: disable=E1102
+def _then_watched_files(context, filenames):
+    expected = {
+        os.path.join(context.config_dir, name) for name in filenames.split()
+    }
+    assert context.watched_inputs == expected, context.watched_inputs
+
+
+@then('the watched directories are "{dirnames}"')  # pylint: disable=E1102
+def _then_watched_directories(context, dirnames):
+    expected = {
+        os.path.join(context.config_dir, name) for name in dirnames.split()
+    }
+    assert context.watched_directories == expected, context.watched_directories
+
+
+@then(  # pylint: disable=E1102
+    'the written file "{filename}" contains "{text}"'
+)
+def _then_written_file_contains(context, filename, text):
+    path = os.path.join(context.config_dir, "output", filename)
+    # pylint: disable=unspecified-encoding
+    with open(path, "r") as written:
+        assert text in written.read(), f"'{text}' not found in {path}"
+
+
+@then('the displayed changes contain "{text}"')  # pylint: disable=E1102
+def _then_changes_contain(context, text):
+    assert text in context.changes.splitlines(), context.changes
+
+
+@then("no changes are displayed")  # pylint: disable=E1102
+def _then_no_changes(context):
+    assert not context.changes, context.changes
+
+
+@then(  # pylint: disable=E1102
+    'a change to "{filename}" is detected by inotify'
+)
+def _then_inotify_change(context, filename):
+    path = os.path.join(context.config_dir, filename)
+    watcher = InotifyWatcher()
+    try:
+        watcher.watch([path])
+        # pylint: disable=unspecified-encoding
+        with open(path, "a") as out:
+            out.write("\n")
+        assert watcher.wait() == {path}
+    finally:
+        watcher.close()
+
+
+@then(  # pylint: disable=E1102
+    'a new file "{filename}" in "{dirname}" is detected by {kind}'
+)
+def _then_new_file_detected(context, filename, dirname, kind):
+    directory = os.path.join(context.config_dir, dirname)
+    path = os.path.join(directory, filename)
+    watcher = get_file_watcher(kind)
+    try:
+        watcher.watch([], [directory])
+        # pylint: disable=unspecified-encoding
+        with open(path, "w") as out:
+            out.write("new\n")
+        with patch("ipalab_config.watch.POLL_INTERVAL", 0.01):
+            assert path in watcher.wait()
+    finally:
+        watcher.close()
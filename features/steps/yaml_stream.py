@@ -0,0 +1,32 @@
+"""Steps to verify the streaming YAML dumper."""
+
+import io
+
+from behave import when, then
+
+import ipalab_config
+from ipalab_config.yamlstream import get_streaming_yaml
+
+
+@when(  # pylint: disable=E1102
+    "I serialize the lab documents with both YAML dumpers"
+)
+def _when_serialize_both_dumpers(context):
+    context.yaml_output = {}
+    for dumper in ["regular", "streaming"]:
+        # A document with comments can only be serialized once.
+        artifacts = ipalab_config.generate(context.input_data)
+        yaml = artifacts.yaml
+        if dumper == "streaming":
+            yaml = get_streaming_yaml(yaml)
+        for filename, data in artifacts.documents.items():
+            out = io.StringIO()
+            yaml.dump(data, out)
+            context.yaml_output[(dumper, filename)] = out.getvalue()
+
+
+@then("both YAML dumpers produce the same {filename}")  # pylint: disable=E1102
+def _then_same_output(context, filename):
+    regular = context.yaml_output[("regular", filename)]
+    streaming = context.yaml_output[("streaming", filename)]
+    assert regular == streaming, f"Expected:\n{regular}\nObserved:\n{streaming}"
@@ -0,0 +1,101 @@
+Feature: Storage profiles for the I/O heavy node paths
+    In order to speed up the deployment of throwaway labs
+    As a developer
+    I want to mount the paths written by IPA as tmpfs or named volumes
+
+Scenario: Mount all the paths of a deployment as tmpfs
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa
+        storage: tmpfs
+        cluster:
+          servers:
+            - name: server
+          clients:
+            hosts:
+              - name: client
+                storage:
+                  tmp: container
+    """
+     When I generate the lab in memory
+     Then the in-memory service "server" mounts a tmpfs "/var/lib/dirsrv:rw,exec,size=1g,mode=0755"
+      And the in-memory service "server" mounts a tmpfs "/var/lib/pki:rw,exec,size=512m,mode=0755"
+      And the in-memory service "server" mounts a tmpfs "/var/log/journal:rw,exec,size=128m,mode=0755"
+      And the in-memory service "server" mounts a tmpfs "/run:rw,exec,size=256m,mode=0755"
+      And the in-memory service "server" mounts a tmpfs "/tmp:rw,exec,size=512m"
+      And the in-memory service "client" mounts a tmpfs "/run:rw,exec,size=256m,mode=0755"
+      And the in-memory service "client" does not mount a tmpfs on "/tmp"
+      And the in-memory compose declares no volumes
+
+Scenario: Mix tmpfs and named volumes in a node
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+              storage:
+                dirsrv: {type: tmpfs, size: 2G}
+                pki: volume
+            - name: replica
+          clients:
+            hosts:
+              - name: client
+                count: 2
+                storage:
+                  journal: volume
+    """
+     When I generate the lab in memory
+     Then the in-memory service "server" mounts a tmpfs "/var/lib/dirsrv:rw,exec,size=2g,mode=0755"
+      And the in-memory service "server" mounts "server-pki:/var/lib/pki:rw"
+      And the in-memory service "client-1" mounts "client-1-journal:/var/log/journal:rw"
+      And the in-memory service "client-2" mounts "client-2-journal:/var/log/journal:rw"
+      And the in-memory service "replica" has no tmpfs mounts
+      And the in-memory compose declares the volume "server-pki"
+      And the in-memory compose declares the volume "client-1-journal"
+      And the in-memory compose declares the volume "client-2-journal"
+
+Scenario: Named volumes are declared in the compose file
+    Given the deployment configuration
+    """
+    lab_name: storage
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+              storage:
+                dirsrv: volume
+    """
+     When I run ipalab-config
+     Then the compose file contains service "server"
+      And the compose file declares the volume "server-dirsrv"
+
+Scenario: Invalid storage path
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+              storage:
+                ldap: tmpfs
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "Invalid 'storage' path: 'ldap', use one of: dirsrv, pki, journal, run, tmp"
+
+Scenario: Invalid storage type
+    Given the deployment configuration
+    """
+    ipa_deployments:
+      - name: ipa
+        storage: ramdisk
+        cluster:
+          servers:
+            - name: server
+    """
+     When I expect ipalab-config to fail
+     Then an error ValueError occurs, with message "Invalid 'storage' type for 'dirsrv': 'ramdisk', use one of: tmpfs, volume, container"
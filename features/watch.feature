@@ -0,0 +1,126 @@
+Feature: Generate a lab again when its inputs change
+    In order to iterate quickly on a lab layout
+    As a developer
+    I want the lab to be generated again, displaying what changed
+
+Scenario: Watch the configuration and the files it uses
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: watched
+    extra_data:
+      - notes.txt
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+    And the lab configuration file "notes.txt"
+    """
+    Some notes.
+    """
+     When I watch the lab "lab.yml"
+     Then the watched files are "lab.yml notes.txt"
+
+Scenario: Display the changes to the generated files
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: watched
+    extra_data:
+      - notes.txt
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+    And the lab configuration file "notes.txt"
+    """
+    Some notes.
+    """
+     When I watch the lab "lab.yml"
+      And the lab "lab.yml" is generated again
+     Then no changes are displayed
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: watched
+    extra_data:
+      - notes.txt
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+              ip_address: 192.168.159.10
+    """
+     When the lab "lab.yml" is generated again
+     Then the displayed changes contain "--- a/compose.yml"
+      And the displayed changes contain "-      - server.ipalab.local:192.168.159.2"
+      And the displayed changes contain "+      - server.ipalab.local:192.168.159.10"
+      And the displayed changes contain "--- a/hosts"
+      And the displayed changes contain "+192.168.159.10    server.ipalab.local"
+    Given the lab configuration file "notes.txt"
+    """
+    Some other notes.
+    """
+     When the lab "lab.yml" is generated again
+     Then the displayed changes contain "Updated: notes.txt"
+
+Scenario: Detect changes to the watched files
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: watched
+    """
+     Then a change to "lab.yml" is detected by inotify
+
+Scenario: Write the lab generated in memory
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: watched
+    extra_data:
+      - notes.txt
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+    And the lab configuration file "notes.txt"
+    """
+    Some notes.
+    """
+     When I watch the lab "lab.yml"
+     Then the written file "notes.txt" contains "Some notes."
+      And the written file "compose.yml" contains "container_name: server"
+    Given the lab configuration file "notes.txt"
+    """
+    Some other notes.
+    """
+     When the lab "lab.yml" is generated again
+     Then the written file "notes.txt" contains "Some other notes."
+
+Scenario: Watch the directories copied to the lab
+    Given the lab configuration file "lab.yml"
+    """
+    lab_name: watched
+    extra_data:
+      - data
+    ipa_deployments:
+      - name: ipa
+        cluster:
+          servers:
+            - name: server
+    """
+    And the lab directory "data"
+    And the lab configuration file "data/first.txt"
+    """
+    First file.
+    """
+     When I watch the lab "lab.yml"
+     Then the watched files are "lab.yml data/first.txt"
+      And the watched directories are "data"
+      And a new file "second.txt" in "data" is detected by inotify
+     When the lab "lab.yml" is generated again
+     Then the displayed changes contain "Copied: data/second.txt"
+      And the written file "data/second.txt" contains "new"
+      And a new file "third.txt" in "data" is detected by polling
@@ -0,0 +1,34 @@
+Feature: Stream large YAML documents
+    In order to generate labs with thousands of nodes
+    As a developer
+    I want the YAML files written without representing them at once
+
+Scenario: Streaming output is identical to the regular output
+    Given the deployment configuration
+    """
+    lab_name: streaming
+    external:
+      hosts:
+        - name: nameserver
+          vars: {zone: ipa.test}
+    ipa_deployments:
+      - name: ipa
+        domain: ipa.test
+        dns: server
+        cluster:
+          servers:
+            - name: server
+              capabilities:
+                - DNS
+            - name: replica
+              vars:
+                ipareplica_setup_ca: true
+          clients:
+            hosts:
+              - name: client
+                count: 20
+    """
+     When I serialize the lab documents with both YAML dumpers
+     Then both YAML dumpers produce the same compose.yml
+      And both YAML dumpers produce the same inventory.yml
+      And both YAML dumpers produce the same requirements.yml
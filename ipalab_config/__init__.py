@@ -1,5 +1,7 @@
 """ipalab_config module."""
 
+import importlib
+
 __version__ = "0.16.0"
 
 # List of supported disto containerfiles
@@ -11,3 +13,29 @@ supported_distros = {
     "rocky",
     "alma",
 }
+
+# How inventory host variables are saved:
+#   inline: All variables are set in each host entry of the inventory.
+#   group_vars: Variables shared by the hosts of a group are saved in
+#               'group_vars/<group>.yml' files.
+inventory_layouts = ("inline", "group_vars")
+
+# How the node images are built:
+#   compose: Each node service has a 'build' option.
+#   script: Each image is built once by 'build-images.sh', and node
+#           services only use the built 'image'.
+image_build_modes = ("compose", "script")
+
+
+# Library API, imported only when used to keep the command line fast.
+_LAZY_ATTRIBUTES = {
+    "generate": "ipalab_config.lab",
+    "LabArtifacts": "ipalab_config.artifacts",
+}
+
+
+def __getattr__(name):
+    """Provide the library API, importing it only when used."""
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
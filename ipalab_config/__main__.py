@@ -1,29 +1,31 @@
 """Generate compose and inventory configuration for a FreeIPA cluster."""
 
 import argparse
+import contextvars
 import os
 import sys
-
-from ruamel.yaml import YAML
-
-try:
-    from jinja2 import Environment
-
-    HAS_JINJA = True
-except ImportError:
-    HAS_JINJA = False
-
-from ipalab_config import __version__, supported_distros
-from ipalab_config.utils import (
-    die,
-    copy_extra_files,
-    copy_helper_files,
-    save_file,
-    get_service_ip_address,
-    import_external_role_module,
+import time
+import traceback
+
+from ipalab_config import (
+    __version__,
+    supported_distros,
+    inventory_layouts,
+    image_build_modes,
 )
-from ipalab_config.compose import gen_compose_data
-from ipalab_config.inventory import gen_inventory_data
+from ipalab_config.assets import LINK_MODES
+from ipalab_config.utils import die
+from ipalab_config.logger import logger
+from ipalab_config.timings import (
+    start_timings,
+    get_timings,
+    timed,
+    save_timings,
+)
+
+# Jinja2 and ruamel.yaml, and the modules depending on them, are only
+# imported when needed, to keep the command line startup fast.
+# pylint: disable=import-outside-toplevel
 
 
 def parse_arguments():
@@ -34,7 +36,14 @@ def parse_arguments():
             "Generate compose and inventory configuration for FreeIPA lab."
         ),
     )
-    opt_parser.add_argument("CONFIG", help="Lab description")
+    opt_parser.add_argument(
+        "CONFIG",
+        nargs="+",
+        help=(
+            "Lab description. With '--batch', multiple files, or "
+            "directories containing 'yml' or 'yaml' files, may be used."
+        ),
+    )
     opt_parser.add_argument("--version", action="version", version=__version__)
     opt_parser.add_argument(
         "-o",
@@ -94,208 +103,381 @@ def parse_arguments():
             "a node configuration to disable the behavior for that node."
         ),
     )
+    opt_parser.add_argument(
+        "--no-comments",
+        dest="NO_COMMENTS",
+        action="store_true",
+        help=(
+            "Save the compose and inventory files without comments, "
+            "which is much faster for large labs. The same as setting "
+            "'fast_output: true' in the lab configuration."
+        ),
+    )
+    opt_parser.add_argument(
+        "--inventory-layout",
+        dest="INVENTORY_LAYOUT",
+        choices=inventory_layouts,
+        default="inline",
+        help=(
+            "With 'group_vars', variables shared by the hosts of an "
+            "inventory group are saved in 'group_vars/<group>.yml' files, "
+            "instead of in every host entry. The same as setting "
+            "'inventory_layout' in the lab configuration. "
+            "(default: 'inline')"
+        ),
+    )
+    opt_parser.add_argument(
+        "--image-builds",
+        dest="IMAGE_BUILDS",
+        choices=image_build_modes,
+        default="compose",
+        help=(
+            "With 'script', each node image is built only once, in "
+            "parallel, by the generated 'build-images.sh', and the compose "
+            "services only reference the built images. The same as setting "
+            "'image_builds' in the lab configuration. (default: 'compose')"
+        ),
+    )
+    opt_parser.add_argument(
+        "--link-mode",
+        dest="LINK_MODE",
+        choices=LINK_MODES,
+        default="copy",
+        help=(
+            "How helper and extra files are materialized in the output "
+            "directory. If a link cannot be created, for example, across "
+            "filesystems, the file is copied. (default: 'copy')"
+        ),
+    )
+    opt_parser.add_argument(
+        "--batch",
+        dest="BATCH",
+        action="store_true",
+        help=(
+            "Generate one lab for each configuration file, using multiple "
+            "processes. Each lab is created in the output directory, in a "
+            "directory with the configuration file name, without extension."
+        ),
+    )
+    opt_parser.add_argument(
+        "--check",
+        dest="CHECK",
+        action="store_true",
+        help=(
+            "Only validate the configuration files, generating the labs "
+            "in memory, without writing any file. Multiple files, or "
+            "directories containing 'yml' or 'yaml' files, may be used."
+        ),
+    )
+    opt_parser.add_argument(
+        "--watch",
+        dest="WATCH",
+        action="store_true",
+        help=(
+            "Keep running, and generate the lab again whenever the "
+            "configuration file, or any file it uses, changes, writing "
+            "only the files that changed, and displaying the changes."
+        ),
+    )
+    opt_parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="JOBS",
+        metavar="JOBS",
+        type=int,
+        default=None,
+        help=(
+            "Number of labs generated in parallel in batch mode. "
+            "(default: number of CPUs)"
+        ),
+    )
+    opt_parser.add_argument(
+        "--timings-json",
+        dest="TIMINGS",
+        metavar="FILE",
+        default=None,
+        help=(
+            "Save the time spent in each generation phase to a JSON file. "
+            "In batch mode, the file contains the timings of every lab."
+        ),
+    )
+    opt_parser.add_argument(
+        "--profile",
+        dest="PROFILE",
+        metavar="FILE",
+        default=None,
+        help=(
+            "Profile the whole generation with cProfile, saving the "
+            "statistics to FILE, which can be read with 'pstats'."
+        ),
+    )
     opt_parser.add_argument(
         "--debug",
         action="store_true",
         help="Run ipalab-config in debug mode.",
     )
-    return opt_parser.parse_args()
+    args = opt_parser.parse_args()
+    if args.WATCH and (args.BATCH or args.CHECK):
+        opt_parser.error("'--watch' cannot be used with '--batch' or '--check'")
+    if args.CHECK:
+        if args.BATCH:
+            opt_parser.error("'--check' cannot be used with '--batch'")
+        args.CONFIG = get_batch_configs(args.CONFIG)
+    elif args.BATCH:
+        if args.PROFILE:
+            opt_parser.error("'--profile' cannot be used with '--batch'")
+        args.CONFIG = get_batch_configs(args.CONFIG)
+    elif len(args.CONFIG) > 1:
+        opt_parser.error("multiple configuration files require '--batch'")
+    else:
+        args.CONFIG = args.CONFIG[0]
+    return args
+
+
+def get_batch_configs(paths):
+    """Return the configuration files to be processed in batch mode."""
+    configs = []
+    for path in paths:
+        if os.path.isdir(path):
+            configs.extend(
+                sorted(
+                    os.path.join(path, name)
+                    for name in os.listdir(path)
+                    if name.endswith(".yml") or name.endswith(".yaml")
+                )
+            )
+        else:
+            configs.append(path)
+    return configs
+
+
+def get_lab_options(args, output):
+    """Return the 'LabOptions' given by the command line arguments."""
+    from ipalab_config.lab import LabOptions
+
+    return LabOptions(
+        config_file=args.CONFIG,
+        output=output,
+        containerfiles=args.RECIPES,
+        playbooks=args.PLAYBOOKS,
+        distro=args.DISTRO,
+        mount_varlog=args.VARLOG,
+        fast_output=args.NO_COMMENTS,
+        link_mode=args.LINK_MODE,
+        inventory_layout=args.INVENTORY_LAYOUT,
+        image_builds=args.IMAGE_BUILDS,
+    )
+
 
+def generate_ipalab_configuration(args=None):
+    """Generate compose and inventory."""
+    if args is None:
+        args = parse_arguments()
 
-def save_data(yaml, base_dir, filename, yamldata):
-    """Save YAML data as a YAML file."""
     # pylint: disable=unspecified-encoding
-    with open(os.path.join(base_dir, filename), "w") as out:
-        yaml.dump(yamldata, out)
-
-
-def gen_external_node_configuration(lab_config, base_dir, compose_config):
-    """Generate configuration for external nodes"""
-    for _, node_data in compose_config["services"].items():
-        external_data = node_data.pop("external_node", None)
-        if external_data:
-            # update dns on nodes
-            if "dns" in node_data:
-                dns = node_data["dns"]
-                if dns in lab_config["nodes"]:
-                    dns = lab_config["nodes"][dns]
-                elif dns in compose_config["services"]:
-                    dns = get_service_ip_address(
-                        compose_config["services"][dns]
-                    )
-                node_data["dns"] = dns
-                if not node_data.get("dns_search"):
-                    node_data.pop("dns_search", None)
-            else:
-                node_data.pop("dns_search", None)
-            # update roles
-            role = external_data.get("role")
-            if role:
-                options = external_data.get("options", {})
-                try:
-                    module = import_external_role_module(role)
-                    config_fn = getattr(module, "gen_config", None)
-                except ImportError:
-                    config_fn = None
-                if config_fn:
-                    config_fn(lab_config, base_dir, node_data, options)
-                else:
-                    raise ValueError(
-                        f"Role does not provide 'gen_config': '{role}'"
-                    )
-
-
-def gen_optional_files(lab_config, base_dir, yaml):
-    """Save optional 'misc' files."""
-    # save /etc/hosts file patch
-    save_file(
-        base_dir,
-        "hosts",
-        f"\n# ipalab-config hosts for '{lab_config['lab_name']}'\n"
-        + "\n".join(
-            [
-                f"{v:18s}{k.replace('_', '.')}"
-                for k, v in lab_config.get("nodes", {}).items()
-            ]
-        ),
-    )
+    if not (os.path.isfile(args.CONFIG) and os.access(args.CONFIG, os.R_OK)):
+        raise RuntimeError(f"Cannot read config file: {args.CONFIG}")
 
-    # add Ansible Galaxy requirements.yml
-    save_data(
-        yaml,
-        base_dir,
-        "requirements.yml",
-        {
-            "collections": [
-                {"name": "containers.podman"},
-                {"name": "freeipa.ansible_freeipa"},
-            ]
-        },
+    from ipalab_config.lab import (
+        get_yaml,
+        is_template,
+        load_config,
+        set_default_values,
+        gen_lab_data,
+        save_lab_data,
+        lab_output,
     )
+    from ipalab_config.config_cache import get_config_cache
 
+    if args.BATCH:
+        output = get_batch_output_dir(args.OUTPUT, args.CONFIG)
+    else:
+        output = args.OUTPUT
+    options = get_lab_options(args, output)
 
-def save_containers_data(lab_config, base_dir, args):
-    """Copy containerfiles to result directory."""
-    copy_helper_files(base_dir, "containerfiles")
+    yaml = get_yaml()
+    with timed("read_config"), open(args.CONFIG, "r") as config_file:
+        source = config_file.read()
+    # Only templates are cached, so the cache is not created for others.
+    cache = get_config_cache() if is_template(source) else None
+    data = load_config(source, yaml, cache)
 
-    containerfiles = [
-        (
-            os.path.realpath(
-                os.path.join(
-                    os.path.dirname(os.path.realpath(args.CONFIG)),
-                    containerfile,
-                )
-            )
-            if not containerfile.startswith("/")
-            else containerfile
-        )
-        for containerfile in lab_config.get("containerfiles", [])
-    ]
-    copy_extra_files(
-        containerfiles + args.RECIPES,
-        os.path.join(base_dir, "containerfiles"),
-    )
+    set_default_values(data, options)
+    base_dir = options.output or data["lab_name"]
 
+    # generate configuration
+    lab_data = gen_lab_data(data)
 
-def save_ansible_data(_lab_config, base_dir, args):
-    """Copy Ansible playbooks to result directory."""
-    plays = []
-    for play in args.PLAYBOOKS:
-        if os.path.isfile(play):
-            plays.append(play)
-        if os.path.isdir(play):
-            plays.extend(
-                [
-                    os.path.join(dirname, name)
-                    for dirname, _, filenames in os.walk(play)
-                    for name in filenames
-                    if name.endswith(".yml") or name.endswith(".yaml")
-                ]
+    # save configuration
+    with lab_output(base_dir, options.link_mode):
+        save_lab_data(data, base_dir, lab_data, options, yaml)
+
+
+def generate_instrumented(args):
+    """Generate a lab, measuring its phases and profiling, if requested."""
+    timings = start_timings() if getattr(args, "TIMINGS", None) else None
+    profiler = None
+    if getattr(args, "PROFILE", None):
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        generate_ipalab_configuration(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.PROFILE)
+            logger.info("Profile saved to: %s", args.PROFILE)
+        if timings is not None:
+            save_timings(
+                args.TIMINGS, {"config": args.CONFIG, **timings.report()}
             )
-    if plays:
-        copy_extra_files(plays, os.path.join(base_dir, "playbooks"))
+            logger.info("Timings saved to: %s", args.TIMINGS)
 
 
-def set_default_values(data, args):
-    """Ensure sane configuration default values."""
-    data.setdefault("lab_name", "ipa-lab")
-    data.setdefault("distro", "fedora")
-    if args.DISTRO:
-        distro, *tag = args.DISTRO.split(":", 1)
-        data["distro"] = distro
-        data["tag"] = "".join(tag) if tag else None
-    data.setdefault("container_fqdn", False)
-    data.setdefault("mount_varlog", args.VARLOG)
-    data.setdefault("domain", "ipalab.local")
+def get_batch_output_dir(output, config):
+    """Return the output directory for a lab generated in batch mode."""
+    name, _ = os.path.splitext(os.path.basename(config))
+    return os.path.join(output or "", name)
 
 
-def generate_ipalab_configuration():
-    """Generate compose and inventory."""
-    args = parse_arguments()
-    yaml = YAML()
-    yaml.explicit_start = True
-    yaml.indent(mapping=2, sequence=4, offset=2)
+def generate_batch_item(args):
+    """Generate one lab of a batch, with its own generation state.
 
-    # pylint: disable=unspecified-encoding
-    if not (os.path.isfile(args.CONFIG) and os.access(args.CONFIG, os.R_OK)):
-        raise RuntimeError(f"Cannot read config file: {args.CONFIG}")
+    Returns the error message, if generation failed, the time spent, and
+    the timings report, if enabled.
+    """
+    start = time.monotonic()
+    context = contextvars.copy_context()
+    if args.TIMINGS:
+        context.run(start_timings)
+    error = None
+    try:
+        context.run(generate_ipalab_configuration, args)
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        error = traceback.format_exc() if args.debug else str(err)
+        error = error or type(err).__name__
+    timings = context.run(get_timings)
+    report = timings.report() if timings is not None else None
+    return error, time.monotonic() - start, report
+
+
+def generate_batch(args):
+    """Generate multiple labs using a pool of processes."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    if not args.CONFIG:
+        raise RuntimeError("No configuration file found.")
+    output_dirs = {}
+    for config in args.CONFIG:
+        base_dir = get_batch_output_dir(args.OUTPUT, config)
+        if base_dir in output_dirs:
+            raise RuntimeError(
+                f"Configurations '{output_dirs[base_dir]}' and '{config}' "
+                f"would be generated in the same directory: {base_dir}"
+            )
+        output_dirs[base_dir] = config
+    labs = [
+        argparse.Namespace(**{**vars(args), "CONFIG": config})
+        for config in args.CONFIG
+    ]
+    failed = 0
+    reports = []
+    start = time.monotonic()
+    with ProcessPoolExecutor(max_workers=args.JOBS) as executor:
+        results = executor.map(generate_batch_item, labs)
+        for lab, (error, elapsed, report) in zip(labs, results):
+            if report is not None:
+                reports.append(
+                    {"config": lab.CONFIG, "failed": bool(error), **report}
+                )
+            if error:
+                failed += 1
+                logger.error(
+                    "%s: failed (%.2fs): %s", lab.CONFIG, elapsed, error
+                )
+            else:
+                logger.info("%s: generated (%.2fs)", lab.CONFIG, elapsed)
+    logger.info(
+        "%d labs generated, %d failed (%.2fs)",
+        len(labs) - failed,
+        failed,
+        time.monotonic() - start,
+    )
+    if args.TIMINGS:
+        save_timings(
+            args.TIMINGS,
+            {"total": round(time.monotonic() - start, 6), "labs": reports},
+        )
+    return 1 if failed else 0
 
-    with open(args.CONFIG, "r") as config_file:
-        source = config_file.read()
-        if HAS_JINJA:
-            source = Environment().from_string(source).render(ENV=os.environ)
-        data = yaml.load(source)
 
-    set_default_values(data, args)
+def check_config(args):
+    """Validate a lab configuration, generating the lab in memory.
 
-    base_dir = args.OUTPUT or data["lab_name"]
+    Returns the error message, if the configuration is not valid.
+    """
+    from ipalab_config.lab import generate
 
-    # generate configuration
-    compose_config = gen_compose_data(data)
-    inventory_config = gen_inventory_data(data)
+    if not (os.path.isfile(args.CONFIG) and os.access(args.CONFIG, os.R_OK)):
+        return f"Cannot read config file: {args.CONFIG}"
+    options = get_lab_options(args, args.OUTPUT)
+    try:
+        generate(**options._asdict())
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        error = traceback.format_exc() if args.debug else str(err)
+        return error or type(err).__name__
+    return None
+
+
+def check_configs(args):
+    """Validate multiple lab configurations, without writing any file."""
+    if not args.CONFIG:
+        raise RuntimeError("No configuration file found.")
+    failed = 0
+    start = time.monotonic()
+    for config in args.CONFIG:
+        lab_start = time.monotonic()
+        lab = argparse.Namespace(**{**vars(args), "CONFIG": config})
+        error = check_config(lab)
+        elapsed = time.monotonic() - lab_start
+        if error:
+            failed += 1
+            logger.error("%s: invalid (%.2fs): %s", config, elapsed, error)
+        else:
+            logger.info("%s: valid (%.2fs)", config, elapsed)
+    logger.info(
+        "%d labs valid, %d invalid (%.2fs)",
+        len(args.CONFIG) - failed,
+        failed,
+        time.monotonic() - start,
+    )
+    return 1 if failed else 0
 
-    # save configuration
-    os.makedirs(base_dir, exist_ok=True)
-
-    gen_external_node_configuration(data, base_dir, compose_config)
-
-    save_data(yaml, base_dir, "compose.yml", compose_config)
-    # create log directories
-    if data.get("mount_varlog"):
-        for node in compose_config["services"]:
-            os.makedirs(os.path.join(base_dir, "logs", node), exist_ok=True)
-
-    save_data(yaml, base_dir, "inventory.yml", inventory_config)
-
-    save_containers_data(data, base_dir, args)
-    save_ansible_data(data, base_dir, args)
-    gen_optional_files(data, base_dir, yaml)
-    copy_helper_files(base_dir, "scripts")
-
-    # process user extra_data
-    if "extra_data" in data:
-        cwd = os.path.dirname(args.CONFIG)
-        for helper in data["extra_data"]:
-            if os.path.isabs(helper):
-                source = os.path.dirname(helper)
-                helper = os.path.basename(helper)
-            else:
-                source = cwd
-            if os.path.isfile(os.path.join(source, helper)):
-                copy_extra_files(
-                    [helper],
-                    os.path.join(base_dir, os.path.dirname(helper)),
-                    source=source,
-                )
-            else:
-                copy_helper_files(base_dir, helper, source=cwd)
+
+def watch_config(args):
+    """Generate a lab, and generate it again when its inputs change."""
+    from ipalab_config.watch import watch_lab
+
+    if not (os.path.isfile(args.CONFIG) and os.access(args.CONFIG, os.R_OK)):
+        raise RuntimeError(f"Cannot read config file: {args.CONFIG}")
+    options = get_lab_options(args, args.OUTPUT)
+    return watch_lab(args, options)
 
 
 def main():
     """Trap execution exceptions."""
     debug = "--debug" in sys.argv
     try:
-        generate_ipalab_configuration()
+        args = parse_arguments()
+        if args.CHECK:
+            return check_configs(args)
+        if args.WATCH:
+            return watch_config(args)
+        if args.BATCH:
+            return generate_batch(args)
+        generate_instrumented(args)
     except (  # pragma: no cover
         ValueError,
         FileNotFoundError,
@@ -308,4 +490,4 @@ def main():
 
 
 if __name__ == "__main__":  # pragma: no cover
-    main()
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Collect generated lab artifacts in memory."""
+
+import io
+import copy
+import os
+import contextvars
+
+# The artifacts collected for the lab generated in the current context
+_ARTIFACTS = contextvars.ContextVar("artifacts", default=None)
+
+
+class LabArtifacts:
+    """The artifacts of a lab generated in memory.
+
+    All paths are relative to the lab output directory, and the
+    generated YAML documents are kept as data, so they are only
+    serialized if requested.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, base_dir, yaml=None):
+        self.base_dir = base_dir
+        self.yaml = yaml
+        self.lab_config = None
+        self.compose = None
+        self.inventory = None
+        self.documents = {}
+        self.files = {}
+        self.executables = set()
+        self.assets = {}
+        self.copy_functions = {}
+        self.mounted = set()
+        self.directories = []
+
+    def relpath(self, path):
+        """Return the path relative to the lab output directory."""
+        return os.path.relpath(path, self.base_dir)
+
+    def add_document(self, path, data):
+        """Add a YAML document to the artifacts."""
+        self.documents[self.relpath(path)] = data
+
+    def add_file(self, path, data, executable=False):
+        """Add a text file to the artifacts."""
+        path = self.relpath(path)
+        self.files[path] = data
+        if executable:
+            self.executables.add(path)
+
+    def add_asset(self, path, source, copy_function=None, mounted=False):
+        """Add a file that would be copied from 'source'."""
+        path = self.relpath(path)
+        self.assets[path] = source
+        if copy_function is not None:
+            self.copy_functions[path] = copy_function
+        if mounted:
+            self.mounted.add(path)
+
+    def add_directory(self, path):
+        """Add a directory that would be created."""
+        path = self.relpath(path)
+        if path not in self.directories:
+            self.directories.append(path)
+
+    @property
+    def hosts(self):
+        """The hosts file contents."""
+        return self.files.get("hosts")
+
+    def dump(self, filename):
+        """Return a YAML document serialized as text.
+
+        The round-trip dumper moves the comments of the data it
+        serializes, so a copy of the document is serialized.
+        """
+        out = io.StringIO()
+        self.yaml.dump(copy.deepcopy(self.documents[filename]), out)
+        return out.getvalue()
+
+
+def collect_artifacts(artifacts):
+    """Collect the artifacts generated in the current context."""
+    _ARTIFACTS.set(artifacts)
+
+
+def get_artifacts():
+    """Return the artifacts being collected, if generating in memory."""
+    return _ARTIFACTS.get()
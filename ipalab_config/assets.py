@@ -0,0 +1,224 @@
+"""Materialize asset files in the output directory."""
+
+import os
+import errno
+import shutil
+import functools
+import threading
+import contextvars
+
+from ipalab_config.logger import logger
+
+LINK_MODES = ("copy", "hardlink", "reflink", "symlink")
+
+# Linux ioctl to share the data blocks of a file (see ioctl_ficlone(2)).
+FICLONE = 0x40049409
+
+# The copy engine used by the lab generation in the current context
+_COPY_ENGINE = contextvars.ContextVar("copy_engine", default=None)
+
+
+def reflink_file(source, target):
+    """Create a copy-on-write clone of a file."""
+    try:
+        import fcntl  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "reflink not supported") from None
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.unlink(target)
+            raise
+    shutil.copymode(source, target)
+
+
+def link_file(source, target, link_mode, copy_function):
+    """Materialize a file with the link mode, falling back to a copy.
+
+    Links may not be possible, for example, across filesystems, or on
+    filesystems without copy-on-write support, and in these cases the
+    file is copied with 'copy_function'.
+
+    Returns the method effectively used.
+    """
+    # Never write through an existing link, or the source could change.
+    try:
+        os.unlink(target)
+    except FileNotFoundError:
+        pass
+    try:
+        if link_mode == "hardlink":
+            os.link(source, target)
+        elif link_mode == "symlink":
+            os.symlink(os.path.abspath(source), target)
+        elif link_mode == "reflink":
+            reflink_file(source, target)
+        else:
+            link_mode = "copy"
+            copy_function(source, target)
+    except OSError:
+        if link_mode == "copy" or not os.path.isfile(source):
+            raise
+        link_mode = "copy"
+        copy_function(source, target)
+    return link_mode
+
+
+class CopyEngine:
+    """Materialize files concurrently using a pool of threads.
+
+    Files scheduled for the same target are materialized in the order
+    they were scheduled, so the last one is kept.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, link_mode="copy", max_workers=None):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Invalid link mode: '{link_mode}'")
+        self.link_mode = link_mode
+        self.max_workers = max_workers
+        self.files = dict.fromkeys(LINK_MODES, 0)
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._futures = []
+        self._targets = {}
+
+    def _materialize(self, target, link, previous):
+        if previous is not None:
+            # Wait for the previous file with the same target.
+            previous.exception()
+        method = link()
+        try:
+            size = os.path.getsize(target) if method == "copy" else 0
+        except OSError:
+            size = 0
+        with self._lock:
+            self.files[method] += 1
+            self.bytes += size
+
+    def submit(self, source, target, copy_function, link_mode=None):
+        """Schedule a file to be materialized.
+
+        The engine link mode is used, unless 'link_mode' is given.
+        """
+        if self._executor is None:
+            # pylint: disable=import-outside-toplevel
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="ipalab-copy",
+            )
+        previous = None
+        if target in self._targets:
+            # A file not started yet is replaced by this one, which
+            # still waits for the file the replaced one waited for.
+            previous, earlier = self._targets[target]
+            if previous.cancel():
+                previous = earlier
+        link = functools.partial(
+            link_file,
+            source,
+            target,
+            link_mode or self.link_mode,
+            copy_function,
+        )
+        future = self._executor.submit(
+            self._materialize, target, link, previous
+        )
+        self._futures.append(future)
+        self._targets[target] = (future, previous)
+
+    def wait(self):
+        """Wait for all scheduled files, raising the first error found."""
+        futures, self._futures = self._futures, []
+        self._targets = {}
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for future in futures:
+            if not future.cancelled():
+                future.result()
+
+    def cancel(self):
+        """Discard the scheduled files, waiting for the ones in progress."""
+        futures, self._futures = self._futures, []
+        self._targets = {}
+        for future in futures:
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def log_summary(self):
+        """Display the amount of data materialized."""
+        total = sum(self.files.values())
+        if not total:
+            return
+        methods = ", ".join(
+            f"{count} {method}" for method, count in self.files.items() if count
+        )
+        logger.info(
+            "Materialized %d files (%d bytes copied): %s",
+            total,
+            self.bytes,
+            methods,
+        )
+        if self.link_mode != "copy" and self.files["copy"]:
+            logger.info(
+                "Could not %s %d files, which were copied instead",
+                self.link_mode,
+                self.files["copy"],
+            )
+
+
+def start_copy_engine(link_mode="copy", max_workers=None):
+    """Use a copy engine for all asset files materialization."""
+    engine = CopyEngine(link_mode, max_workers)
+    _COPY_ENGINE.set(engine)
+    return engine
+
+
+def finish_copy_engine():
+    """Wait for all files to be materialized and stop the copy engine."""
+    engine = _COPY_ENGINE.get()
+    _COPY_ENGINE.set(None)
+    if engine is not None:
+        engine.wait()
+        engine.log_summary()
+    return engine
+
+
+def abort_copy_engine():
+    """Stop the copy engine after an error, discarding pending files."""
+    engine = _COPY_ENGINE.get()
+    _COPY_ENGINE.set(None)
+    if engine is not None:
+        engine.cancel()
+    return engine
+
+
+def get_link_mode(mounted=False):
+    """Return the link mode used to materialize files.
+
+    Symbolic links point to host paths, that do not exist in the
+    containers, so files in directories mounted in the containers, or
+    used as image build contexts ('mounted'), are copied instead.
+    """
+    engine = _COPY_ENGINE.get()
+    if engine is None or (mounted and engine.link_mode == "symlink"):
+        return "copy"
+    return engine.link_mode
+
+
+def materialize_file(source, target, copy_function, link_mode=None):
+    """Materialize a file in the output directory."""
+    engine = _COPY_ENGINE.get()
+    if engine is None:
+        link_file(source, target, "copy", copy_function)
+    else:
+        engine.submit(source, target, copy_function, link_mode)
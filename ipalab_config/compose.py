@@ -7,13 +7,17 @@ from ruamel.yaml.comments import CommentedMap
 
 from ipalab_config import supported_distros
 from ipalab_config.logger import logger
+from ipalab_config.images import get_ipa_packages, use_ipa_image
+from ipalab_config.resources import allocate_resources, parse_memory
+from ipalab_config.storage import get_storage_config
 from ipalab_config.utils import (
-    die,
     get_hostname,
     is_ip_address,
     ensure_fqdn,
-    get_ip_address_generator,
-    clear_ip_generators,
+    expand_hosts,
+    get_ip_allocator,
+    clear_ip_allocators,
+    reserve_ip_addresses,
     import_external_role_module,
 )
 
@@ -28,10 +32,72 @@ def get_effective_nameserver(nameserver, domain):
     return nameserver
 
 
+def get_node_dns_key(hostname):
+    """Return the key of a node in the lab nodes IP address index."""
+    return hostname.replace(".", "_")
+
+
+# Services listed for each nameserver that is not a node of the lab.
+MAX_REPORTED_USERS = 5
+
+
+def get_users_summary(users):
+    """Return the first users of a nameserver, and how many others."""
+    summary = ", ".join(users[:MAX_REPORTED_USERS])
+    if len(users) > MAX_REPORTED_USERS:
+        summary += f" and {len(users) - MAX_REPORTED_USERS} more"
+    return summary
+
+
+def resolve_nameservers(services, nodes):
+    """Replace the nameserver names of the services by their IP addresses.
+
+    Args:
+        services: The compose services, updated in place.
+        nodes: The IP address of every node in the lab, by node DNS key.
+
+    Raises:
+        ValueError: If a nameserver is not a node of the lab.
+    """
+    unresolved = {}
+    for name, service in services.items():
+        nameserver = service.get("dns")
+        if nameserver is None:
+            service.pop("dns_search", None)
+            continue
+        if is_ip_address(nameserver):
+            continue
+        key = nameserver.removeprefix("{").removesuffix("}")
+        if key in nodes:
+            service["dns"] = nodes[key]
+        else:
+            unresolved.setdefault(key, []).append(name)
+    if unresolved:
+        raise ValueError(
+            "Nameserver is not a node of the lab: "
+            + "; ".join(
+                f"'{key.replace('_', '.')}' "
+                f"(used by: {get_users_summary(users)})"
+                for key, users in unresolved.items()
+            )
+        )
+
+
 def get_node_base_config(  # pylint: disable=R0913,R0917
-    name, hostname, networkname, ipaddr, distro=None, tag=None, image=None
+    name,
+    hostname,
+    networkname,
+    ipaddr,
+    distro=None,
+    tag=None,
+    image=None,
+    comments=True,
 ):
-    """Returns the basic node configuration."""
+    """Returns the basic node configuration.
+
+    Without 'comments', the configuration is a plain dict, that does not
+    require the round-trip YAML dumper.
+    """
     node_image = {}
     if distro is None and image is None:
         distro = "fedora"
@@ -47,7 +113,7 @@ def get_node_base_config(  # pylint: disable=R0913,R0917
         node_image = {"image": image}
 
     # fmt: off
-    result = CommentedMap({
+    result = (CommentedMap if comments else dict)({
         "container_name": name,
         # Use DoubleQuotedScalarString as 'no' without quotes may be
         # interpreted as boolean False by PyYAML loaders.
@@ -67,7 +133,7 @@ def get_node_base_config(  # pylint: disable=R0913,R0917
         else:
             # If no tag is given, and distro is one of the ipalab-config
             # provided ones, add a commented our "args" option to "build".
-            if distro in supported_distros:
+            if distro in supported_distros and comments:
                 result.yaml_set_comment_before_after_key(
                     "build",
                     after=(
@@ -90,12 +156,21 @@ def get_container_name(container, domain, container_fqdn):
     return name
 
 
-def get_compose_config(containers, subnet=None, **kwargs):
-    """Create config for all containers in the list."""
+def get_node_ip_address(container, name, ips):
+    """Return the configured IP address of a node, or allocate one."""
+    ipaddr = container.get("ip_address")
+    if not ipaddr:
+        return ips.allocate()
+    if str(ipaddr) not in ips:
+        raise ValueError(
+            f"IP address '{ipaddr}' of '{name}' is not in subnet "
+            f"'{ips.network}'"
+        )
+    return ipaddr
 
-    def node_dns_key(hostname):
-        return hostname.replace(".", "_")
 
+def get_compose_config(containers, subnet=None, **kwargs):
+    """Create config for all containers in the list."""
     if isinstance(containers, dict):
         containers = containers.get("hosts", [])
     if not containers:
@@ -109,18 +184,19 @@ def get_compose_config(containers, subnet=None, **kwargs):
     distro = kwargs.get("distro", "fedora")
     tag = kwargs.get("tag")
     mount_varlog = kwargs.get("mount_varlog", False)
-    # Get the IP generator for this subnet (cached by subnet string)
-    ips = get_ip_address_generator(subnet)
-    for container in containers:
+    comments = kwargs.get("comments", True)
+    storage = kwargs.get("storage")
+    named_volumes = kwargs.get("named_volumes", {})
+    # Get the IP allocator for this subnet (cached by subnet string)
+    ips = get_ip_allocator(subnet)
+    for container in expand_hosts(containers):
         name = get_container_name(container, network.domain, container_fqdn)
         node_distro = container.get("distro", distro)
         node_tag = container.get("tag", tag)
         node_image = container.get("image")
         hostname = get_hostname(container, name, network.domain)
-        ipaddr = container.get("ip_address")
-        if not ipaddr:
-            ipaddr = next(ips)
-        nodes[node_dns_key(hostname)] = str(ipaddr)
+        ipaddr = get_node_ip_address(container, name, ips)
+        nodes[get_node_dns_key(hostname)] = str(ipaddr)
         config = get_node_base_config(
             name,
             hostname,
@@ -129,6 +205,7 @@ def get_compose_config(containers, subnet=None, **kwargs):
             node_distro,
             node_tag,
             node_image,
+            comments,
         )
         if "memory" in container:
             config.update(
@@ -144,15 +221,25 @@ def get_compose_config(containers, subnet=None, **kwargs):
             config["dns"] = (
                 effective_dns
                 if is_ip_address(effective_dns)
-                else node_dns_key(effective_dns)
+                else get_node_dns_key(effective_dns)
             )
         config["dns_search"] = network.domain
 
         volumes = container.get("volumes", [])
-        if not isinstance(volumes, (list, tuple)):
-            volumes = [volumes]
+        # copy user volumes, as they may be shared by expanded hosts
+        volumes = (
+            list(volumes) if isinstance(volumes, (list, tuple)) else [volumes]
+        )
         if mount_varlog and not container.get("nolog", False):
             volumes.extend([f"${{PWD}}/logs/{name}:/var/log:rw"])
+        tmpfs, node_volumes = get_storage_config(
+            name, storage, container.get("storage")
+        )
+        if tmpfs:
+            config["tmpfs"] = tmpfs
+        for volume, path in node_volumes.items():
+            volumes.append(f"{volume}:{path}:rw")
+            named_volumes[volume] = {}
         if volumes:
             config.update({"volumes": volumes})
 
@@ -222,6 +309,18 @@ def get_network_config(  # pylint: disable=R0912
     return networkname, subnet, config
 
 
+def use_ipa_images(lab_config, services, hosts, node_type, domain):
+    """Make the IPA nodes use images with the IPA packages installed."""
+    containerfiles = lab_config.setdefault("ipa_containerfiles", {})
+    user_containerfiles = lab_config.get("user_containerfiles", {})
+    for host in expand_hosts(hosts):
+        name = get_container_name(host, domain, lab_config["container_fqdn"])
+        packages = get_ipa_packages(node_type, host.get("capabilities", []))
+        use_ipa_image(
+            services[name], packages, containerfiles, user_containerfiles
+        )
+
+
 def get_ipa_deployments_configuration(
     lab_config, global_networkname, global_subnet, networks_config
 ):
@@ -275,10 +374,16 @@ def get_ipa_deployments_configuration(
             "distro": deployment.get("distro", lab_config["distro"]),
             "tag": deployment.get("tag", lab_config.get("tag")),
             "mount_varlog": lab_config.get("mount_varlog", False),
+            "comments": not lab_config.get("fast_output", False),
+            "storage": deployment.get("storage"),
+            "named_volumes": lab_config.setdefault("named_volumes", {}),
         }
+        prebaked_images = deployment.get(
+            "prebaked_images", lab_config.get("prebaked_images", False)
+        )
         cluster_config = deployment.get("cluster")
         if not cluster_config:
-            die(f"Cluster not defined for domain '{domain}'")
+            raise ValueError(f"Cluster not defined for domain '{domain}'")
         nodes = {}
         # Get servers configurations
         servers = cluster_config.get("servers")
@@ -287,15 +392,15 @@ def get_ipa_deployments_configuration(
                 servers, current_subnet, **config
             )
             deployment_dns = [
-                "{{{0}}}".format(  # pylint: disable=consider-using-f-string
-                    ensure_fqdn(host["name"], domain)
-                )
-                .replace(".", "_")
-                .format(**ips)
-                for host in servers
+                ips[get_node_dns_key(ensure_fqdn(host["name"], domain))]
+                for host in expand_hosts(servers)
                 if "DNS" in host.get("capabilities", [])
             ]
             lab_config["deployment_nameservers"].append(deployment_dns)
+            if prebaked_images:
+                use_ipa_images(
+                    lab_config, servers_cfg, servers, "server", domain
+                )
             services.update(servers_cfg)
             nodes.update(ips)
         else:
@@ -304,20 +409,23 @@ def get_ipa_deployments_configuration(
         # Get clients configuration
         clients = cluster_config.get("clients")
         ips, clients_cfg = get_compose_config(clients, current_subnet, **config)
+        if prebaked_images and clients_cfg:
+            if isinstance(clients, dict):
+                clients = clients.get("hosts")
+            use_ipa_images(lab_config, clients_cfg, clients, "client", domain)
         services.update(clients_cfg)
         nodes.update(ips)
         # We must have at lest one node at the end.
         if not nodes:
-            die("At least one server or client must be defined for {domain}.")
+            raise ValueError(
+                f"At least one server or client must be defined for {domain}."
+            )
         # update nodes list
         lab_config.setdefault("nodes", {}).update(nodes)
-        # Update 'dns' on each service
-        for service in services.values():
-            if "dns" in service:
-                service["dns"] = service["dns"].format(**nodes)
-            else:
-                service.pop("dns_search", None)
 
+    # Nameservers may be nodes of any deployment, or external nodes, so
+    # they are resolved after all nodes have an IP address.
+    resolve_nameservers(services, lab_config.get("nodes", {}))
     return services
 
 
@@ -334,8 +442,10 @@ def get_external_hosts_configuration(lab_config, networkname, subnet):
         "container_fqdn": lab_config["container_fqdn"],
         "distro": "external-nodes",
         "mount_varlog": lab_config["mount_varlog"],
+        "comments": not lab_config.get("fast_output", False),
+        "named_volumes": lab_config.setdefault("named_volumes", {}),
     }
-    ext_nodes = external.get("hosts", [])
+    ext_nodes = list(expand_hosts(external.get("hosts", [])))
     nodes, services = get_compose_config(ext_nodes, subnet, **node_config)
     # update nodes list
     lab_config.setdefault("nodes", {}).update(nodes)
@@ -386,10 +496,135 @@ def get_external_hosts_configuration(lab_config, networkname, subnet):
     return services
 
 
+def get_lab_nodes(lab_config):
+    """Iterate over the configuration of all nodes in the lab."""
+    yield from expand_hosts((lab_config.get("external") or {}).get("hosts"))
+    for deployment in lab_config.get("ipa_deployments") or []:
+        cluster_config = deployment.get("cluster") or {}
+        yield from expand_hosts(cluster_config.get("servers"))
+        clients = cluster_config.get("clients")
+        if isinstance(clients, dict):
+            clients = clients.get("hosts")
+        yield from expand_hosts(clients)
+
+
+def get_lab_node_kinds(lab_config):
+    """Iterate over the service name and the kind of all lab nodes.
+
+    The kinds are the ones used to split the lab 'resources' budget.
+    """
+    container_fqdn = lab_config["container_fqdn"]
+    external = lab_config.get("external") or {}
+    domain = external.get("domain", lab_config.get("domain", "ipalab.local"))
+    for node in expand_hosts(external.get("hosts")):
+        yield get_container_name(node, domain, container_fqdn), "external", node
+    for deployment in lab_config.get("ipa_deployments") or []:
+        domain = deployment.get("domain", lab_config.get("domain"))
+        cluster_config = deployment.get("cluster") or {}
+        servers = expand_hosts(cluster_config.get("servers"))
+        for index, node in enumerate(servers):
+            if index == 0:
+                kind = "first_server"
+            elif {"CA", "KRA"}.intersection(node.get("capabilities", [])):
+                kind = "ca_replica"
+            else:
+                kind = "replica"
+            yield get_container_name(node, domain, container_fqdn), kind, node
+        clients = cluster_config.get("clients")
+        if isinstance(clients, dict):
+            clients = clients.get("hosts")
+        for node in expand_hosts(clients):
+            name = get_container_name(node, domain, container_fqdn)
+            yield name, "client", node
+
+
+def apply_lab_resources(lab_config, services):
+    """Split the lab 'resources' budget between the lab services."""
+    nodes = [
+        (
+            name,
+            kind,
+            parse_memory(node["memory"]) if "memory" in node else None,
+        )
+        for name, kind, node in get_lab_node_kinds(lab_config)
+    ]
+    for name, options in allocate_resources(
+        lab_config["resources"], nodes
+    ).items():
+        services[name].update(options)
+
+
+def check_lab_config(lab_config):
+    """Check the lab configuration, before any node is configured."""
+    deployments = lab_config.get("ipa_deployments") or []
+    if len(deployments) > 1 and not lab_config["container_fqdn"]:
+        raise ValueError(
+            "With multiple IPA deployments, "
+            "'container_fqdn' must be set to 'true'."
+        )
+    names = set()
+    for deployment in deployments:
+        name = deployment.get("name")
+        if not name:
+            raise ValueError("IPA deployments must have a 'name'.")
+        if name == lab_config["lab_name"] or name in names:
+            raise ValueError(f"Deployment name must be unique: {name}")
+        names.add(name)
+    nodes = set()
+    for name, _, _ in get_lab_node_kinds(lab_config):
+        if name in nodes:
+            raise ValueError(f"Node name must be unique: {name}")
+        nodes.add(name)
+
+
+def reserve_lab_ip_addresses(lab_config):
+    """Reserve explicitly configured IP addresses before any allocation."""
+    for addresses in lab_config.get("reserved_addresses", []):
+        reserve_ip_addresses(addresses)
+    assigned = {}
+    for node in get_lab_nodes(lab_config):
+        ipaddr = node.get("ip_address")
+        if not ipaddr:
+            continue
+        ipaddr = str(ipaddr)
+        if ipaddr in assigned:
+            raise ValueError(
+                f"IP address '{ipaddr}' is assigned to both "
+                f"'{assigned[ipaddr]}' and '{node['name']}'"
+            )
+        assigned[ipaddr] = node["name"]
+        reserve_ip_addresses(ipaddr)
+
+
+def add_package_cache_node(lab_config):
+    """Add the 'package_cache' node to the lab external hosts."""
+    cache = lab_config.get("package_cache")
+    if not cache:
+        return
+    options = dict(cache) if isinstance(cache, dict) else {}
+    node = {
+        "name": options.pop("name", "package-cache"),
+        "role": "package_cache",
+        "options": options,
+    }
+    if options.get("ip_address"):
+        node["ip_address"] = options.pop("ip_address")
+    external = lab_config.get("external") or {}
+    hosts = external.get("hosts") or []
+    if any(host.get("role") == "package_cache" for host in hosts):
+        return
+    lab_config["external"] = external
+    external["hosts"] = [*hosts, node]
+
+
 def gen_compose_data(lab_config):
     """Generate podamn compose file based on provided configuration."""
-    # Clear IP generator cache for fresh start
-    clear_ip_generators()
+    # Clear IP allocator cache for fresh start
+    clear_ip_allocators()
+    lab_config["named_volumes"] = {}
+    add_package_cache_node(lab_config)
+    check_lab_config(lab_config)
+    reserve_lab_ip_addresses(lab_config)
 
     config = {"name": lab_config["lab_name"]}
     config.setdefault("services", {})
@@ -423,5 +658,9 @@ def gen_compose_data(lab_config):
             lab_config, networkname, subnet, config["networks"]
         )
     )
+    if lab_config.get("resources"):
+        apply_lab_resources(lab_config, config["services"])
+    if lab_config["named_volumes"]:
+        config["volumes"] = lab_config["named_volumes"]
 
     return config
@@ -0,0 +1,232 @@
+"""Cache the lab configurations rendered from Jinja2 templates."""
+
+import os
+import stat
+import time
+import hashlib
+import tempfile
+from collections.abc import Mapping
+
+from ipalab_config.logger import logger
+
+# Variants of the same template, rendered with different values of the
+# environment variables, kept in each cache entry.
+MAX_VARIANTS = 8
+
+# Entries not used for this time, or beyond this number, are removed.
+MAX_AGE = 30 * 24 * 3600
+MAX_ENTRIES = 256
+
+
+class TrackedEnviron(Mapping):
+    """The environment variables, recording the variables read.
+
+    Variables read but not set are recorded with a None value. If the
+    whole environment is read, for example, by iterating over it, the
+    rendered template may depend on any variable, and 'read_all' is set.
+    """
+
+    def __init__(self, environ):
+        self.environ = environ
+        self.read = {}
+        self.read_all = False
+
+    def __getitem__(self, key):
+        self.read[key] = self.environ.get(key)
+        return self.environ[key]
+
+    def __iter__(self):
+        self.read_all = True
+        return iter(self.environ)
+
+    def __len__(self):
+        self.read_all = True
+        return len(self.environ)
+
+
+def is_private(status):
+    """Check if a file is owned by the current user, and only writable by it.
+
+    Cached data is unpickled, and compiled templates are executed, so
+    only files that no other user could have written are used.
+    """
+    return status.st_uid == os.getuid() and not status.st_mode & (
+        stat.S_IWGRP | stat.S_IWOTH
+    )
+
+
+def is_private_dir(path):
+    """Check if a directory exists, and is private to the current user."""
+    try:
+        return is_private(os.stat(path))
+    except OSError:
+        return False
+
+
+def get_cache_dir():
+    """Return the cache directory, or None if caching is disabled."""
+    cache_dir = os.environ.get("IPALAB_CACHE_DIR")
+    if cache_dir is None:
+        base_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        cache_dir = os.path.join(base_dir, "ipalab-config")
+    return cache_dir or None
+
+
+def get_template_key(source):
+    """Return the key of a template in the cache."""
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+class ConfigCache:
+    """Lab configurations parsed from templates, saved in a directory.
+
+    Each template has an entry, named by the hash of its source, with
+    the configurations parsed from it. A configuration is reused when
+    every environment variable read while rendering it has the same
+    value, so changing any other variable does not render it again.
+
+    Entries are only used if they, and the cache directory, are private
+    to the current user, and the entries not used recently are removed.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    @property
+    def bytecode_dir(self):
+        """The directory of the Jinja2 bytecode cache."""
+        return os.path.join(self.cache_dir, "jinja2")
+
+    def get_bytecode_dir(self):
+        """Return the bytecode cache directory, or None if not private."""
+        try:
+            os.makedirs(self.bytecode_dir, mode=0o700, exist_ok=True)
+        except OSError:
+            return None
+        if not is_private_dir(self.bytecode_dir):
+            logger.warning(
+                "Ignoring bytecode cache not private to the user: %s",
+                self.bytecode_dir,
+            )
+            return None
+        return self.bytecode_dir
+
+    def get_path(self, key):
+        """Return the path of a cache entry."""
+        return os.path.join(self.cache_dir, f"{key}.pickle")
+
+    def read_entry(self, key):
+        """Return the variants of a cache entry, if available."""
+        # pylint: disable=import-outside-toplevel
+        import pickle
+
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as entry:
+                if not is_private(os.fstat(entry.fileno())):
+                    logger.warning(
+                        "Ignoring cache entry not private to the user: %s",
+                        path,
+                    )
+                    return []
+                variants = pickle.load(entry)
+        except (
+            OSError,
+            EOFError,
+            ValueError,
+            TypeError,
+            AttributeError,
+            pickle.UnpicklingError,
+        ):
+            return []
+        return variants if isinstance(variants, list) else []
+
+    def load(self, key, environ):
+        """Return the configuration cached for the environment, or None."""
+        # pylint: disable=import-outside-toplevel
+        import pickle
+
+        for variables, data in self.read_entry(key):
+            if all(environ.get(k) == v for k, v in variables.items()):
+                # Entries used recently are not pruned.
+                try:
+                    os.utime(self.get_path(key))
+                except OSError:
+                    pass
+                return pickle.loads(data)
+        return None
+
+    def save(self, key, variables, config):
+        """Save a configuration, parsed with the given variables."""
+        # pylint: disable=import-outside-toplevel
+        import pickle
+
+        data = pickle.dumps(config, protocol=pickle.HIGHEST_PROTOCOL)
+        variants = [
+            variant
+            for variant in self.read_entry(key)
+            if variant[0] != variables
+        ]
+        variants.insert(0, (variables, data))
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            # Write atomically, as labs may be generated concurrently.
+            fd, path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as entry:
+                pickle.dump(variants[:MAX_VARIANTS], entry)
+            os.replace(path, self.get_path(key))
+        except OSError:
+            os.unlink(path)
+        self.prune()
+
+    def prune(self):
+        """Remove the entries, and compiled templates, not used recently.
+
+        Files not used for 'MAX_AGE' seconds are removed, and only the
+        'MAX_ENTRIES' most recently used files of each kind are kept.
+        """
+        expired = time.time() - MAX_AGE
+        for directory, suffixes in [
+            (self.cache_dir, (".pickle", ".tmp")),
+            (self.bytecode_dir, (".cache",)),
+        ]:
+            try:
+                entries = [
+                    (entry.stat().st_mtime, entry.path)
+                    for entry in os.scandir(directory)
+                    if entry.name.endswith(suffixes) and entry.is_file()
+                ]
+            except OSError:
+                continue
+            entries.sort(reverse=True)
+            for index, (mtime, path) in enumerate(entries):
+                if index >= MAX_ENTRIES or mtime < expired:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+
+def get_config_cache():
+    """Return the cache of parsed configurations, if enabled.
+
+    The cache is disabled if its directory is not private to the user.
+    """
+    cache_dir = get_cache_dir()
+    if not cache_dir:
+        return None
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    except OSError:
+        return None
+    if not is_private_dir(cache_dir):
+        logger.warning(
+            "Ignoring cache directory not private to the user: %s", cache_dir
+        )
+        return None
+    return ConfigCache(cache_dir)
@@ -0,0 +1,145 @@
+#!/bin/bash -eu
+
+# shellcheck disable=SC2312
+SCRIPTDIR="$(dirname "$(realpath "$0")")"
+TOPDIR="$(dirname "${SCRIPTDIR}")"
+
+die() {
+    >&2 echo -en "\033[31;1mFATAL: $*\033[0m\n"
+    exit 1
+}
+
+usage() {
+    cat <<EOF
+usage: $(basename "$0") [-o ARCHIVE] [-z zstd|xz] [-m MAX_SIZE] [-j] [-p JOBS] [-f COMPOSE_FILE]
+
+Archive the logs of all the lab nodes, mounted in 'logs/<node>', to a
+single compressed tarball. The logs of the nodes are collected at the same
+time, and the archive is compressed using all the host CPUs.
+
+The container engine is 'podman', unless CONTAINER_ENGINE is set.
+
+Options:
+
+    -o ARCHIVE       the archive file (default: lab-logs-<date>.tar.<ext>)
+    -z COMPRESSOR    'zstd' or 'xz' (default: zstd, if available)
+    -m MAX_SIZE      only keep the last MAX_SIZE bytes of larger files, with
+                     an optional unit, like '10M' (default: no limit)
+    -j               export the journal of the running nodes
+    -p JOBS          number of nodes collected at the same time
+                     (default: number of CPUs)
+    -f COMPOSE_FILE  the lab compose file (default: compose.yml)
+
+EOF
+}
+
+# Rootless podman maps the node users to the host user subordinate IDs,
+# and files owned by them are only readable in the podman user namespace.
+ENGINE="${CONTAINER_ENGINE:-podman}"
+if [ "${ENGINE##*/}" == "podman" ] && [ "$(id -u)" -ne 0 ] \
+    && [ -z "${IPALAB_UNSHARED:-}" ]
+then
+    exec "${ENGINE}" unshare env IPALAB_UNSHARED=1 "$0" "$@"
+fi
+
+stage_file() {
+    local source="$1"
+    local target="$2"
+    mkdir -p "$(dirname "${target}")"
+    if [ -n "${max_size}" ] && [ "$(stat -c %s "${source}")" -gt "${max_size}" ]
+    then
+        tail -c "${max_size}" "${source}" >"${target}"
+    else
+        # Hard links are instant, and do not use disk space.
+        ln "${source}" "${target}" 2>/dev/null \
+            || cp -p "${source}" "${target}"
+    fi
+}
+
+stage_node() {
+    local node="$1"
+    local source="${TOPDIR}/logs/${node}"
+    local target="${staging}/${node}"
+    local file
+    mkdir -p "${target}"
+    if [ -d "${source}" ]
+    then
+        while IFS= read -r -d '' file
+        do
+            stage_file "${source}/${file}" "${target}/${file}"
+        done < <(cd "${source}" && find . -type f -print0)
+    fi
+    if [ "${journal}" -eq 1 ]
+    then
+        "${ENGINE}" exec "${node}" \
+            journalctl --no-pager -o short-iso-precise \
+            >"${target}/journal.txt" 2>/dev/null \
+            || rm -f "${target}/journal.txt"
+    fi
+    echo "Collected ${node}"
+}
+
+compose_file="${TOPDIR}/compose.yml"
+compressor=""
+archive=""
+max_size=""
+journal=0
+parallel="$(nproc)"
+
+while getopts ":hjo:z:m:p:f:" option
+do
+    case "${option}" in
+        h) usage && exit 0 ;;
+        j) journal=1 ;;
+        o) archive="${OPTARG}" ;;
+        z) compressor="${OPTARG}" ;;
+        m) max_size="$(numfmt --from=iec "${OPTARG}")" \
+            || die "Invalid size: ${OPTARG}" ;;
+        p) parallel="${OPTARG}" ;;
+        f) compose_file="${OPTARG}" ;;
+        *) die "Invalid option: ${OPTARG}" ;;
+    esac
+done
+
+if [ -z "${compressor}" ]
+then
+    command -v zstd >/dev/null && compressor="zstd" || compressor="xz"
+fi
+case "${compressor}" in
+    zstd) compress=(zstd -T0 -q -c) && extension="zst" ;;
+    xz) compress=(xz -T0 -c) && extension="xz" ;;
+    *) die "Invalid compressor: ${compressor}" ;;
+esac
+command -v "${compressor}" >/dev/null || die "'${compressor}' not found."
+archive="${archive:-lab-logs-$(date +%Y%m%d-%H%M%S).tar.${extension}}"
+
+[ -f "${compose_file}" ] || die "Compose file not found: ${compose_file}"
+mapfile -t nodes < <(
+    sed -n 's/^ *container_name: *//p' "${compose_file}" | tr -d "\"'"
+)
+[ "${#nodes[@]}" -gt 0 ] || die "No containers in ${compose_file}"
+
+# Stage the files in the lab directory, so they can be hard linked.
+workdir="$(mktemp -d "${TOPDIR}/.collect-logs.XXXXXX")"
+trap 'rm -rf "${workdir}"' EXIT
+staging="${workdir}/logs"
+
+for node in "${nodes[@]}"
+do
+    while [ "$(jobs -rp | wc -l)" -ge "${parallel}" ]
+    do
+        wait -n || true
+    done
+    stage_node "${node}" &
+done
+wait
+
+set +e
+tar -C "${workdir}" --warning=no-file-changed -cf - logs \
+    | "${compress[@]}" >"${archive}"
+status=("${PIPESTATUS[@]}")
+set -e
+# tar exits with 1 when logs are written while they are archived.
+[ "${status[0]}" -le 1 ] && [ "${status[1]}" -eq 0 ] \
+    || die "Failed to create ${archive}"
+echo "Logs saved to ${archive} ($(du -h "${archive}" | cut -f1))."
@@ -0,0 +1,61 @@
+#!/bin/bash -eu
+
+# shellcheck disable=SC2312
+SCRIPTDIR="$(dirname "$(realpath "$0")")"
+TOPDIR="$(dirname "${SCRIPTDIR}")"
+
+die() {
+    >&2 echo -en "\033[31;1mFATAL: $*\033[0m\n"
+    exit 1
+}
+
+usage() {
+    cat <<EOF
+usage: $(basename "$0") [-w INTERVAL]
+
+Apply the size limits of 'logs/logrotate.conf' to the logs of the lab
+nodes, mounted in 'logs/<node>'. Log files larger than the limit are
+compressed, and only the configured number of old files are kept.
+
+Options:
+
+    -w INTERVAL      check the logs every INTERVAL seconds, until stopped
+
+EOF
+}
+
+# Rootless podman maps the node users to the host user subordinate IDs,
+# and files owned by them are only writable in the podman user namespace.
+ENGINE="${CONTAINER_ENGINE:-podman}"
+if [ "${ENGINE##*/}" == "podman" ] && [ "$(id -u)" -ne 0 ] \
+    && [ -z "${IPALAB_UNSHARED:-}" ]
+then
+    exec "${ENGINE}" unshare env IPALAB_UNSHARED=1 "$0" "$@"
+fi
+
+interval=""
+
+while getopts ":hw:" option
+do
+    case "${option}" in
+        h) usage && exit 0 ;;
+        w) interval="${OPTARG}" ;;
+        *) die "Invalid option: ${OPTARG}" ;;
+    esac
+done
+
+config_file="${TOPDIR}/logs/logrotate.conf"
+[ -f "${config_file}" ] || die "Log rotation not configured: ${config_file}"
+command -v logrotate >/dev/null || die "'logrotate' not found."
+
+# logrotate requires absolute paths.
+config="$(mktemp)"
+trap 'rm -f "${config}"' EXIT
+sed "s|^logs/|${TOPDIR}/logs/|" "${config_file}" >"${config}"
+
+while true
+do
+    logrotate -s "${TOPDIR}/logs/logrotate.status" "${config}"
+    [ -n "${interval}" ] || break
+    sleep "${interval}"
+done
@@ -0,0 +1,113 @@
+#!/bin/bash -eu
+
+# shellcheck disable=SC2312
+SCRIPTDIR="$(dirname "$(realpath "$0")")"
+TOPDIR="$(dirname "${SCRIPTDIR}")"
+
+die() {
+    >&2 echo -en "\033[31;1mFATAL: $*\033[0m\n"
+    exit 1
+}
+
+quiet() {
+    "$@" >/dev/null 2>&1
+}
+
+usage() {
+    cat <<EOF
+usage: $(basename "$0") [-t TIMEOUT] [-i INTERVAL] [-f COMPOSE_FILE]
+
+Wait until all the lab containers are ready. Containers with a healthcheck
+must be healthy, and the other containers must be running. All containers
+are checked at the same time, so the lab is ready as soon as the slowest
+container is ready.
+
+The container engine is 'podman', unless CONTAINER_ENGINE is set.
+
+Options:
+
+    -t TIMEOUT       maximum time to wait, in seconds (default: 300)
+    -i INTERVAL      time between checks, in seconds (default: 2)
+    -f COMPOSE_FILE  the lab compose file (default: compose.yml)
+
+EOF
+}
+
+now() {
+    date +%s
+}
+
+is_ready() {
+    local container="$1"
+    local state
+    state="$("${ENGINE}" inspect \
+        --format '{{.State.Status}}{{if .Config.Healthcheck}} healthcheck{{end}}' \
+        "${container}" 2>/dev/null)" || return 1
+    case "${state}" in
+        "running") return 0 ;;
+        "running healthcheck") ;;
+        *) return 1 ;;
+    esac
+    if [ "${ENGINE##*/}" == "podman" ]
+    then
+        # Run the check now, instead of waiting for the next scheduled one.
+        quiet timeout "$((deadline - $(now) + 1))" \
+            "${ENGINE}" healthcheck run "${container}"
+    else
+        [ "$("${ENGINE}" inspect --format '{{.State.Health.Status}}' \
+            "${container}")" == "healthy" ]
+    fi
+}
+
+wait_container() {
+    local container="$1"
+    until is_ready "${container}"
+    do
+        if [ "$(now)" -ge "${deadline}" ]
+        then
+            echo -e "\033[31;1m${container} is not ready\033[0m"
+            return 1
+        fi
+        sleep "${interval}"
+    done
+    echo "${container} is ready ($(( $(now) - start ))s)"
+}
+
+ENGINE="${CONTAINER_ENGINE:-podman}"
+timeout=300
+interval=2
+compose_file="${TOPDIR}/compose.yml"
+
+while getopts ":ht:i:f:" option
+do
+    case "${option}" in
+        h) usage && exit 0 ;;
+        t) timeout="${OPTARG}" ;;
+        i) interval="${OPTARG}" ;;
+        f) compose_file="${OPTARG}" ;;
+        *) die "Invalid option: ${OPTARG}" ;;
+    esac
+done
+
+[ -f "${compose_file}" ] || die "Compose file not found: ${compose_file}"
+mapfile -t containers < <(
+    sed -n 's/^ *container_name: *//p' "${compose_file}" | tr -d "\"'"
+)
+[ "${#containers[@]}" -gt 0 ] || die "No containers in ${compose_file}"
+
+start="$(now)"
+deadline="$((start + timeout))"
+pids=()
+for container in "${containers[@]}"
+do
+    wait_container "${container}" &
+    pids+=("$!")
+done
+
+failed=0
+for pid in "${pids[@]}"
+do
+    wait "${pid}" || failed=1
+done
+[ "${failed}" -eq 0 ] || die "Lab not ready after ${timeout}s."
+echo "Lab ready in $(( $(now) - start ))s."
@@ -1,6 +1,7 @@
 """Generate configuration for Samba AD DC."""
 
 import os
+from ipalab_config.health import SYSTEMD_HEALTHCHECK
 from ipalab_config.utils import copy_resource_files
 
 base_config = {
@@ -13,6 +14,8 @@ base_config = {
     "command": "/usr/sbin/init",
 }
 
+healthcheck = SYSTEMD_HEALTHCHECK
+
 
 def gen_config(_lab_config, base_dir, _node, _options):
     """Update node configuration."""
@@ -14,6 +14,14 @@ base_config = {
     ],
 }
 
+# The nameserver is ready when it answers queries.
+healthcheck = {
+    "test": ["CMD", "dig", "+time=2", "+tries=1", "@127.0.0.1", "localhost"],
+    "interval": "10s",
+    "timeout": "5s",
+    "retries": 3,
+}
+
 
 def gen_config(lab_config, base_dir, _node, options):
     """Generate configuration for external DNS container."""
@@ -30,7 +38,7 @@ def gen_config(lab_config, base_dir, _node, options):
         for-upstream: no
     """)
 
-    copy_helper_files(base_dir, "unbound")
+    copy_helper_files(base_dir, "unbound", mounted=True)
 
     zone_data = []
     for zone in options.get("zones", []):
@@ -63,4 +71,6 @@ def gen_config(lab_config, base_dir, _node, options):
         ),
     )
 
-    copy_extra_files(zone_files, os.path.join(base_dir, "unbound/zones"))
+    copy_extra_files(
+        zone_files, os.path.join(base_dir, "unbound/zones"), mounted=True
+    )
@@ -50,7 +50,7 @@ def gen_config(_lab_config, base_dir, node, options):
         node["build"]["args"], ["hostname"], defaults
     )
 
-    copy_helper_files(base_dir, "keycloak")
+    copy_helper_files(base_dir, "keycloak", mounted=True)
 
     keycloak_config = textwrap.dedent(f"""\
     ADMIN="{defaults['admin_username']}"
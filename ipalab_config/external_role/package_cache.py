@@ -0,0 +1,253 @@
+"""Generate configuration for a caching mirror of the distro packages."""
+
+import os
+import textwrap
+from urllib.parse import urlsplit
+
+from ipalab_config.logger import logger
+from ipalab_config.utils import copy_helper_files, make_directory, save_file
+
+base_config = {
+    "image": "localhost/package-cache",
+    "build": {"context": "package-cache", "dockerfile": "Containerfile"},
+}
+
+# The cache is ready when nginx answers requests.
+healthcheck = {
+    "test": ["CMD", "wget", "-q", "-O", "/dev/null", "http://127.0.0.1/health"],
+    "interval": "10s",
+    "timeout": "5s",
+    "retries": 3,
+}
+
+# The upstream mirror of each distro, and its repositories, as
+# (repository id, path relative to the mirror).
+REPOSITORIES = {
+    "fedora": (
+        "https://dl.fedoraproject.org/pub/fedora/linux",
+        [
+            ("fedora", "releases/$releasever/Everything/$basearch/os/"),
+            ("updates", "updates/$releasever/Everything/$basearch/"),
+        ],
+    ),
+    "centos": (
+        "https://mirror.stream.centos.org",
+        [
+            ("baseos", "$stream/BaseOS/$basearch/os/"),
+            ("appstream", "$stream/AppStream/$basearch/os/"),
+            ("crb", "$stream/CRB/$basearch/os/"),
+        ],
+    ),
+    "rocky": (
+        "https://dl.rockylinux.org/pub/rocky",
+        [
+            ("baseos", "$releasever/BaseOS/$basearch/os/"),
+            ("appstream", "$releasever/AppStream/$basearch/os/"),
+            ("crb", "$releasever/CRB/$basearch/os/"),
+        ],
+    ),
+    "alma": (
+        "https://repo.almalinux.org/almalinux",
+        [
+            ("baseos", "$releasever/BaseOS/$basearch/os/"),
+            ("appstream", "$releasever/AppStream/$basearch/os/"),
+            ("crb", "$releasever/CRB/$basearch/os/"),
+        ],
+    ),
+}
+
+# The GPG keys used to verify the packages of each distro.
+GPG_KEYS = {
+    "fedora": "RPM-GPG-KEY-fedora-$releasever-$basearch",
+    "centos": "RPM-GPG-KEY-centosofficial-SHA256",
+    "rocky": "RPM-GPG-KEY-Rocky-$releasever",
+    "alma": "RPM-GPG-KEY-AlmaLinux-$releasever",
+}
+
+# The distro repositories used by each ipalab-config containerfile.
+CONTAINERFILE_DISTROS = {
+    "fedora": "fedora",
+    "external-nodes": "fedora",
+    "centos": "centos",
+    "rocky": "rocky",
+    "alma": "alma",
+}
+
+NGINX_CONFIG = textwrap.dedent("""\
+    # Generated by ipalab-config.
+    user root;
+    worker_processes auto;
+    error_log /dev/stderr warn;
+
+    events {{
+        worker_connections 1024;
+    }}
+
+    http {{
+        access_log off;
+        proxy_cache_path /var/cache/nginx/packages levels=1:2
+                         keys_zone=packages:64m max_size={max_size}
+                         inactive=365d use_temp_path=off;
+    {upstreams}
+        server {{
+            listen 80;
+            proxy_cache packages;
+            # Concurrent requests for the same file are fetched once.
+            proxy_cache_lock on;
+            proxy_cache_lock_timeout 10m;
+            proxy_cache_use_stale error timeout updating;
+            proxy_http_version 1.1;
+            proxy_ssl_server_name on;
+            location = /health {{
+                return 200;
+            }}
+    {locations}
+        }}
+    }}
+    """)
+
+UPSTREAM = """\
+    upstream {name} {{
+        server {host};
+        keepalive 8;
+    }}
+"""
+
+# Repository metadata changes, but packages never do.
+LOCATION = """\
+        location ~ ^/{distro}/(.*/repodata/.*)$ {{
+            proxy_pass {scheme}://{name}{path}/$1;
+            proxy_set_header Host {hostname};
+            proxy_set_header Connection "";
+            proxy_ssl_name {hostname};
+            proxy_cache_valid 200 10m;
+        }}
+        location ~ ^/{distro}/(.*)$ {{
+            proxy_pass {scheme}://{name}{path}/$1;
+            proxy_set_header Host {hostname};
+            proxy_set_header Connection "";
+            proxy_ssl_name {hostname};
+            proxy_cache_valid 200 365d;
+        }}
+"""
+
+
+def get_mirrors(options):
+    """Return the upstream mirror of each distro."""
+    mirrors = {distro: url for distro, (url, _) in REPOSITORIES.items()}
+    for distro, url in (options.get("mirrors") or {}).items():
+        if distro not in REPOSITORIES:
+            raise ValueError(f"Package cache not supported for '{distro}'")
+        mirrors[distro] = str(url).rstrip("/")
+    return mirrors
+
+
+def gen_nginx_config(mirrors, max_size):
+    """Return the configuration of the caching mirror."""
+    upstreams = []
+    locations = []
+    for distro, url in mirrors.items():
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        values = {
+            "distro": distro,
+            "name": f"upstream_{distro}",
+            "scheme": parts.scheme,
+            "hostname": parts.hostname,
+            "host": f"{parts.hostname}:{port}",
+            "path": parts.path.rstrip("/"),
+        }
+        upstreams.append(UPSTREAM.format(**values))
+        locations.append(LOCATION.format(**values))
+    return NGINX_CONFIG.format(
+        max_size=max_size,
+        upstreams="".join(upstreams),
+        locations="".join(locations),
+    )
+
+
+def gen_repo_config(distro, cache_url):
+    """Return the repositories of a distro, using the caching mirror."""
+    _, repositories = REPOSITORIES[distro]
+    return "\n".join(textwrap.dedent(f"""\
+            [{repoid}]
+            name={repoid} $releasever - $basearch (ipalab package cache)
+            baseurl={cache_url}/{distro}/{path}
+            enabled=1
+            gpgcheck=1
+            gpgkey=file:///etc/pki/rpm-gpg/{GPG_KEYS[distro]}
+            """) for repoid, path in repositories)
+
+
+def get_node_address(node):
+    """Return the IP address and networks of a node."""
+    networks = node.get("networks") or {}
+    addresses = [net["ipv4_address"] for net in networks.values() if net]
+    return addresses[0], set(networks)
+
+
+def gen_config(_lab_config, base_dir, node, options):
+    """Generate configuration for the caching mirror container."""
+    options = options or {}
+    copy_helper_files(base_dir, "package-cache", mounted=True)
+    mirrors = get_mirrors(options)
+    save_file(
+        base_dir,
+        "package-cache/nginx.conf",
+        gen_nginx_config(mirrors, options.get("max_size", "20g")),
+    )
+    cache_url = f"http://{get_node_address(node)[0]}"
+    for distro in mirrors:
+        make_directory(os.path.join(base_dir, "package-cache/repos", distro))
+        save_file(
+            base_dir,
+            f"package-cache/repos/{distro}/ipalab-cache.repo",
+            gen_repo_config(distro, cache_url),
+        )
+    # A 'cache_dir' shared by many labs is only safe if a single lab runs
+    # at a time, as nginx instances cannot manage the same cache.
+    cache_dir = options.get("cache_dir")
+    if not cache_dir:
+        cache_dir = "${PWD}/package-cache/cache"
+        make_directory(os.path.join(base_dir, "package-cache/cache"))
+    node["volumes"] = [
+        *node.get("volumes", []),
+        "${PWD}/package-cache/nginx.conf:/etc/nginx/nginx.conf:ro",
+        f"{cache_dir}:/var/cache/nginx/packages:rw",
+    ]
+
+
+def get_node_distro(service):
+    """Return the distro repositories used by a node, if known."""
+    build = service.get("build") or {}
+    if build.get("context") != "containerfiles":
+        return None
+    # Images with the IPA packages use '<distro>-ipa-<hash>' files.
+    dockerfile = str(build.get("dockerfile")).partition("-ipa-")[0]
+    return CONTAINERFILE_DISTROS.get(dockerfile)
+
+
+def update_services(_lab_config, services, node, _options):
+    """Use the caching mirror for the packages of all the lab nodes."""
+    _, cache_networks = get_node_address(node)
+    cache = next(name for name, service in services.items() if service is node)
+    for name, service in services.items():
+        if name == cache:
+            continue
+        distro = get_node_distro(service)
+        if distro is None:
+            continue
+        if not cache_networks.intersection(service.get("networks") or {}):
+            logger.warning(
+                "Node '%s' is not in the package cache network.", name
+            )
+            continue
+        service["depends_on"] = {
+            **(service.get("depends_on") or {}),
+            cache: {"condition": "service_started"},
+        }
+        # Only the cached repositories are available to the node.
+        service["volumes"] = [
+            *service.get("volumes", []),
+            f"${{PWD}}/package-cache/repos/{distro}:/etc/yum.repos.d:ro",
+        ]
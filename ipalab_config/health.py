@@ -0,0 +1,102 @@
+"""Add readiness checks and start ordering to the lab compose services."""
+
+import copy
+
+from ipalab_config.utils import import_external_role_module
+
+# Nodes running systemd are ready when the system finished booting.
+# A 'degraded' system, with failed units, is still usable.
+SYSTEMD_HEALTHCHECK = {
+    "test": [
+        "CMD-SHELL",
+        "systemctl is-system-running --wait | grep -Eqx 'running|degraded'",
+    ],
+    "interval": "10s",
+    "timeout": "5m",
+    "retries": 3,
+}
+
+# The ipalab-config containerfiles of images running systemd.
+SYSTEMD_CONTAINERFILES = ("fedora", "centos", "rocky", "alma", "ubuntu")
+
+
+def is_systemd_node(service):
+    """Check if a compose service runs systemd."""
+    if service.get("command") in ("/usr/sbin/init", "/sbin/init"):
+        return True
+    build = service.get("build") or {}
+    if build.get("context") != "containerfiles":
+        return False
+    # Images with the IPA packages use '<distro>-ipa-<hash>' files.
+    distro = str(build.get("dockerfile")).partition("-ipa-")[0]
+    return distro in SYSTEMD_CONTAINERFILES
+
+
+def add_healthchecks(services, role_services):
+    """Add a healthcheck to the role containers and the systemd nodes.
+
+    Roles provide the healthcheck of their containers with a module
+    'healthcheck' attribute.
+
+    Args:
+        services: The compose services, updated in place.
+        role_services: The role of each role container, by service name.
+    """
+    for name, service in services.items():
+        if "healthcheck" in service:
+            continue
+        if name in role_services:
+            module = import_external_role_module(role_services[name])
+            healthcheck = getattr(module, "healthcheck", None)
+        elif is_systemd_node(service):
+            healthcheck = SYSTEMD_HEALTHCHECK
+        else:
+            healthcheck = None
+        if healthcheck:
+            service["healthcheck"] = copy.deepcopy(healthcheck)
+
+
+def get_addresses(service):
+    """Return the IP addresses of a compose service."""
+    return [
+        network["ipv4_address"]
+        for network in (service.get("networks") or {}).values()
+        if network and "ipv4_address" in network
+    ]
+
+
+def add_dependencies(services, providers):
+    """Make nodes start after the role containers they use are ready.
+
+    Nodes using a role container as nameserver depend on it, and the
+    dependencies on containers with a healthcheck wait for them to be
+    healthy, instead of only started.
+
+    Args:
+        services: The compose services, updated in place.
+        providers: The names of the services of role containers.
+    """
+    addresses = {
+        address: name
+        for name in providers
+        for address in get_addresses(services[name])
+    }
+    for name, service in services.items():
+        nameservers = service.get("dns") or []
+        if isinstance(nameservers, str):
+            nameservers = [nameservers]
+        depends_on = dict(service.get("depends_on") or {})
+        for address in nameservers:
+            provider = addresses.get(address)
+            if provider and provider != name:
+                depends_on.setdefault(
+                    provider, {"condition": "service_started"}
+                )
+        for provider, options in depends_on.items():
+            if "healthcheck" in services[provider]:
+                depends_on[provider] = {
+                    **options,
+                    "condition": "service_healthy",
+                }
+        if depends_on:
+            service["depends_on"] = depends_on
@@ -0,0 +1,222 @@
+"""Plan the build of the container images used by the lab nodes."""
+
+import shlex
+import hashlib
+import textwrap
+import functools
+from collections import namedtuple
+
+from ipalab_config.logger import logger
+
+# An image to be built, with the 'build' options of the compose services.
+ImageBuild = namedtuple(
+    "ImageBuild", ["image", "context", "dockerfile", "args", "services"]
+)
+
+
+def get_build_key(image, build):
+    """Return the values that identify an image build."""
+    return (
+        image,
+        build.get("context", "."),
+        build.get("dockerfile", "Containerfile"),
+        tuple((str(k), str(v)) for k, v in (build.get("args") or {}).items()),
+    )
+
+
+def plan_image_builds(services):
+    """Remove the 'build' of the services, returning the images to build.
+
+    Services with the same image, built with the same context, file and
+    arguments, share a single build. If the same image would be built in
+    different ways, the services keep their 'build' option, so compose
+    builds them as before.
+
+    Args:
+        services: The compose services, updated in place.
+
+    Returns:
+        list: The 'ImageBuild' of each image, in the order they are used.
+    """
+    builds = {}
+    for name, service in services.items():
+        if "build" in service and "image" in service:
+            key = get_build_key(service["image"], service["build"])
+            builds.setdefault(service["image"], {}).setdefault(key, [])
+            builds[service["image"]][key].append(name)
+    plan = []
+    for image, variants in builds.items():
+        if len(variants) > 1:
+            logger.warning(
+                "Image '%s' is built in different ways, "
+                "it will be built by compose.",
+                image,
+            )
+            continue
+        (key, users), *_ = variants.items()
+        _, context, dockerfile, args = key
+        plan.append(ImageBuild(image, context, dockerfile, dict(args), users))
+        for name in users:
+            services[name].pop("build")
+    return plan
+
+
+def get_build_command(build):
+    """Return the arguments of the command that builds an image."""
+    command = ["-t", build.image]
+    for arg, value in build.args.items():
+        command.extend(["--build-arg", f"{arg}={value}"])
+    command.extend(["-f", f"{build.context}/{build.dockerfile}", build.context])
+    return " ".join(shlex.quote(arg) for arg in command)
+
+
+def get_build_users(build, limit=5):
+    """Return a description of the services using an image."""
+    users = ", ".join(build.services[:limit])
+    if len(build.services) > limit:
+        users += f", ... ({len(build.services)} services)"
+    return users
+
+
+def gen_build_script(lab_name, plan):
+    """Return a shell script that builds all the images in parallel."""
+    builds = "\n".join(
+        f"build {get_build_command(build)}  # {get_build_users(build)}"
+        for build in plan
+    )
+    return textwrap.dedent("""\
+        #!/bin/bash
+        # Build the container images used by the lab '{lab_name}'.
+        # Images are built in parallel, and the build output is saved to
+        # 'build-logs/<image>.log'. Set CONTAINER_ENGINE to use another
+        # engine than podman.
+
+        cd "$(dirname "$0")" || exit 1
+        ENGINE="${{CONTAINER_ENGINE:-podman}}"
+        mkdir -p build-logs
+        pids=()
+        images=()
+
+        build() {{
+            local image="$2"
+            local log="build-logs/${{image//[\\/:]/_}}.log"
+            echo "Building ${{image}}"
+            "${{ENGINE}}" build "$@" >"${{log}}" 2>&1 &
+            pids+=("$!")
+            images+=("${{image}}")
+        }}
+
+        {builds}
+
+        failed=0
+        for index in "${{!pids[@]}}"; do
+            if ! wait "${{pids[${{index}}]}}"; then
+                echo "Failed to build ${{images[${{index}}]}}, see build-logs"
+                failed=1
+            fi
+        done
+        exit "${{failed}}"
+        """).format(lab_name=lab_name, builds=builds)
+
+
+# Packages installed by ansible-freeipa on each kind of IPA node, and
+# the additional packages required by the server capabilities.
+IPA_PACKAGES = {
+    "server": ("ipa-server",),
+    "client": ("ipa-client",),
+}
+CAPABILITY_PACKAGES = {
+    "DNS": ("ipa-server-dns",),
+    "AD": ("ipa-server-trust-ad",),
+    "KRA": ("pki-kra",),
+}
+
+# The ipalab-config containerfiles where IPA packages can be installed.
+IPA_IMAGE_DISTROS = ("fedora", "centos", "rocky", "alma")
+
+
+def get_ipa_packages(node_type, capabilities=()):
+    """Return the sorted packages required by an IPA node."""
+    packages = set(IPA_PACKAGES[node_type])
+    if node_type == "server":
+        for capability in capabilities:
+            packages.update(CAPABILITY_PACKAGES.get(capability, ()))
+    return tuple(sorted(packages))
+
+
+@functools.cache
+def get_packaged_containerfile(distro):
+    """Return the contents of an ipalab-config containerfile."""
+    # pylint: disable=import-outside-toplevel
+    from importlib import resources
+
+    path = resources.files("ipalab_config") / "data/containerfiles" / distro
+    return path.read_text(encoding="utf-8")
+
+
+def get_base_containerfile(distro, user_containerfiles=None):
+    """Return the contents of the containerfile used for 'distro'.
+
+    A user containerfile with the same name overrides the ipalab-config
+    containerfile. User files are read every time, as they may change
+    while a lab is watched.
+    """
+    path = (user_containerfiles or {}).get(distro)
+    if path is None:
+        return get_packaged_containerfile(distro)
+    with open(path, "r", encoding="utf-8") as containerfile:
+        return containerfile.read()
+
+
+def gen_ipa_containerfile(distro, packages, user_containerfiles=None):
+    """Return a containerfile for 'distro' with the IPA packages."""
+    install = "".join(f"    {package} \\\n" for package in packages)
+    return (
+        get_base_containerfile(distro, user_containerfiles)
+        + "\n# IPA packages, installed at build time by ipalab-config.\n"
+        + "RUN \\\ndnf -y install \\\n"
+        + install
+        + "    ; \\\ndnf clean all ; \\\nrm -rf /var/cache/dnf/;\n"
+    )
+
+
+def get_content_hash(*values):
+    """Return a short hash of the given values."""
+    digest = hashlib.sha256()
+    for value in values:
+        digest.update(repr(value).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:12]
+
+
+def use_ipa_image(service, packages, containerfiles, user_containerfiles=None):
+    """Make a service use an image with the IPA packages installed.
+
+    The image is tagged with a hash of its containerfile, build arguments
+    and packages, so it is built once, and reused by every lab, until
+    any of them changes. The user containerfiles that override the
+    ipalab-config ones are used as the base of the image. Services not
+    built from a containerfile of a supported distro are not changed.
+
+    Args:
+        service: The compose service of the IPA node, updated in place.
+        packages: The packages to install in the image.
+        containerfiles: A dict, updated with the containerfile used to
+            build the image, by file name.
+        user_containerfiles: The paths of the user containerfiles, that
+            override the ipalab-config ones, by file name.
+    """
+    build = service.get("build") or {}
+    distro = build.get("dockerfile")
+    if build.get("context") != "containerfiles":
+        return
+    if distro not in IPA_IMAGE_DISTROS:
+        return
+    containerfile = gen_ipa_containerfile(distro, packages, user_containerfiles)
+    args = sorted((build.get("args") or {}).items())
+    content_hash = get_content_hash(containerfile, args)
+    filename = f"{distro}-ipa-{content_hash}"
+    containerfiles[filename] = containerfile
+    build["dockerfile"] = filename
+    image, _, tag = service["image"].rpartition(":")
+    service["image"] = f"{image}-ipa:{tag}-{content_hash}"
@@ -1,6 +1,11 @@
 """Helper functions to generate an Ansible YAML inventory file."""
 
-from ipalab_config.utils import die, get_hostname, ensure_fqdn
+import itertools
+from collections import Counter
+
+from ipalab_config.utils import get_hostname, ensure_fqdn, expand_hosts
+
+_MISSING = object()
 
 
 def get_node_name(name, deployment):
@@ -108,7 +113,7 @@ def get_clients_inventory(config, default_config, deployment):
         client_list = config
     if not client_list:
         return {}
-    for client in client_list or []:
+    for client in expand_hosts(client_list):
         name = get_node_name(client["name"], deployment)
         hostname = get_hostname(client, name, deployment["domain"])
         clients[name] = {"ipaclient_hostname": hostname, **common}
@@ -129,7 +134,7 @@ def gen_inventory_external_nodes(lab_config, lab):
     )
     if "vars" in external:
         external_inv["vars"] = external["vars"]
-    for node in external["hosts"]:
+    for node in expand_hosts(external["hosts"]):
         group = lab.setdefault("children", {}).setdefault(
             f"role_{node.get("role", "none")}", {"hosts": {}}
         )
@@ -161,11 +166,6 @@ def gen_inventory_ipa_deployments(lab_config, lab):
 
     ipa_deployments = lab_config.setdefault("ipa_deployments", [])
     deployment_dns = lab_config["deployment_nameservers"]
-    if len(ipa_deployments) > 1 and not lab_config["container_fqdn"]:
-        raise ValueError(
-            "With multiple IPA deployments, "
-            "'container_fqdn' must be set to 'true'."
-        )
     for deployment, nameservers in zip(ipa_deployments, deployment_dns):
         name = deployment["name"]
         # process deployment
@@ -185,12 +185,13 @@ def gen_inventory_ipa_deployments(lab_config, lab):
             default_config["ipaserver_domain"] = domain
         cluster_config = deployment.get("cluster")
         if not cluster_config:  # pragma: no cover
-            die(f"Cluster not defined for domain '{domain}'")
+            raise ValueError(f"Cluster not defined for domain '{domain}'")
         # parse first server
-        servers = cluster_config.get("servers")
-        if servers:
+        servers = expand_hosts(cluster_config.get("servers"))
+        first_server = next(servers, None)
+        if first_server:
             server = get_server_inventory(
-                servers[0], default_config, deployment
+                first_server, default_config, deployment
             )
             add_hosts_to_inventory(name, lab, "ipaserver", server)
             # set deployment first server
@@ -205,7 +206,7 @@ def gen_inventory_ipa_deployments(lab_config, lab):
                 )
             # parse replicas
             replicas = get_replicas_inventory(
-                servers[1:],
+                servers,
                 default_config,
                 deployment,
             )
@@ -236,12 +237,128 @@ def gen_inventory_data(lab_config):
     lab = {"vars": {"ansible_connection": "podman"}}
     gen_inventory_external_nodes(lab_config, lab)
     gen_inventory_ipa_deployments(lab_config, lab)
-    node_names = list(lab_config["ipa_deployments"])
-    node_names.extend(list(lab.get("external", {}).keys()))
-    if any(
-        labname == deployment["name"]
-        for deployment in lab_config["ipa_deployments"]
-    ):
-        raise ValueError(f"Deployment name must be unique: {labname}")
 
     return {labname.replace("-", "_"): lab}
+
+
+def freeze_value(value):
+    """Return a hashable representation of a variable value."""
+    if isinstance(value, dict):
+        return tuple((key, freeze_value(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return ("list", tuple(freeze_value(item) for item in value))
+    if isinstance(value, bool):
+        # Avoid 'True' being equal to '1'.
+        return ("bool", value)
+    return value
+
+
+def get_group_hosts(lab_name, lab):
+    """Return the hosts of each group with hosts in the inventory.
+
+    Groups are sorted by the number of hosts, so variables shared by
+    more hosts are found first, and groups with the same hosts as a
+    previous group are ignored. As the lab group is the last one, it is
+    ignored if it has the same hosts as a deployment.
+    """
+    hosts = lab.get("hosts", {})
+    candidates = [
+        (group, list((data or {}).get("hosts") or {}))
+        for group, data in lab.get("children", {}).items()
+    ]
+    candidates.append((lab_name, list(hosts)))
+    groups = {}
+    for group, members in sorted(candidates, key=lambda item: -len(item[1])):
+        if not members or not all(name in hosts for name in members):
+            continue
+        if set(members) not in [set(other) for other in groups.values()]:
+            groups[group] = members
+    return groups
+
+
+def get_shared_vars(host_vars, unanimous):
+    """Return the variables defined by all hosts, with their common value.
+
+    Unless 'unanimous' is set, the most common value is used, if it is
+    shared by more than one host.
+    """
+    shared = {}
+    if len(host_vars) < 2:
+        return shared
+    for key in host_vars[0]:
+        if not all(key in variables for variables in host_vars):
+            continue
+        counts = Counter(
+            freeze_value(variables[key]) for variables in host_vars
+        )
+        frozen, count = counts.most_common(1)[0]
+        if count == len(host_vars) or (count > 1 and not unanimous):
+            shared[key] = next(
+                variables[key]
+                for variables in host_vars
+                if freeze_value(variables[key]) == frozen
+            )
+    return shared
+
+
+def factor_group_vars(inventory):
+    """Move the variables shared by the hosts of a group to the group.
+
+    A variable is set for a group only if all of the group hosts define
+    it, and it is removed from a host only if every group setting it
+    uses the host value. As inventory host variables have precedence
+    over group variables, the effective variables of every host are the
+    same as with all variables in the host entries.
+
+    Args:
+        inventory: The inventory data, modified in place.
+
+    Returns:
+        dict: The variables of each group, by group name.
+    """
+    group_vars = {}
+    for lab_name, lab in inventory.items():
+        hosts = lab.get("hosts", {})
+        groups = get_group_hosts(lab_name, lab)
+        # The variables already set for each host by a previous group.
+        provided = {name: {} for name in hosts}
+        # Values shared by all the hosts of a group are set first, so
+        # values of the most common deployment are not set for groups
+        # with hosts of multiple deployments.
+        for unanimous, (group, members) in itertools.product(
+            [True, False], groups.items()
+        ):
+            residual = [
+                {
+                    key: value
+                    for key, value in (hosts[name] or {}).items()
+                    if provided[name].get(key, _MISSING) != freeze_value(value)
+                }
+                for name in members
+            ]
+            shared = get_shared_vars(residual, unanimous)
+            if shared:
+                group_vars.setdefault(group, {}).update(shared)
+                for name in members:
+                    for key, value in shared.items():
+                        provided[name].setdefault(key, freeze_value(value))
+        for name, variables in hosts.items():
+            if not variables:
+                continue
+            providers = [
+                group_vars[group]
+                for group, members in groups.items()
+                if group in group_vars and name in members
+            ]
+            remaining = {
+                key: value
+                for key, value in variables.items()
+                if not any(key in provider for provider in providers)
+                or any(
+                    freeze_value(provider.get(key, value))
+                    != freeze_value(value)
+                    for provider in providers
+                )
+            }
+            hosts[name] = remaining or None
+    return group_vars
@@ -0,0 +1,625 @@
+"""Generate the configuration of a FreeIPA lab."""
+
+import io
+import os
+import copy
+import contextlib
+import contextvars
+from collections import namedtuple
+
+from ipalab_config.artifacts import (
+    LabArtifacts,
+    collect_artifacts,
+    get_artifacts,
+)
+from ipalab_config.assets import (
+    start_copy_engine,
+    finish_copy_engine,
+    abort_copy_engine,
+)
+from ipalab_config.manifest import open_manifest, close_manifest
+from ipalab_config.utils import (
+    copy_extra_files,
+    copy_helper_files,
+    copy_if_changed,
+    make_directory,
+    missing_source,
+    save_file,
+    save_stream,
+    get_service_ip_address,
+    import_external_role_module,
+)
+from ipalab_config import inventory_layouts, image_build_modes
+from ipalab_config.inventory import gen_inventory_data, factor_group_vars
+from ipalab_config.health import add_healthchecks, add_dependencies
+from ipalab_config.logs import get_log_rotation, gen_logrotate_config
+from ipalab_config.playbook import gen_deploy_playbook, gen_ansible_config
+from ipalab_config.timings import timed
+
+# Jinja2 and ruamel.yaml, and the modules depending on them, are only
+# imported when needed, to keep the command line startup fast.
+# pylint: disable=import-outside-toplevel
+
+# Labs with at least this number of nodes have their compose and
+# inventory files written with the streaming YAML dumper.
+STREAMING_THRESHOLD = 500
+
+# Options used to generate a lab, besides the lab configuration.
+#   config_file: The lab configuration file, used to find files with
+#                relative paths (default: current directory)
+#   output: The output directory (default: the lab name)
+#   containerfiles: Additional containerfiles
+#   playbooks: Additional playbooks, or directories with playbooks
+#   distro: Override the default '<distro>:<tag>'
+#   mount_varlog: Default for mounting the nodes '/var/log'
+#   fast_output: Default for saving the files without comments
+#   link_mode: How helper and extra files are materialized
+#   inventory_layout: Default for how inventory host variables are saved
+#   image_builds: Default for how the node images are built
+LabOptions = namedtuple(
+    "LabOptions",
+    [
+        "config_file",
+        "output",
+        "containerfiles",
+        "playbooks",
+        "distro",
+        "mount_varlog",
+        "fast_output",
+        "link_mode",
+        "inventory_layout",
+        "image_builds",
+    ],
+    defaults=[
+        None,
+        None,
+        (),
+        (),
+        None,
+        False,
+        False,
+        "copy",
+        "inline",
+        "compose",
+    ],
+)
+
+
+def get_yaml():
+    """Return the YAML processor used to load and save lab files."""
+    from ruamel.yaml import YAML
+
+    yaml = YAML()
+    yaml.explicit_start = True
+    yaml.indent(mapping=2, sequence=4, offset=2)
+    return yaml
+
+
+def get_output_yaml(lab_config, yaml):
+    """Return the YAML processor used to save the lab files.
+
+    With 'fast_output', files are saved without comments, using the
+    C-accelerated safe dumper.
+    """
+    if lab_config.get("fast_output"):
+        from ipalab_config.yamlfast import get_fast_yaml
+
+        return get_fast_yaml()
+    return yaml
+
+
+def is_template(source):
+    """Check if the configuration uses Jinja2 template syntax."""
+    return any(mark in source for mark in ("{{", "{%", "{#"))
+
+
+def render_template(source, environ=None, cache=None, name=None):
+    """Render the configuration as a Jinja2 template, if Jinja2 is available.
+
+    Jinja2 is only loaded if the configuration uses template syntax.
+
+    Args:
+        source: The configuration source.
+        environ: The mapping available to the template as 'ENV'.
+        cache: A 'ConfigCache', whose directory keeps the compiled
+            template bytecode.
+        name: The name of the template in the bytecode cache.
+    """
+    if not is_template(source):
+        return source
+    try:
+        from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+    except ImportError:
+        return source
+    with timed("render_template"):
+        bytecode_dir = cache.get_bytecode_dir() if cache else None
+        if bytecode_dir is None:
+            template = Environment().from_string(source)
+        else:
+            template = Environment(
+                loader=DictLoader({name: source}),
+                bytecode_cache=FileSystemBytecodeCache(bytecode_dir),
+            ).get_template(name)
+        return template.render(ENV=os.environ if environ is None else environ)
+
+
+def load_config(source, yaml=None, cache=None):
+    """Load the lab configuration from its YAML, or Jinja2, source.
+
+    Args:
+        source: The configuration source.
+        yaml: The YAML object used to parse the configuration.
+        cache: A 'ConfigCache' for the configurations rendered from
+            templates, so they are only rendered and parsed again if the
+            template, or the value of any environment variable it reads,
+            changes.
+    """
+    if cache is None or not is_template(source):
+        source = render_template(source)
+        with timed("yaml_load"):
+            return (yaml or get_yaml()).load(source)
+
+    from ipalab_config.config_cache import TrackedEnviron, get_template_key
+
+    key = get_template_key(source)
+    with timed("config_cache_load"):
+        config = cache.load(key, os.environ)
+    if config is not None:
+        return config
+    environ = TrackedEnviron(os.environ)
+    rendered = render_template(source, environ, cache, key)
+    with timed("yaml_load"):
+        config = (yaml or get_yaml()).load(rendered)
+    if rendered is not source and not environ.read_all:
+        with timed("config_cache_save"):
+            cache.save(key, environ.read, config)
+    return config
+
+
+def set_default_values(data, options):
+    """Ensure sane configuration default values."""
+    data.setdefault("lab_name", "ipa-lab")
+    data.setdefault("distro", "fedora")
+    if options.distro:
+        distro, *tag = options.distro.split(":", 1)
+        data["distro"] = distro
+        data["tag"] = "".join(tag) if tag else None
+    data.setdefault("container_fqdn", False)
+    data.setdefault("mount_varlog", options.mount_varlog)
+    data.setdefault("fast_output", options.fast_output)
+    data.setdefault("inventory_layout", options.inventory_layout)
+    if data["inventory_layout"] not in inventory_layouts:
+        raise ValueError(
+            f"Invalid 'inventory_layout': '{data['inventory_layout']}'. "
+            f"Valid values: {', '.join(inventory_layouts)}"
+        )
+    data.setdefault("image_builds", options.image_builds)
+    if data["image_builds"] not in image_build_modes:
+        raise ValueError(
+            f"Invalid 'image_builds': '{data['image_builds']}'. "
+            f"Valid values: {', '.join(image_build_modes)}"
+        )
+    data.setdefault("healthchecks", True)
+    data.setdefault("domain", "ipalab.local")
+    data["user_containerfiles"] = get_user_containerfiles(data, options)
+
+
+def save_data(yaml, base_dir, filename, yamldata, streaming=False):
+    """Save YAML data as a YAML file.
+
+    With 'streaming', the document is written while it is serialized,
+    without keeping its whole representation in memory.
+    """
+    with timed(f"save_data:{filename}"):
+        _save_data(yaml, base_dir, filename, yamldata, streaming)
+
+
+def _save_data(yaml, base_dir, filename, yamldata, streaming):
+    artifacts = get_artifacts()
+    if artifacts is not None:
+        artifacts.add_document(os.path.join(base_dir, filename), yamldata)
+        return
+    if streaming:
+        from ipalab_config.yamlstream import get_streaming_yaml
+
+        streaming_yaml = get_streaming_yaml(yaml)
+        save_stream(
+            base_dir,
+            filename,
+            lambda stream: streaming_yaml.dump(yamldata, stream),
+        )
+        return
+    out = io.StringIO()
+    yaml.dump(yamldata, out)
+    save_file(base_dir, filename, out.getvalue())
+
+
+def gen_role_configuration(lab_config, base_dir, node_data, external_data):
+    """Generate the role configuration of an external node.
+
+    Returns the role 'update_services' function, if it provides one.
+    """
+    role = external_data["role"]
+    options = external_data.get("options", {})
+    try:
+        with timed(f"import_external_role_module:{role}"):
+            module = import_external_role_module(role)
+        config_fn = getattr(module, "gen_config", None)
+    except ImportError:
+        config_fn = None
+    if not config_fn:
+        raise ValueError(f"Role does not provide 'gen_config': '{role}'")
+    with timed(f"gen_config:{role}"):
+        config_fn(lab_config, base_dir, node_data, options)
+    return getattr(module, "update_services", None)
+
+
+def gen_external_node_configuration(lab_config, base_dir, compose_config):
+    """Generate configuration for external nodes.
+
+    Returns the role of each role container, by service name.
+    """
+    # Roles may update other services, after all nodes are configured.
+    updates = []
+    role_services = {}
+    for name, node_data in compose_config["services"].items():
+        external_data = node_data.pop("external_node", None)
+        if external_data:
+            # update dns on nodes
+            if "dns" in node_data:
+                dns = node_data["dns"]
+                if dns in lab_config["nodes"]:
+                    dns = lab_config["nodes"][dns]
+                elif dns in compose_config["services"]:
+                    dns = get_service_ip_address(
+                        compose_config["services"][dns]
+                    )
+                node_data["dns"] = dns
+                if not node_data.get("dns_search"):
+                    node_data.pop("dns_search", None)
+            else:
+                node_data.pop("dns_search", None)
+            # update roles
+            if external_data.get("role"):
+                role_services[name] = external_data["role"]
+                update_fn = gen_role_configuration(
+                    lab_config, base_dir, node_data, external_data
+                )
+                if update_fn:
+                    updates.append((update_fn, node_data, external_data))
+    for update_fn, node_data, external_data in updates:
+        update_fn(
+            lab_config,
+            compose_config["services"],
+            node_data,
+            external_data.get("options", {}),
+        )
+    return role_services
+
+
+def gen_optional_files(lab_config, base_dir, yaml):
+    """Save optional 'misc' files."""
+    # save /etc/hosts file patch
+    save_file(
+        base_dir,
+        "hosts",
+        f"\n# ipalab-config hosts for '{lab_config['lab_name']}'\n"
+        + "\n".join(
+            [
+                f"{v:18s}{k.replace('_', '.')}"
+                for k, v in lab_config.get("nodes", {}).items()
+            ]
+        ),
+    )
+
+    # add Ansible configuration
+    save_file(
+        base_dir,
+        "ansible.cfg",
+        gen_ansible_config(
+            lab_config["lab_name"], len(lab_config.get("nodes", {}))
+        ),
+    )
+    # add Ansible Galaxy requirements.yml
+    save_data(
+        yaml,
+        base_dir,
+        "requirements.yml",
+        {
+            "collections": [
+                {"name": "containers.podman"},
+                {"name": "freeipa.ansible_freeipa"},
+            ]
+        },
+    )
+
+
+def get_user_containerfiles(lab_config, options):
+    """Return the user containerfiles, by their name in the lab.
+
+    User containerfiles override the ipalab-config containerfiles with
+    the same name, and the ones given in the command line override the
+    ones in the configuration.
+    """
+    if options.config_file:
+        config_dir = os.path.dirname(os.path.realpath(options.config_file))
+    else:
+        config_dir = os.getcwd()
+    containerfiles = [
+        (
+            os.path.realpath(os.path.join(config_dir, containerfile))
+            if not containerfile.startswith("/")
+            else containerfile
+        )
+        for containerfile in lab_config.get("containerfiles", [])
+    ]
+    return {
+        os.path.basename(containerfile): containerfile
+        for containerfile in containerfiles + list(options.containerfiles)
+    }
+
+
+def save_containers_data(lab_config, base_dir, _options):
+    """Copy containerfiles to result directory."""
+    containerfiles = lab_config["user_containerfiles"]
+    # Only the containerfile that is used is copied, so the manifest
+    # has a single source for each file.
+    with timed("queue_helper_files:containerfiles"):
+        copy_helper_files(
+            base_dir, "containerfiles", exclude=containerfiles, mounted=True
+        )
+    with timed("queue_extra_files:containerfiles"):
+        copy_extra_files(
+            list(containerfiles.values()),
+            os.path.join(base_dir, "containerfiles"),
+            mounted=True,
+        )
+    # Containerfiles of the images with the IPA packages installed.
+    for filename, data in lab_config.get("ipa_containerfiles", {}).items():
+        save_file(os.path.join(base_dir, "containerfiles"), filename, data)
+
+
+def save_deploy_playbook(base_dir, inventory_config, yaml):
+    """Save 'playbooks/deploy-lab.yml', deploying all IPA deployments."""
+    plays = gen_deploy_playbook(inventory_config)
+    if plays:
+        make_directory(os.path.join(base_dir, "playbooks"))
+        save_data(yaml, base_dir, "playbooks/deploy-lab.yml", plays)
+
+
+def save_ansible_data(_lab_config, base_dir, options):
+    """Copy Ansible playbooks to result directory."""
+    plays = []
+    for play in options.playbooks:
+        if not os.path.exists(play):
+            raise missing_source(play)
+        if os.path.isfile(play):
+            plays.append(play)
+        if os.path.isdir(play):
+            plays.extend(
+                [
+                    os.path.join(dirname, name)
+                    for dirname, _, filenames in os.walk(play)
+                    for name in filenames
+                    if name.endswith(".yml") or name.endswith(".yaml")
+                ]
+            )
+    if plays:
+        with timed("queue_extra_files:playbooks"):
+            copy_extra_files(plays, os.path.join(base_dir, "playbooks"))
+
+
+def save_extra_data(lab_config, base_dir, options):
+    """Copy the user 'extra_data' to result directory."""
+    with timed("queue_extra_files:extra_data"):
+        _save_extra_data(lab_config, base_dir, options)
+
+
+def _save_extra_data(lab_config, base_dir, options):
+    cwd = os.path.dirname(options.config_file or "")
+    for helper in lab_config.get("extra_data", []):
+        if os.path.isabs(helper):
+            source = os.path.dirname(helper)
+            helper = os.path.basename(helper)
+        else:
+            source = cwd
+        if os.path.isfile(os.path.join(source, helper)):
+            copy_extra_files(
+                [helper],
+                os.path.join(base_dir, os.path.dirname(helper)),
+                source=source,
+            )
+        else:
+            copy_helper_files(base_dir, helper, source=source)
+
+
+def save_build_script(lab_config, base_dir, compose_config):
+    """Save 'build-images.sh', removing the 'build' of the services."""
+    from ipalab_config.images import plan_image_builds, gen_build_script
+
+    with timed("plan_image_builds"):
+        plan = plan_image_builds(compose_config["services"])
+    save_file(
+        base_dir,
+        "build-images.sh",
+        gen_build_script(lab_config["lab_name"], plan),
+        executable=True,
+    )
+
+
+def gen_lab_data(lab_config):
+    """Generate the lab compose and inventory configuration.
+
+    Returns a tuple with the compose and the inventory data.
+    """
+    from ipalab_config.compose import gen_compose_data
+
+    with timed("gen_compose_data"):
+        compose_config = gen_compose_data(lab_config)
+    with timed("gen_inventory_data"):
+        inventory_config = gen_inventory_data(lab_config)
+    return compose_config, inventory_config
+
+
+def save_lab_data(lab_config, base_dir, lab_data, options, yaml):
+    """Save the lab configuration and its helper files to 'base_dir'."""
+    compose_config, inventory_config = lab_data
+    yaml = get_output_yaml(lab_config, yaml)
+    streaming = (
+        len(compose_config["services"]) >= STREAMING_THRESHOLD
+        and not lab_config["fast_output"]
+    )
+
+    with timed("gen_external_node_configuration"):
+        role_services = gen_external_node_configuration(
+            lab_config, base_dir, compose_config
+        )
+
+    if lab_config["healthchecks"]:
+        with timed("add_healthchecks"):
+            add_healthchecks(compose_config["services"], role_services)
+            add_dependencies(compose_config["services"], role_services)
+
+    if lab_config["image_builds"] == "script":
+        save_build_script(lab_config, base_dir, compose_config)
+
+    save_data(yaml, base_dir, "compose.yml", compose_config, streaming)
+    # create log directories
+    if lab_config.get("mount_varlog"):
+        for node in compose_config["services"]:
+            make_directory(os.path.join(base_dir, "logs", node))
+        log_rotation = get_log_rotation(lab_config)
+        if log_rotation:
+            save_file(
+                base_dir,
+                "logs/logrotate.conf",
+                gen_logrotate_config(lab_config["lab_name"], *log_rotation),
+            )
+
+    group_vars = {}
+    if lab_config["inventory_layout"] == "group_vars":
+        with timed("factor_group_vars"):
+            group_vars = factor_group_vars(inventory_config)
+    save_data(yaml, base_dir, "inventory.yml", inventory_config, streaming)
+    if group_vars:
+        make_directory(os.path.join(base_dir, "group_vars"))
+    for group, variables in group_vars.items():
+        save_data(
+            yaml,
+            base_dir,
+            os.path.join("group_vars", f"{group}.yml"),
+            variables,
+        )
+
+    save_containers_data(lab_config, base_dir, options)
+    save_deploy_playbook(base_dir, inventory_config, yaml)
+    save_ansible_data(lab_config, base_dir, options)
+    gen_optional_files(lab_config, base_dir, yaml)
+    with timed("queue_helper_files:scripts"):
+        copy_helper_files(base_dir, "scripts")
+
+    # process user extra_data
+    save_extra_data(lab_config, base_dir, options)
+
+
+@contextlib.contextmanager
+def lab_output(base_dir, link_mode="copy"):
+    """Track the files written to the output directory of a lab.
+
+    Files are copied by a copy engine, and only the files that changed
+    since the last generation are written. If the generation fails, the
+    pending copies are discarded, and so is the manifest.
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    open_manifest(base_dir)
+    start_copy_engine(link_mode)
+    try:
+        yield
+        with timed("wait_file_copies"):
+            finish_copy_engine()
+    except BaseException:
+        abort_copy_engine()
+        close_manifest(base_dir, save=False)
+        raise
+    with timed("close_manifest"):
+        close_manifest(base_dir)
+
+
+def write_artifacts(artifacts, link_mode="copy"):
+    """Write a lab generated in memory to its output directory.
+
+    Only the files that changed since the last generation are written,
+    and the files no longer generated are removed.
+
+    Args:
+        artifacts: The 'LabArtifacts' returned by 'generate'.
+        link_mode: How the copied files are materialized.
+    """
+    base_dir = artifacts.base_dir
+    files = [
+        *artifacts.documents,
+        *artifacts.files,
+        *artifacts.assets,
+    ]
+    directories = {
+        os.path.join(base_dir, name)
+        for name in [
+            *artifacts.directories,
+            *(os.path.dirname(name) for name in files),
+        ]
+    }
+    with lab_output(base_dir, link_mode):
+        for directory in sorted(directories):
+            make_directory(directory)
+        for name in artifacts.documents:
+            save_file(base_dir, name, artifacts.dump(name))
+        for name, data in artifacts.files.items():
+            save_file(base_dir, name, data, name in artifacts.executables)
+        for name, source in artifacts.assets.items():
+            copy_if_changed(
+                source,
+                os.path.join(base_dir, name),
+                artifacts.copy_functions.get(name),
+                mounted=name in artifacts.mounted,
+            )
+
+
+def _generate(config, options):
+    yaml = get_yaml()
+    if config is None:
+        if not options.config_file:
+            raise ValueError("No lab configuration provided.")
+        # pylint: disable=unspecified-encoding
+        with open(options.config_file, "r") as config_file:
+            config = config_file.read()
+    if isinstance(config, str):
+        lab_config = load_config(config, yaml)
+    else:
+        lab_config = copy.deepcopy(config)
+    set_default_values(lab_config, options)
+
+    artifacts = LabArtifacts(
+        options.output or lab_config["lab_name"],
+        get_output_yaml(lab_config, yaml),
+    )
+    collect_artifacts(artifacts)
+    lab_data = gen_lab_data(lab_config)
+    save_lab_data(lab_config, artifacts.base_dir, lab_data, options, yaml)
+    artifacts.lab_config = lab_config
+    artifacts.compose, artifacts.inventory = lab_data
+    return artifacts
+
+
+def generate(config=None, **options):
+    """Generate a lab in memory, without writing to the filesystem.
+
+    Args:
+        config: The lab configuration, as a dict, or as YAML, or Jinja2,
+            source. If not provided, it is read from 'config_file'.
+        options: The 'LabOptions' used for the lab generation.
+
+    Returns:
+        A 'LabArtifacts' object with the generated lab data.
+    """
+    options = LabOptions(**options)
+    return contextvars.copy_context().run(_generate, config, options)
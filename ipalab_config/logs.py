@@ -0,0 +1,75 @@
+"""Generate the size limits of the node logs mounted on the host."""
+
+import textwrap
+
+from ipalab_config.resources import parse_memory
+
+# The node log files rotated on the host. The 389-ds logs rotate
+# themselves, and journald limits the size of the journal.
+LOGROTATE_PATTERNS = [
+    "logs/*/*.log",
+    "logs/*/*/*.log",
+    "logs/*/*/*/*.log",
+    "logs/*/httpd/*_log",
+    "logs/*/messages",
+    "logs/*/secure",
+]
+
+DEFAULT_LOG_ROTATION = {"size": "100m", "rotate": 3}
+
+
+def get_log_rotation(lab_config):
+    """Return the log rotation settings of the lab, or None if disabled."""
+    log_rotation = lab_config.get("log_rotation", True)
+    if log_rotation is False:
+        return None
+    if log_rotation is True:
+        log_rotation = {}
+    if not isinstance(log_rotation, dict):
+        raise ValueError(f"Invalid 'log_rotation': {log_rotation}")
+    settings = {**DEFAULT_LOG_ROTATION, **log_rotation}
+    size = parse_memory(settings["size"])
+    if size < 1:
+        raise ValueError(
+            f"Invalid 'log_rotation' size: '{settings['size']}', "
+            "must be at least 1m"
+        )
+    try:
+        rotate = int(settings["rotate"])
+    except (TypeError, ValueError):
+        rotate = -1
+    if rotate < 0:
+        raise ValueError(
+            f"Invalid 'log_rotation' rotate: '{settings['rotate']}'"
+        )
+    return size, rotate
+
+
+def gen_logrotate_config(lab_name, size, rotate):
+    """Return a logrotate configuration for the node logs.
+
+    Paths are relative to the lab directory, and 'rotate-logs.sh' runs
+    logrotate with them. Files are copied and truncated, as the nodes
+    keep them open.
+
+    Args:
+        lab_name: The name of the lab.
+        size: The size, in MiB, above which a log file is rotated.
+        rotate: The number of rotated files kept for each log file.
+    """
+    patterns = "\n".join(LOGROTATE_PATTERNS)
+    return (
+        f"# Generated by ipalab-config for the lab '{lab_name}'.\n"
+        "# Size limits of the nodes '/var/log', applied by "
+        "'scripts/rotate-logs.sh'.\n"
+        f"{patterns}\n" + textwrap.dedent(f"""\
+            {{
+                size {size}M
+                rotate {rotate}
+                copytruncate
+                compress
+                missingok
+                notifempty
+            }}
+            """)
+    )
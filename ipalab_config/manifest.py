@@ -0,0 +1,213 @@
+"""Track generated files to avoid rewriting unchanged output."""
+
+import os
+import json
+import hashlib
+import contextvars
+
+from ipalab_config.logger import logger
+
+MANIFEST_FILE = ".ipalab-manifest.json"
+MANIFEST_VERSION = 1
+
+# Manifests of the output directories being generated in the current
+# context, by directory
+_MANIFESTS = contextvars.ContextVar("manifests", default=None)
+
+
+def content_digest(data):
+    """Return the digest used to identify generated file contents."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+class DigestStream:
+    """A text stream wrapper computing the digest of the data written."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.encoding = getattr(stream, "encoding", None)
+        self._hash = hashlib.sha256()
+
+    def write(self, data):
+        """Write data to the stream, updating the digest."""
+        self._hash.update(data.encode("utf-8"))
+        return self.stream.write(data)
+
+    def flush(self):
+        """Flush the underlying stream."""
+        self.stream.flush()
+
+    @property
+    def digest(self):
+        """The digest of the data written, as given by 'content_digest'."""
+        return f"sha256:{self._hash.hexdigest()}"
+
+
+def file_fingerprint(path):
+    """Return the fingerprint used to identify a copied source file.
+
+    Copied files may be large, so instead of hashing their contents,
+    the source file size and modification time are used.
+    Returns None if the file cannot be evaluated.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"stat:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class Manifest:
+    """Digests of the files generated in an output directory."""
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.filename = os.path.join(base_dir, MANIFEST_FILE)
+        self.previous = {}
+        self.files = {}
+        self.updated = []
+        self.unchanged = []
+
+    def load(self):
+        """Load the manifest of the previous generation, if available."""
+        if not os.path.isfile(self.filename):
+            return
+        try:
+            # pylint: disable=unspecified-encoding
+            with open(self.filename, "r") as manifest_file:
+                data = json.loads(manifest_file.read())
+            if data.get("version") != MANIFEST_VERSION:
+                raise ValueError("Unsupported manifest version")
+            self.previous = dict(data["files"])
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            logger.warning("Ignoring invalid manifest: %s", self.filename)
+            self.previous = {}
+        # If generation fails, files may not match the manifest anymore.
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
+    def relpath(self, path):
+        """Return the path relative to the output directory."""
+        return os.path.relpath(path, self.base_dir)
+
+    def needs_update(self, path, digest):
+        """Register the file digest and check if the file must be written."""
+        filename = self.relpath(path)
+        self.files[filename] = digest
+        if (
+            digest is not None
+            and self.previous.get(filename) == digest
+            and os.path.isfile(path)
+        ):
+            self.unchanged.append(filename)
+            return False
+        self.updated.append(filename)
+        return True
+
+    @property
+    def removed(self):
+        """Files of the previous generation that were not generated."""
+        return sorted(set(self.previous) - set(self.files))
+
+    def remove_files(self):
+        """Remove the files of the previous generation not generated now.
+
+        Stale files could still be used, for example, 'group_vars' files
+        are read by Ansible even if the inventory does not need them.
+        Directories left empty are also removed.
+        """
+        base_dir = os.path.abspath(self.base_dir)
+        for filename in self.removed:
+            path = os.path.abspath(os.path.join(base_dir, filename))
+            # Never remove files outside the output directory.
+            if not path.startswith(os.path.join(base_dir, "")):
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as err:
+                logger.warning("Cannot remove %s: %s", filename, err)
+                continue
+            directory = os.path.dirname(path)
+            while directory != base_dir:
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+
+    def save(self):
+        """Save the manifest to the output directory."""
+        files = {
+            name: digest
+            for name, digest in sorted(self.files.items())
+            if digest is not None
+        }
+        # pylint: disable=unspecified-encoding
+        with open(self.filename, "w") as manifest_file:
+            manifest_file.write(
+                json.dumps({"version": MANIFEST_VERSION, "files": files}) + "\n"
+            )
+
+    def log_summary(self):
+        """Display a summary of the changes to the output directory."""
+        if not self.previous:
+            logger.info(
+                "Generated %d files in '%s'", len(self.updated), self.base_dir
+            )
+            return
+        for filename in self.updated:
+            logger.info("Updated: %s", filename)
+        for filename in self.removed:
+            logger.info("Removed: %s", filename)
+        logger.info(
+            "%d files updated, %d unchanged, %d removed",
+            len(self.updated),
+            len(self.unchanged),
+            len(self.removed),
+        )
+
+
+def open_manifest(base_dir):
+    """Start tracking the files generated in the output directory."""
+    manifest = Manifest(base_dir)
+    manifest.load()
+    manifests = _MANIFESTS.get() or {}
+    _MANIFESTS.set({**manifests, os.path.abspath(base_dir): manifest})
+    return manifest
+
+
+def close_manifest(base_dir, save=True):
+    """Stop tracking the output directory, saving its manifest.
+
+    If 'save' is False, as when the generation fails, the manifest is
+    discarded, and every file is written again on the next generation.
+    """
+    manifests = dict(_MANIFESTS.get() or {})
+    manifest = manifests.pop(os.path.abspath(base_dir), None)
+    _MANIFESTS.set(manifests)
+    if manifest is not None and save:
+        manifest.remove_files()
+        manifest.save()
+        manifest.log_summary()
+    return manifest
+
+
+def get_manifest(path):
+    """Return the manifest tracking the given output path, if any."""
+    manifests = _MANIFESTS.get()
+    if not manifests:
+        return None
+    path = os.path.abspath(path)
+    while True:
+        if path in manifests:
+            return manifests[path]
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
@@ -0,0 +1,74 @@
+"""Generate the Ansible files used to deploy the IPA deployments of a lab."""
+
+import textwrap
+
+# Forks used by Ansible, each one running a 'podman exec' per task.
+MIN_FORKS = 5
+MAX_FORKS = 50
+
+# The inventory groups of the IPA nodes, and the ansible-freeipa role
+# used to deploy them, in the order they must be deployed.
+DEPLOYMENT_PHASES = [
+    ("ipaserver", "ipaserver", "Install the first server of each deployment"),
+    ("ipareplicas", "ipareplica", "Install the replicas of each deployment"),
+    ("ipaclients", "ipaclient", "Install the clients of each deployment"),
+]
+
+
+def gen_deploy_playbook(inventory):
+    """Return the plays that deploy every IPA deployment of the lab.
+
+    Deployments are independent, so the nodes of the same kind, on all
+    deployments, are deployed by the same play. Plays use the 'free'
+    strategy, so each node runs its role as fast as it can, and the
+    time of each phase is the time of the slowest deployment, not the
+    sum of the times of all deployments.
+
+    Args:
+        inventory: The lab inventory.
+
+    Returns:
+        list: The plays, or an empty list if the lab has no IPA nodes.
+    """
+    groups = {}
+    for lab in inventory.values():
+        groups.update(lab.get("children") or {})
+    return [
+        {
+            "name": name,
+            "hosts": group,
+            "become": True,
+            "strategy": "free",
+            "roles": [
+                {"role": f"freeipa.ansible_freeipa.{role}", "state": "present"}
+            ],
+        }
+        for group, role, name in DEPLOYMENT_PHASES
+        if group in groups
+    ]
+
+
+def gen_ansible_config(lab_name, node_count):
+    """Return an 'ansible.cfg' tuned for the lab podman connection.
+
+    Every node runs in its own fork, up to 'MAX_FORKS', and facts are
+    cached in the lab directory, so they are gathered only once, even
+    when playbooks are run again.
+    """
+    forks = min(max(node_count, MIN_FORKS), MAX_FORKS)
+    return textwrap.dedent(f"""\
+        # Generated by ipalab-config for the lab '{lab_name}'.
+        [defaults]
+        inventory = inventory.yml
+        forks = {forks}
+        # Gather facts only for hosts without cached facts.
+        gathering = smart
+        fact_caching = jsonfile
+        fact_caching_connection = .ansible-facts
+        fact_caching_timeout = 86400
+        interpreter_python = auto_silent
+
+        [connection]
+        # Ignored by the connection plugins that do not support it.
+        pipelining = True
+        """)
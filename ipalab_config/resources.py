@@ -0,0 +1,186 @@
+"""Split a host CPU and memory budget between the lab nodes."""
+
+import re
+import math
+from collections import namedtuple
+
+# The share of the budget, and the minimum resources, of each kind of
+# node. The first server of a deployment does most of the work, and CA
+# or KRA replicas run the same services, while clients and external
+# nodes only need a fraction of it.
+#   weight: Share of the budget, relative to other nodes
+#   memory: Minimum memory, in MiB
+#   cpus: Minimum number of CPUs
+NodeKind = namedtuple("NodeKind", ["weight", "memory", "cpus"])
+
+NODE_KINDS = {
+    "first_server": NodeKind(8, 2048, 1.0),
+    "ca_replica": NodeKind(6, 2048, 1.0),
+    "replica": NodeKind(4, 1536, 0.5),
+    "client": NodeKind(2, 512, 0.25),
+    "external": NodeKind(1, 256, 0.1),
+}
+
+MEMORY_UNITS = {"": 1 / 1048576, "b": 1 / 1048576, "k": 1 / 1024, "m": 1}
+MEMORY_UNITS.update({"g": 1024, "t": 1048576})
+
+
+def parse_memory(value):
+    """Return a memory size, as '512m' or '2g', in MiB."""
+    match = re.fullmatch(
+        r"\s*(\d+(?:\.\d+)?)\s*([bkmgt]?)i?b?\s*", str(value).lower()
+    )
+    if not match:
+        raise ValueError(f"Invalid memory size: '{value}'")
+    number, unit = match.groups()
+    return int(float(number) * MEMORY_UNITS[unit])
+
+
+def parse_cpuset(value, cpus):
+    """Return the list of host CPUs available for pinning."""
+    if value is True:
+        return list(range(math.ceil(cpus)))
+    result = []
+    for part in str(value).split(","):
+        try:
+            first, _, last = part.strip().partition("-")
+            result.extend(range(int(first), int(last or first) + 1))
+        except ValueError:
+            raise ValueError(f"Invalid 'cpuset': '{value}'") from None
+    if not result:
+        raise ValueError(f"Invalid 'cpuset': '{value}'")
+    return result
+
+
+def split_budget(budget, nodes, minimum):
+    """Split a budget by node weight, giving every node its minimum.
+
+    Nodes whose share would be under their minimum get the minimum, and
+    the remaining budget is split between the other nodes.
+
+    Args:
+        budget: The amount to split.
+        nodes: A dict with the weight of each node.
+        minimum: A dict with the minimum amount of each node.
+
+    Returns:
+        dict: The amount of each node.
+    """
+    shares = {}
+    pending = dict(nodes)
+    available = budget
+    while pending:
+        total = sum(pending.values())
+        below = {
+            name: minimum[name]
+            for name, weight in pending.items()
+            if available * weight / total < minimum[name]
+        }
+        if not below:
+            for name, weight in pending.items():
+                shares[name] = available * weight / total
+            break
+        shares.update(below)
+        available -= sum(below.values())
+        for name in below:
+            del pending[name]
+    return shares
+
+
+def get_budget_report(resource, budget, required, kinds, unit):
+    """Return a message describing the resources the lab requires."""
+    counts = {}
+    for kind in kinds.values():
+        counts[kind] = counts.get(kind, 0) + 1
+    lines = [
+        f"Lab does not fit the 'resources' budget: {resource} "
+        f"required {required:g}{unit}, available {budget:g}{unit}.",
+    ]
+    for kind, count in counts.items():
+        minimum = getattr(NODE_KINDS[kind], resource)
+        lines.append(
+            f"  {count} {kind} node(s), at least {minimum:g}{unit} each"
+        )
+    return "\n".join(lines)
+
+
+def allocate_resources(resources, nodes):
+    """Split the lab 'resources' budget between the lab nodes.
+
+    Nodes with a configured 'memory' keep it, and it is subtracted from
+    the memory budget.
+
+    Args:
+        resources: The lab 'resources' configuration, with 'memory',
+            'cpus' and 'cpuset'.
+        nodes: A list of (service name, kind, configured memory in MiB,
+            or None).
+
+    Returns:
+        dict: The compose options of each node, by service name.
+    """
+    kinds = {name: kind for name, kind, _ in nodes}
+    fixed = {name: memory for name, _, memory in nodes if memory is not None}
+    options = {name: {} for name in kinds}
+    if resources.get("cpuset") and resources.get("cpus") is None:
+        raise ValueError("'resources' 'cpuset' requires 'cpus'.")
+    if resources.get("memory") is not None:
+        budget = parse_memory(resources["memory"])
+        available = budget - sum(fixed.values())
+        shared = {
+            name: kind for name, kind in kinds.items() if name not in fixed
+        }
+        required = sum(NODE_KINDS[kind].memory for kind in shared.values())
+        if required > available:
+            report = get_budget_report(
+                "memory", available, required, shared, "m"
+            )
+            if fixed:
+                report += (
+                    f"\n  {sum(fixed.values())}m used by the "
+                    f"{len(fixed)} node(s) with 'memory' set"
+                )
+            raise ValueError(report)
+        memory = split_budget(
+            available,
+            {name: NODE_KINDS[kind].weight for name, kind in shared.items()},
+            {name: NODE_KINDS[kind].memory for name, kind in shared.items()},
+        )
+        for name, size in memory.items():
+            options[name]["mem_limit"] = f"{int(size)}m"
+    if resources.get("cpus") is not None:
+        try:
+            budget = float(resources["cpus"])
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid 'cpus': '{resources['cpus']}'") from None
+        required = sum(NODE_KINDS[kind].cpus for kind in kinds.values())
+        if required > budget:
+            raise ValueError(
+                get_budget_report("cpus", budget, required, kinds, "")
+            )
+        cpus = split_budget(
+            budget,
+            {name: NODE_KINDS[kind].weight for name, kind in kinds.items()},
+            {name: NODE_KINDS[kind].cpus for name, kind in kinds.items()},
+        )
+        for name in kinds:
+            options[name]["cpus"] = math.floor(round(cpus[name] * 100, 6)) / 100
+        if resources.get("cpuset"):
+            cpuset = parse_cpuset(resources["cpuset"], budget)
+            pin_cpus(options, cpuset)
+    return options
+
+
+def pin_cpus(options, cpuset):
+    """Pin each node to consecutive host CPUs, wrapping around 'cpuset'.
+
+    Each node gets as many host CPUs as its 'cpus', rounded up, so nodes
+    only share host CPUs when the rounded up 'cpus' of all nodes add up
+    to more than the available CPUs.
+    """
+    index = 0
+    for node in options.values():
+        size = min(max(math.ceil(node["cpus"]), 1), len(cpuset))
+        pinned = [cpuset[(index + i) % len(cpuset)] for i in range(size)]
+        index = (index + size) % len(cpuset)
+        node["cpuset"] = ",".join(str(cpu) for cpu in pinned)
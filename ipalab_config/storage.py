@@ -0,0 +1,86 @@
+"""Mount the I/O heavy paths of the lab nodes as tmpfs or named volumes."""
+
+# The paths written during the IPA deployment, by storage key, with the
+# default size of a tmpfs mount.
+STORAGE_PATHS = {
+    "dirsrv": ("/var/lib/dirsrv", "1g"),
+    "pki": ("/var/lib/pki", "512m"),
+    "journal": ("/var/log/journal", "128m"),
+    "run": ("/run", "256m"),
+    "tmp": ("/tmp", "512m"),
+}
+
+STORAGE_TYPES = ("tmpfs", "volume", "container")
+
+
+def get_path_storage(key, value):
+    """Return the storage type and tmpfs size of a path."""
+    if isinstance(value, str):
+        value = {"type": value}
+    if not isinstance(value, dict):
+        raise ValueError(f"Invalid 'storage' for '{key}': {value}")
+    storage_type = value.get("type", "tmpfs")
+    if storage_type not in STORAGE_TYPES:
+        raise ValueError(
+            f"Invalid 'storage' type for '{key}': '{storage_type}', "
+            f"use one of: {', '.join(STORAGE_TYPES)}"
+        )
+    return storage_type, str(value.get("size", STORAGE_PATHS[key][1])).lower()
+
+
+def get_storage_profile(storage):
+    """Return the storage type and tmpfs size of each configured path.
+
+    Args:
+        storage: Either a storage type, used for all paths, or a dict with
+            a storage type, or a dict with 'type' and 'size', by path key.
+
+    Returns:
+        dict: A (type, size) tuple, by path key.
+    """
+    if not storage:
+        return {}
+    if isinstance(storage, str):
+        storage = dict.fromkeys(STORAGE_PATHS, storage)
+    if not isinstance(storage, dict):
+        raise ValueError(f"Invalid 'storage': {storage}")
+    profile = {}
+    for key, value in storage.items():
+        if key not in STORAGE_PATHS:
+            raise ValueError(
+                f"Invalid 'storage' path: '{key}', "
+                f"use one of: {', '.join(STORAGE_PATHS)}"
+            )
+        profile[key] = get_path_storage(key, value)
+    return profile
+
+
+def get_storage_config(name, *storages):
+    """Return the tmpfs mounts and named volumes used by a node.
+
+    Paths with the 'container' type are kept in the container filesystem.
+
+    Args:
+        name: The node service name, used to name its volumes.
+        storages: The 'storage' configurations that apply to the node,
+            each one overriding the paths set by the previous ones.
+
+    Returns:
+        tuple: The node 'tmpfs' mounts, and a dict with the named volume
+            mounted on each path, by volume name.
+    """
+    profile = {}
+    for storage in storages:
+        profile.update(get_storage_profile(storage))
+    tmpfs = []
+    volumes = {}
+    for key, (storage_type, size) in profile.items():
+        path, _ = STORAGE_PATHS[key]
+        if storage_type == "tmpfs":
+            # Keep the default mode for '/tmp', other paths are not
+            # writable by every user.
+            mode = "" if key == "tmp" else ",mode=0755"
+            tmpfs.append(f"{path}:rw,exec,size={size}{mode}")
+        elif storage_type == "volume":
+            volumes[f"{name}-{key}"] = path
+    return tmpfs, volumes
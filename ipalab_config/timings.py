@@ -0,0 +1,78 @@
+"""Measure the time spent in each phase of the lab generation."""
+
+import json
+import time
+import contextvars
+from contextlib import contextmanager
+
+# Timings of the lab being generated in the current context, if enabled.
+_TIMINGS = contextvars.ContextVar("timings", default=None)
+
+
+class Timings:
+    """Time spent, and number of calls, for each phase of a generation.
+
+    Phases may be nested, e.g., 'gen_config:dns' is also part of
+    'gen_external_node_configuration', so the phases times do not add
+    up to the total time.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.start = time.perf_counter()
+        self.total = None
+
+    def add(self, phase, seconds):
+        """Add the time spent in a phase."""
+        entry = self.phases.setdefault(phase, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def stop(self):
+        """Stop measuring the total generation time."""
+        self.total = time.perf_counter() - self.start
+
+    def report(self):
+        """Return the timings as a JSON serializable dict."""
+        if self.total is None:
+            self.stop()
+        return {
+            "total": round(self.total, 6),
+            "phases": [
+                {"phase": phase, "seconds": round(seconds, 6), "calls": calls}
+                for phase, (seconds, calls) in self.phases.items()
+            ],
+        }
+
+
+def start_timings():
+    """Start measuring the generation phases in the current context."""
+    timings = Timings()
+    _TIMINGS.set(timings)
+    return timings
+
+
+def get_timings():
+    """Return the timings of the current context, if enabled."""
+    return _TIMINGS.get()
+
+
+@contextmanager
+def timed(phase):
+    """Measure the time spent in 'phase', if timings are enabled."""
+    timings = _TIMINGS.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+def save_timings(filename, report):
+    """Save a timings report as a JSON file."""
+    # pylint: disable=unspecified-encoding
+    with open(filename, "w") as timings_file:
+        timings_file.write(json.dumps(report, indent=2) + "\n")
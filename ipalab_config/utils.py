@@ -1,14 +1,32 @@
 """ipalab_config utility functions."""
 
 import os
+import errno
 import shutil
-import socket
 import ipaddress
 import importlib
-import importlib.resources
 import functools
+import contextvars
+from collections import namedtuple
 
 from ipalab_config.logger import logger
+from ipalab_config.artifacts import get_artifacts
+from ipalab_config.assets import get_link_mode, materialize_file
+from ipalab_config.manifest import (
+    DigestStream,
+    get_manifest,
+    content_digest,
+    file_fingerprint,
+)
+
+
+@functools.cache
+def get_data_dir():
+    """Return the path to the ipalab-config data files."""
+    # pylint: disable=import-outside-toplevel
+    from importlib import resources
+
+    return os.path.join(resources.files("ipalab_config"), "data")
 
 
 def die(msg, err=1):  # pragma: no cover
@@ -28,50 +46,253 @@ def get_hostname(config, name, domain):
     return ensure_fqdn(hostname, domain)
 
 
+def format_host_field(host, key, value, index):
+    """Return a host 'name' or 'hostname' formatted with the host index."""
+    try:
+        return value.format(index=index)
+    except (KeyError, IndexError, ValueError) as err:
+        raise ValueError(
+            f"Invalid '{key}' for host '{host['name']}': '{value}', "
+            "only the '{index}' replacement field can be used"
+        ) from err
+
+
+def expand_hosts(hosts):
+    """Iterate over host configurations, expanding host multiplicity.
+
+    A host with 'count: N' yields N hosts, with 'name' and 'hostname'
+    formatted with the host 'index' (from 1 to N). If the name has no
+    replacement field, '-{index}' is appended to it. Hosts are created
+    as they are requested, so large host lists are never materialized.
+
+    Raises:
+        ValueError: If 'name' or 'hostname' are not valid templates, or
+            if they would be the same for different hosts.
+    """
+    for host in hosts or []:
+        count = host.get("count")
+        if count is None:
+            yield host
+            continue
+        name = host["name"]
+        if isinstance(count, bool) or not isinstance(count, int) or count < 1:
+            raise ValueError(f"'count' must be a positive integer: '{name}'")
+        if host.get("ip_address"):
+            raise ValueError(
+                f"'ip_address' cannot be used with 'count': '{name}'"
+            )
+        if "{" not in name:
+            name = f"{name}-{{index}}"
+        hostname = host.get("hostname")
+        fields = {"name": name, "hostname": hostname}
+        for key, value in fields.items():
+            if value and count > 1:
+                first, second = (
+                    format_host_field(host, key, value, index)
+                    for index in (1, 2)
+                )
+                if first == second:
+                    raise ValueError(
+                        f"'{key}' of host '{host['name']}' must use the "
+                        "'{index}' replacement field with 'count'"
+                    )
+        template = {key: value for key, value in host.items() if key != "count"}
+        for index in range(1, count + 1):
+            node = dict(
+                template, name=format_host_field(host, "name", name, index)
+            )
+            if hostname:
+                node["hostname"] = format_host_field(
+                    host, "hostname", hostname, index
+                )
+            yield node
+
+
 def is_ip_address(addr):
     """Check if a given string represents an IP address."""
     try:
-        socket.inet_pton(socket.AF_INET, addr)
-    except OSError:
-        try:
-            socket.inet_pton(socket.AF_INET6, addr)
-        except OSError:
-            return False
+        ipaddress.ip_address(addr)
+    except ValueError:
+        return False
     return True
 
 
-# Cache for IP address generators by CIDR
-_IP_GENERATORS = {}
+class IPAddressAllocator:
+    """Allocate IPv4 addresses from a subnet.
 
+    Allocation state is kept in a bitmap with one bit per address of the
+    subnet, so even a /16 network needs only 8KiB. A cursor keeps track
+    of the lowest address that may be free, making the lookup for the
+    next free address amortized O(1).
 
-def clear_ip_generators():
-    """Clear the IP address generator cache.
+    The network and broadcast addresses, and the first host address,
+    which is assumed to be the gateway, are never allocated.
+    """
+
+    def __init__(self, cidr):
+        self.network = ipaddress.IPv4Interface(cidr).network
+        self._base = int(self.network.network_address)
+        self._size = self.network.num_addresses
+        self._bitmap = bytearray((self._size + 7) // 8)
+        self._cursor = 0
+        if self._size > 2:
+            # network and broadcast addresses
+            self._mark(0)
+            self._mark(self._size - 1)
+        # assume first host IP is the gateway IP address.
+        self._mark(1 if self._size > 2 else 0)
+
+    def _mark(self, index):
+        self._bitmap[index >> 3] |= 1 << (index & 7)
+
+    def _is_marked(self, index):
+        return bool(self._bitmap[index >> 3] & (1 << (index & 7)))
+
+    def _index(self, address):
+        index = int(ipaddress.IPv4Address(address)) - self._base
+        return index if 0 <= index < self._size else None
+
+    def __contains__(self, address):
+        return self._index(address) is not None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.allocate()
+
+    def is_allocated(self, address):
+        """Check if an address is not available for allocation."""
+        index = self._index(address)
+        return index is None or self._is_marked(index)
+
+    def reserve(self, address):
+        """Remove an address from the pool of available addresses.
+
+        Returns False if the address was already allocated or reserved.
+        """
+        index = self._index(address)
+        if index is None:
+            raise ValueError(f"'{address}' is not in subnet '{self.network}'")
+        if self._is_marked(index):
+            return False
+        self._mark(index)
+        return True
+
+    def reserve_range(self, first, last):
+        """Reserve all addresses of the subnet in the range [first, last]."""
+        start = max(int(ipaddress.IPv4Address(first)) - self._base, 0)
+        end = min(int(ipaddress.IPv4Address(last)) - self._base, self._size - 1)
+        for index in range(start, end + 1):
+            self._mark(index)
+
+    def release(self, address):
+        """Return an address to the pool of available addresses."""
+        index = self._index(address)
+        if index is None:
+            raise ValueError(f"'{address}' is not in subnet '{self.network}'")
+        self._bitmap[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+        self._cursor = min(self._cursor, index)
+
+    def allocate(self):
+        """Allocate the next free address of the subnet."""
+        bitmap = self._bitmap
+        index = self._cursor
+        while index < self._size:
+            if bitmap[index >> 3] == 0xFF:
+                # skip fully allocated bytes
+                index = (index | 7) + 1
+            elif self._is_marked(index):
+                index += 1
+            else:
+                self._mark(index)
+                self._cursor = index + 1
+                return ipaddress.IPv4Address(self._base + index)
+        self._cursor = self._size
+        raise ValueError(f"No IP address available in subnet '{self.network}'")
+
+
+# Cache for IP address allocators by CIDR, and address ranges reserved
+# before the allocators are created.
+IPAllocation = namedtuple("IPAllocation", ["allocators", "reserved"])
+
+# The IP allocation state is scoped to the current context, so labs
+# generated in separate contexts never share it.
+_IP_ALLOCATION = contextvars.ContextVar("ip_allocation", default=None)
+
+
+def clear_ip_allocators():
+    """Clear the IP address allocator cache and the address reservations.
 
     This should be called when starting a new configuration generation
     to ensure IP addresses start from the beginning of each network.
     """
-    _IP_GENERATORS.clear()
+    allocation = IPAllocation({}, [])
+    _IP_ALLOCATION.set(allocation)
+    return allocation
 
 
-def get_ip_address_generator(for_cidr=None):
-    """Return an IP address generator for a given network CIDR.
+def get_ip_allocation():
+    """Return the IP address allocation state of the current context."""
+    return _IP_ALLOCATION.get() or clear_ip_allocators()
 
-    Generators are cached by CIDR string to ensure the same generator
+
+def parse_address_range(addresses):
+    """Return the first and last IPv4 addresses of an address range.
+
+    The range may be a single address, a CIDR, or two addresses
+    separated by a '-'.
+    """
+    try:
+        if "-" in addresses:
+            first, last = (
+                ipaddress.IPv4Address(addr.strip())
+                for addr in addresses.split("-", 1)
+            )
+        else:
+            network = ipaddress.IPv4Network(addresses.strip(), strict=False)
+            first, last = network[0], network[-1]
+    except ValueError:
+        raise ValueError(f"Invalid IP address range: '{addresses}'") from None
+    if first > last:
+        raise ValueError(f"Invalid IP address range: '{addresses}'")
+    return first, last
+
+
+def reserve_ip_addresses(addresses):
+    """Reserve an address or address range in every subnet containing it.
+
+    Reservations affect both existing allocators and allocators created
+    afterwards, so explicit addresses can be registered before the
+    subnets are known.
+    """
+    first, last = parse_address_range(str(addresses))
+    allocation = get_ip_allocation()
+    allocation.reserved.append((first, last))
+    for allocator in allocation.allocators.values():
+        allocator.reserve_range(first, last)
+
+
+def get_ip_allocator(for_cidr=None):
+    """Return an IP address allocator for a given network CIDR.
+
+    Allocators are cached by CIDR string to ensure the same allocator
     is returned for subsequent calls with the same CIDR.
 
     Args:
         for_cidr: Network CIDR string (default: "192.168.159.0/24")
 
     Returns:
-        Generator yielding IP addresses from the network
+        IPAddressAllocator for the network
     """
     cidr = for_cidr or "192.168.159.0/24"
-    if cidr not in _IP_GENERATORS:
-        network = ipaddress.IPv4Interface(cidr).network
-        generator = network.hosts()
-        next(generator)  # assume first IP is the gateway IP address.
-        _IP_GENERATORS[cidr] = generator
-    return _IP_GENERATORS[cidr]
+    allocation = get_ip_allocation()
+    if cidr not in allocation.allocators:
+        allocator = IPAddressAllocator(cidr)
+        for first, last in allocation.reserved:
+            allocator.reserve_range(first, last)
+        allocation.allocators[cidr] = allocator
+    return allocation.allocators[cidr]
 
 
 def get_service_ip_address(service):
@@ -79,49 +300,140 @@ def get_service_ip_address(service):
     return service["networks"]["ipanet"]["ipv4_address"]
 
 
-def copy_extra_files(files, target_dir, source=None):
+def missing_source(path):
+    """Return the error raised when a file to copy does not exist."""
+    return FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+
+
+def make_directory(path):
+    """Create an output directory, if it does not exist."""
+    artifacts = get_artifacts()
+    if artifacts is not None:
+        artifacts.add_directory(path)
+    else:
+        os.makedirs(path, exist_ok=True)
+
+
+def copy_if_changed(source, target, copy_function=None, mounted=False):
+    """Copy a file, unless it was not changed since the last generation.
+
+    The file is materialized according to the current link mode, and
+    may be copied asynchronously if a copy engine is in use. Files in
+    directories used by the containers ('mounted') are never symlinked.
+    """
+    artifacts = get_artifacts()
+    if artifacts is not None:
+        # Fail as the copy would, so invalid labs are found in memory.
+        if not os.path.isfile(source):
+            raise missing_source(source)
+        artifacts.add_asset(target, source, copy_function, mounted)
+        return target
+    link_mode = get_link_mode(mounted)
+    manifest = get_manifest(target)
+    if manifest:
+        fingerprint = file_fingerprint(source)
+        if fingerprint and link_mode != "copy":
+            fingerprint = f"{fingerprint}:{link_mode}"
+        if not manifest.needs_update(target, fingerprint):
+            return target
+    materialize_file(source, target, copy_function or shutil.copy2, link_mode)
+    return target
+
+
+def copy_extra_files(files, target_dir, source=None, mounted=False):
     """Copy files to the target directory."""
-    os.makedirs(target_dir, exist_ok=True)
+    make_directory(target_dir)
     for arg in files:
         filename = os.path.basename(arg)
-        shutil.copy(
+        copy_if_changed(
             os.path.join(source or "", arg),
             os.path.join(target_dir, filename),
+            shutil.copy,
+            mounted,
         )
 
 
-def copy_resource_files(files, target_dir):
+def copy_resource_files(files, target_dir, mounted=False):
     """Copy ipalab-config resource files to target directory."""
-    os.makedirs(target_dir, exist_ok=True)
+    make_directory(target_dir)
     if not isinstance(files, (list, tuple)):
         files = [files]
     for source in files:
-        filename = os.path.join(
-            importlib.resources.files("ipalab_config"), "data", source
-        )
-        shutil.copyfile(
-            filename, os.path.join(target_dir, os.path.basename(filename))
+        filename = os.path.join(get_data_dir(), source)
+        copy_if_changed(
+            filename,
+            os.path.join(target_dir, os.path.basename(filename)),
+            shutil.copyfile,
+            mounted,
         )
 
 
-def copy_helper_files(base_dir, directory, source=None):
-    """Copy directory helper files to target directory"""
+def copy_helper_files(
+    base_dir, directory, source=None, exclude=(), mounted=False
+):
+    """Copy directory helper files to target directory.
+
+    Files with a path, relative to the directory, in 'exclude' are not
+    copied, for example, if they are overridden by user files. If the
+    directory is used by the containers, set 'mounted'.
+    """
     target_dir = os.path.join(base_dir, directory)
-    os.makedirs(target_dir, exist_ok=True)
+    make_directory(target_dir)
 
     if source is None:
-        source = os.path.join(
-            importlib.resources.files("ipalab_config"), "data"
-        )
+        source = get_data_dir()
     origin = os.path.join(source, directory)
-    shutil.copytree(origin, target_dir, dirs_exist_ok=True)
 
-
-def save_file(base_dir, filename, data):
-    """Write data to an output file."""
+    def is_excluded(dirname, name):
+        relpath = os.path.relpath(os.path.join(dirname, name), origin)
+        return os.path.normpath(relpath) in exclude
+
+    if get_artifacts() is not None:
+        if not os.path.isdir(origin):
+            raise missing_source(origin)
+        for dirname, _, filenames in os.walk(origin):
+            target = os.path.join(target_dir, os.path.relpath(dirname, origin))
+            for name in filenames:
+                if is_excluded(dirname, name):
+                    continue
+                copy_if_changed(
+                    os.path.join(dirname, name),
+                    os.path.normpath(os.path.join(target, name)),
+                    mounted=mounted,
+                )
+        return
+    shutil.copytree(
+        origin,
+        target_dir,
+        dirs_exist_ok=True,
+        copy_function=functools.partial(copy_if_changed, mounted=mounted),
+        ignore=lambda dirname, names: [
+            name for name in names if is_excluded(dirname, name)
+        ],
+    )
+
+
+def save_file(base_dir, filename, data, executable=False):
+    """Write data to an output file, unless it is unchanged."""
+    path = os.path.join(base_dir, filename)
+    artifacts = get_artifacts()
+    if artifacts is not None:
+        artifacts.add_file(path, data, executable)
+        return
+    manifest = get_manifest(path)
+    if manifest and not manifest.needs_update(path, content_digest(data)):
+        return
+    # Do not write through links created by the copy engine, as the
+    # linked source would change.
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
     # pylint: disable=unspecified-encoding
-    with open(os.path.join(base_dir, filename), "w") as out:
+    with open(path, "w") as out:
         out.write(data)
+    if executable:
+        os.chmod(path, 0o755)
 
 
 @functools.cache
@@ -129,3 +441,29 @@ def import_external_role_module(role):
     """Import an external role module."""
     role_mod = f"ipalab_config.external_role.{role}"
     return importlib.import_module(role_mod)
+
+
+def save_stream(base_dir, filename, write_data):
+    """Write an output file incrementally, unless it is unchanged.
+
+    The data is written by 'write_data(stream)' to a temporary file,
+    that replaces the output file only if its contents changed.
+    """
+    path = os.path.join(base_dir, filename)
+    tmpfile = f"{path}.tmp"
+    try:
+        # pylint: disable=unspecified-encoding
+        with open(tmpfile, "w") as out:
+            stream = DigestStream(out)
+            write_data(stream)
+        manifest = get_manifest(path)
+        if manifest and not manifest.needs_update(path, stream.digest):
+            os.remove(tmpfile)
+        else:
+            # Replacing the file, instead of writing to it, never
+            # changes the source of a link created by the copy engine.
+            os.replace(tmpfile, path)
+    except BaseException:
+        if os.path.exists(tmpfile):
+            os.remove(tmpfile)
+        raise
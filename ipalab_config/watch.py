@@ -0,0 +1,291 @@
+"""Regenerate a lab when its configuration, or any of its inputs, change."""
+
+import os
+import sys
+import time
+import struct
+import select
+import difflib
+
+from ipalab_config.logger import logger
+from ipalab_config.manifest import file_fingerprint
+from ipalab_config.utils import get_data_dir
+
+# inotify events of a file being written, replaced or removed. Editors
+# usually replace files, so the directory of each file is watched.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+INOTIFY_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+# struct inotify_event: wd, mask, cookie and len, followed by the name.
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# Time to wait for more changes, as saving a file may generate many events.
+SETTLE_TIME = 0.1
+POLL_INTERVAL = 1.0
+
+
+def get_tree_directories(directories):
+    """Return the directories, and all their subdirectories."""
+    tree = set()
+    for directory in directories:
+        for dirname, _, _ in os.walk(directory):
+            tree.add(os.path.abspath(dirname))
+    return tree
+
+
+def get_tree_listing(directories):
+    """Return the files in the directories, and their subdirectories."""
+    return {
+        os.path.join(dirname, name)
+        for directory in directories
+        for dirname, _, filenames in os.walk(directory)
+        for name in filenames
+    }
+
+
+class InotifyWatcher:
+    """Wait for changes to a set of files, using Linux inotify."""
+
+    def __init__(self):
+        # pylint: disable=import-outside-toplevel
+        import ctypes
+
+        self.libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        self.files = set()
+        self.trees = set()
+
+    def watch(self, paths, trees=()):
+        """Watch the given files, replacing the previously watched ones.
+
+        Any file created, changed or removed in the 'trees' directories,
+        or their subdirectories, is also reported.
+        """
+        self.files = {os.path.abspath(path) for path in paths}
+        self.trees = get_tree_directories(trees)
+        directories = {os.path.dirname(path) for path in self.files}
+        directories.update(self.trees)
+        for directory in set(self.directories.values()) - directories:
+            wd = next(
+                wd for wd, name in self.directories.items() if name == directory
+            )
+            self.libc.inotify_rm_watch(self.fd, wd)
+            del self.directories[wd]
+        for directory in directories - set(self.directories.values()):
+            wd = self.libc.inotify_add_watch(
+                self.fd, os.fsencode(directory), INOTIFY_MASK
+            )
+            if wd < 0:
+                logger.warning("Cannot watch directory: %s", directory)
+                continue
+            self.directories[wd] = directory
+
+    def read_events(self):
+        """Return the watched files changed by the pending events."""
+        changed = set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, _, _, size = INOTIFY_EVENT.unpack_from(data, offset)
+            start = offset + INOTIFY_EVENT.size
+            offset = start + size
+            name = data[start:offset].rstrip(b"\0")
+            if wd in self.directories:
+                directory = self.directories[wd]
+                path = os.path.join(directory, os.fsdecode(name))
+                if path in self.files or directory in self.trees:
+                    changed.add(path)
+        return changed
+
+    def wait(self):
+        """Wait until any of the watched files changes, returning them."""
+        changed = set()
+        while not changed:
+            select.select([self.fd], [], [])
+            changed.update(self.read_events())
+        while select.select([self.fd], [], [], SETTLE_TIME)[0]:
+            changed.update(self.read_events())
+        return changed
+
+    def close(self):
+        """Stop watching the files."""
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Wait for changes to a set of files, checking them periodically."""
+
+    def __init__(self):
+        self.files = {}
+        self.trees = {}
+
+    def watch(self, paths, trees=()):
+        """Watch the given files, replacing the previously watched ones.
+
+        Any file created or removed in the 'trees' directories, or their
+        subdirectories, is also reported.
+        """
+        self.files = {
+            os.path.abspath(path): file_fingerprint(path) for path in paths
+        }
+        self.trees = {
+            os.path.abspath(tree): get_tree_listing([tree]) for tree in trees
+        }
+
+    def wait(self):
+        """Wait until any of the watched files changes, returning them."""
+        while True:
+            time.sleep(POLL_INTERVAL)
+            changed = {
+                path
+                for path, fingerprint in self.files.items()
+                if file_fingerprint(path) != fingerprint
+            }
+            for tree, listing in self.trees.items():
+                changed.update(listing ^ get_tree_listing([tree]))
+            if changed:
+                self.watch(self.files, self.trees)
+                return changed
+
+    def close(self):
+        """Stop watching the files."""
+
+
+def get_file_watcher():
+    """Return an inotify watcher, if available, or a polling watcher."""
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError):
+        logger.info("inotify is not available, checking files periodically.")
+        return PollingWatcher()
+
+
+def get_lab_inputs(config_file, artifacts):
+    """Return the user files used to generate a lab.
+
+    The files provided by ipalab-config are not included.
+    """
+    data_dir = os.path.abspath(get_data_dir())
+    inputs = {os.path.abspath(config_file)}
+    for source in artifacts.assets.values():
+        source = os.path.abspath(source)
+        if not source.startswith(data_dir + os.sep):
+            inputs.add(source)
+    return inputs
+
+
+def get_lab_directories(config_file, artifacts, options):
+    """Return the user directories copied to a lab.
+
+    New files in these directories are also copied to the lab.
+    """
+    config_dir = os.path.dirname(os.path.abspath(config_file))
+    directories = [
+        os.path.join(config_dir, helper)
+        for helper in artifacts.lab_config.get("extra_data", [])
+    ]
+    directories.extend(options.playbooks)
+    return {
+        os.path.abspath(directory)
+        for directory in directories
+        if os.path.isdir(directory)
+    }
+
+
+def get_lab_snapshot(artifacts):
+    """Return the contents of the generated files, and copied files."""
+    files = {name: artifacts.dump(name) for name in artifacts.documents}
+    files.update(artifacts.files)
+    assets = {
+        name: file_fingerprint(source)
+        for name, source in artifacts.assets.items()
+    }
+    return files, assets
+
+
+def get_lines(text):
+    """Return the lines of a text, all of them ending with a new line."""
+    lines = text.splitlines(keepends=True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    return lines
+
+
+def get_lab_changes(previous, current):
+    """Return a unified diff of the changes between two lab snapshots."""
+    previous_files, previous_assets = previous
+    current_files, current_assets = current
+    lines = []
+    for name in sorted(set(previous_files) | set(current_files)):
+        lines.extend(
+            difflib.unified_diff(
+                get_lines(previous_files.get(name, "")),
+                get_lines(current_files.get(name, "")),
+                f"a/{name}" if name in previous_files else "/dev/null",
+                f"b/{name}" if name in current_files else "/dev/null",
+            )
+        )
+    for name in sorted(set(previous_assets) | set(current_assets)):
+        if name not in current_assets:
+            lines.append(f"Removed: {name}\n")
+        elif name not in previous_assets:
+            lines.append(f"Copied: {name}\n")
+        elif previous_assets[name] != current_assets[name]:
+            lines.append(f"Updated: {name}\n")
+    return lines
+
+
+def watch_lab(args, options):
+    """Generate a lab, and generate it again whenever its inputs change.
+
+    Each generation is done in memory, to find the lab inputs and the
+    changes to the generated files, and then written to the output
+    directory, where only the files that changed are written. A diff of
+    the changes is displayed. Errors are reported, and the previous lab
+    is kept, until the configuration is fixed.
+
+    Args:
+        args: The command line arguments.
+        options: The 'LabOptions' used for the lab generation.
+    """
+    # pylint: disable=import-outside-toplevel
+    from ipalab_config.lab import generate, write_artifacts
+
+    watcher = get_file_watcher()
+    snapshot = None
+    inputs = {os.path.abspath(args.CONFIG)}
+    trees = set()
+    try:
+        while True:
+            try:
+                artifacts = generate(**options._asdict())
+                write_artifacts(artifacts, options.link_mode)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                logger.error("%s: %s", args.CONFIG, err or type(err).__name__)
+            else:
+                inputs = get_lab_inputs(args.CONFIG, artifacts)
+                trees = get_lab_directories(args.CONFIG, artifacts, options)
+                current = get_lab_snapshot(artifacts)
+                if snapshot is not None:
+                    sys.stdout.writelines(get_lab_changes(snapshot, current))
+                    sys.stdout.flush()
+                snapshot = current
+            watcher.watch(inputs, trees)
+            logger.info("Watching %d files for changes.", len(inputs))
+            for path in sorted(watcher.wait()):
+                logger.info("Changed: %s", os.path.relpath(path))
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watcher.close()
@@ -0,0 +1,83 @@
+"""Serialize YAML documents with the C-accelerated safe dumper.
+
+The round-trip dumper preserves comments and formatting, but it is
+implemented in pure Python. When the generated files do not need
+comments, the documents are converted to plain YAML with the safe
+dumper, which uses libyaml to emit the document, if available.
+"""
+
+import datetime
+
+from ruamel.yaml import YAML
+from ruamel.yaml.representer import SafeRepresenter
+from ruamel.yaml.scalarbool import ScalarBoolean
+from ruamel.yaml.scalarstring import DoubleQuotedScalarString
+from ruamel.yaml.tag import Tag
+
+
+class FastRepresenter(SafeRepresenter):
+    """Represent round-trip data as plain YAML, keeping the key order."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sort_base_mapping_type_on_output = False
+        self.tags = {}
+
+    def get_tag(self, tag):
+        """Return a shared Tag, as decoding a new one for each node is slow."""
+        if not isinstance(tag, str):
+            return tag
+        if tag not in self.tags:
+            self.tags[tag] = Tag(suffix=tag)
+        return self.tags[tag]
+
+    def represent_scalar(self, tag, value, style=None, anchor=None):
+        return super().represent_scalar(self.get_tag(tag), value, style, anchor)
+
+    def represent_sequence(self, tag, sequence, flow_style=None):
+        return super().represent_sequence(
+            self.get_tag(tag), sequence, flow_style
+        )
+
+    def represent_mapping(self, tag, mapping, flow_style=None):
+        return super().represent_mapping(self.get_tag(tag), mapping, flow_style)
+
+    def represent_double_quoted(self, data):
+        """Keep double quotes, as some values must not be read as bool."""
+        return self.represent_scalar(
+            "tag:yaml.org,2002:str", str(data), style='"'
+        )
+
+    def represent_text(self, data):
+        """Represent loaded strings, as libyaml only accepts 'str'."""
+        return self.represent_str(str(data))
+
+    def represent_scalar_bool(self, data):
+        """Represent a loaded boolean value."""
+        return self.represent_bool(bool(data))
+
+
+FastRepresenter.add_representer(
+    DoubleQuotedScalarString, FastRepresenter.represent_double_quoted
+)
+FastRepresenter.add_representer(
+    ScalarBoolean, FastRepresenter.represent_scalar_bool
+)
+# Round-trip containers and scalars are subclasses of the basic types.
+FastRepresenter.add_multi_representer(dict, FastRepresenter.represent_dict)
+FastRepresenter.add_multi_representer(list, FastRepresenter.represent_list)
+FastRepresenter.add_multi_representer(str, FastRepresenter.represent_text)
+FastRepresenter.add_multi_representer(int, FastRepresenter.represent_int)
+FastRepresenter.add_multi_representer(float, FastRepresenter.represent_float)
+FastRepresenter.add_multi_representer(
+    datetime.datetime, FastRepresenter.represent_datetime
+)
+
+
+def get_fast_yaml():
+    """Return the YAML processor used to save files without comments."""
+    yaml = YAML(typ="safe")
+    yaml.Representer = FastRepresenter
+    yaml.explicit_start = True
+    yaml.default_flow_style = False
+    return yaml
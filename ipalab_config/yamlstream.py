@@ -0,0 +1,150 @@
+"""Serialize large YAML documents one mapping entry at a time.
+
+The ruamel.yaml round-trip dumper represents the whole document as a
+graph of nodes before emitting it, and keeps every node until the end
+of the document. For labs with thousands of nodes, this graph uses a
+lot more memory than the data itself. The streaming dumper represents
+each mapping entry only when it is emitted, and only keeps the nodes
+that may be referenced again, producing the same output.
+"""
+
+from ruamel.yaml.nodes import MappingNode
+from ruamel.yaml.representer import RoundTripRepresenter
+from ruamel.yaml.serializer import Serializer
+from ruamel.yaml.tag import Tag
+
+
+class LazyItems:
+    """Mapping items that are represented only when iterated."""
+
+    def __init__(self, representer, mapping):
+        self.representer = representer
+        self.mapping = mapping
+
+    def __len__(self):
+        return len(self.mapping)
+
+    def __iter__(self):
+        for key, value in self.mapping.items():
+            yield (
+                self.representer.represent_key(key),
+                self.representer.represent_data(value),
+            )
+
+
+class StreamingRepresenter(RoundTripRepresenter):
+    """Represent plain mappings lazily, keeping only shared nodes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shared_anchors = {}
+
+    def find_shared_objects(self, data):
+        """Assign anchors to the objects referenced more than once.
+
+        The anchors are named as the serializer would name them, in the
+        order the second reference to each object is found.
+        """
+        seen = set()
+        anchors = {}
+
+        def walk(item):
+            if self.ignore_aliases(item):
+                return
+            if id(item) in seen:
+                if id(item) not in anchors:
+                    anchor = getattr(item, "yaml_anchor", lambda: None)()
+                    if anchor is None or anchor.value is None:
+                        anchor = Serializer.ANCHOR_TEMPLATE.format(
+                            len(anchors) + 1
+                        )
+                    else:
+                        anchor = anchor.value
+                    anchors[id(item)] = anchor
+                return
+            seen.add(id(item))
+            if isinstance(item, dict):
+                for key, value in item.items():
+                    walk(key)
+                    walk(value)
+            elif isinstance(item, (list, tuple, set)):
+                for value in item:
+                    walk(value)
+
+        walk(data)
+        return anchors
+
+    def represent(self, data):
+        self.shared_anchors = self.find_shared_objects(data)
+        super().represent(data)
+        self.shared_anchors = {}
+
+    def represent_data(self, data):
+        node = super().represent_data(data)
+        anchor = self.shared_anchors.get(id(data))
+        if anchor is not None:
+            self.serializer.anchors.setdefault(node, anchor)
+        else:
+            # The object is not referenced again, so its node is not needed.
+            self.represented_objects.pop(id(data), None)
+        return node
+
+    def represent_dict(self, data):
+        # Only plain, non-empty, mappings in block style can be emitted
+        # before all its items are represented.
+        if (
+            type(data) is not dict  # pylint: disable=unidiomatic-typecheck
+            or not data
+            or self.default_flow_style is None
+        ):
+            return self.represent_mapping("tag:yaml.org,2002:map", data)
+        node = MappingNode(
+            Tag(suffix="tag:yaml.org,2002:map"),
+            LazyItems(self, data),
+            flow_style=self.default_flow_style,
+        )
+        if self.alias_key is not None:
+            self.represented_objects[self.alias_key] = node
+        return node
+
+
+StreamingRepresenter.add_representer(dict, StreamingRepresenter.represent_dict)
+
+
+class StreamingSerializer(Serializer):
+    """Serialize nodes as they are represented, forgetting unshared nodes."""
+
+    def anchor_node(self, node):
+        # Anchors are assigned by the representer, before serialization.
+        pass
+
+    def serialize_node(self, node, parent, index):
+        if node not in self.anchors:
+            anchor = getattr(node, "anchor", None)
+            self.anchors[node] = (
+                anchor.value if getattr(anchor, "always_dump", False) else None
+            )
+        super().serialize_node(node, parent, index)
+        if self.anchors[node] is None:
+            del self.anchors[node]
+            self.serialized_nodes.pop(node, None)
+
+
+def get_streaming_yaml(yaml):
+    """Return a YAML processor like 'yaml', using the streaming dumper."""
+    # pylint: disable=import-outside-toplevel
+    from ruamel.yaml import YAML
+
+    streaming = YAML(typ=yaml.typ, pure=True)
+    streaming.Representer = StreamingRepresenter
+    streaming.Serializer = StreamingSerializer
+    streaming.explicit_start = yaml.explicit_start
+    streaming.explicit_end = yaml.explicit_end
+    streaming.width = yaml.width
+    streaming.default_flow_style = yaml.default_flow_style
+    streaming.indent(
+        mapping=yaml.map_indent,
+        sequence=yaml.sequence_indent,
+        offset=yaml.sequence_dash_offset,
+    )
+    return streaming